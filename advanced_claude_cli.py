@@ -9,17 +9,26 @@ import argparse
 import sys
 import os
 from pathlib import Path
-from claude_code_sdk import query, ClaudeCodeOptions, ResultMessage, AssistantMessage, SystemMessage
+from lazy_sdk import PendingOptions, load_sdk, query
 from ui_theme import Colors, Icons, Theme
+from stream_renderer import StreamRenderer
+from async_input import InputReader, Spinner
+from build_telemetry import instrument, new_build_id
 
 
 class ClaudeCliInterface:
     def __init__(self):
         self.session_id = None
-        self.options = ClaudeCodeOptions(
+        self.build_id = new_build_id('advanced_cli')
+        self.options = PendingOptions(
             permission_mode='default',
-            cwd=os.getcwd()
+            cwd=os.getcwd(),
+            model=None
         )
+        self.renderer = StreamRenderer()
+        self.spinner = Spinner(f"{Colors.MUTED}thinking...{Colors.RESET}")
+        self.input = InputReader(on_idle_interrupt=lambda: print(
+            "\n\n" + Theme.status("Interrupted. Type 'exit' to quit.", 'warning')))
         
     def parse_command(self, input_str):
         """Parse special commands like /help, /model, etc."""
@@ -96,23 +105,36 @@ class ClaudeCliInterface:
             message_count = 0
             tool_uses = []
             
-            async for message in query(prompt=prompt, options=self.options):
+            sdk = load_sdk()
+            self.spinner.start()
+            async for message in instrument(query(prompt=prompt, options=self.options), self.build_id, 'advanced_cli'):
+                self.spinner.stop()
                 message_count += 1
                 
-                if isinstance(message, AssistantMessage):
+                if isinstance(message, sdk.AssistantMessage):
+                    # Consecutive tool uses are drawn as one batch
+                    tools = []
                     for block in message.content:
                         if hasattr(block, 'text'):
-                            print(block.text, end="", flush=True)
+                            if tools:
+                                self.renderer.flush()
+                                print(Theme.tool_uses(tools))
+                                tools = []
+                            self.renderer.feed(block.text)
                         elif hasattr(block, 'name'):
                             tool_uses.append(block.name)
-                            print(Theme.tool_use(block.name, block.input if hasattr(block, 'input') else {}))
+                            tools.append((block.name, block.input if hasattr(block, 'input') else {}))
+                    if tools:
+                        self.renderer.flush()
+                        print(Theme.tool_uses(tools))
                 
-                elif isinstance(message, SystemMessage):
+                elif isinstance(message, sdk.SystemMessage):
                     if message.subtype == 'tool_result':
                         # Could show tool results if desired
                         pass
                 
-                elif isinstance(message, ResultMessage):
+                elif isinstance(message, sdk.ResultMessage):
+                    self.renderer.finish()
                     print("\n" + Theme.session_summary(
                         message.duration_ms,
                         message.num_turns,
@@ -121,9 +143,13 @@ class ClaudeCliInterface:
                     ))
                     self.session_id = message.session_id
             
+            self.spinner.stop()
+            self.renderer.finish()
             print()  # Final newline
             
         except Exception as e:
+            self.spinner.stop()
+            self.renderer.finish()
             print(f"\n{Theme.status(f'Error: {e}', 'error')}")
     
     async def run(self):
@@ -136,7 +162,8 @@ class ClaudeCliInterface:
             try:
                 # Show prompt with working directory
                 cwd = Path(self.options.cwd).name
-                prompt_str = input(f"\n{Theme.prompt(cwd, self.options.permission_mode)}").strip()
+                # Lines typed while Claude responds are queued as the next prompts
+                prompt_str = (await self.input.read(f"\n{Theme.prompt(cwd, self.options.permission_mode)}")).strip()
                 
                 if prompt_str.lower() in ['exit', 'quit']:
                     print(Theme.status("Goodbye!", 'success'))
@@ -150,14 +177,18 @@ class ClaudeCliInterface:
                 if parsed is None:
                     continue
                 
-                # Run the conversation
-                await self.run_conversation(parsed)
+                # Run the conversation; Ctrl-C cancels just this query
+                if not await self.input.run(self.run_conversation(parsed)):
+                    self.spinner.stop()
+                    self.renderer.finish()
+                    print("\n\n" + Theme.status("Query interrupted.", 'warning'))
                 
             except KeyboardInterrupt:
-                print(f"\n\n{Theme.status('Interrupted. Type \'exit\' to quit.', 'warning')}")
+                print("\n\n" + Theme.status("Interrupted. Type 'exit' to quit.", 'warning'))
             except EOFError:
                 print(f"\n{Theme.status('Goodbye!', 'success')}")
                 break
+        self.input.close()
 
 
 async def main():
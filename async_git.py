@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Non-blocking git commands for asyncio code.
+
+Every command runs as an asyncio subprocess with a timeout, so a slow fetch
+or push never stalls the event loop; a command that overruns is killed.
+"""
+
+import asyncio
+import hashlib
+import os
+import signal
+from pathlib import Path
+from typing import Optional
+
+
+DEFAULT_TIMEOUT = 600
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+
+def _kill(process):
+    """Kill git and its helpers (ssh, remote-https), which share its process group"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class GitError(RuntimeError):
+    def __init__(self, args, returncode, stderr):
+        self.returncode = returncode
+        self.stderr = stderr
+        super().__init__(f"git {' '.join(args)} failed ({returncode}): {stderr.strip()}")
+
+
+async def git(cwd, *args, timeout: float = DEFAULT_TIMEOUT, check: bool = True, strip: bool = True) -> str:
+    """Run git in cwd and return its stdout"""
+    process = await asyncio.create_subprocess_exec(
+        "git", *args, cwd=str(cwd) if cwd else None, stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True,
+        # Never wait on a credential prompt
+        env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        _kill(process)
+        await process.wait()
+        raise
+    if check and process.returncode != 0:
+        raise GitError(args, process.returncode, stderr.decode(errors="replace"))
+    output = stdout.decode(errors="replace")
+    return output.strip() if strip else output
+
+
+async def returncode(cwd, *args, timeout: float = DEFAULT_TIMEOUT) -> int:
+    """Exit status of a git command (for --quiet checks)"""
+    process = await asyncio.create_subprocess_exec(
+        "git", *args, cwd=str(cwd),
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        return await asyncio.wait_for(process.wait(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        _kill(process)
+        await process.wait()
+        raise
+
+
+async def clone(url: str, target: Path, depth: Optional[int] = None, filter: Optional[str] = None,
+                branch: Optional[str] = None, reference: Optional[Path] = None,
+                timeout: float = DEFAULT_TIMEOUT):
+    """Clone url into target; depth makes a shallow clone, filter a partial one (e.g. blob:none)"""
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    args = ["clone", "--quiet"]
+    if depth:
+        args += ["--depth", str(depth)]
+    if filter:
+        args += ["--filter", filter]
+    if branch:
+        args += ["--branch", branch, "--single-branch"]
+    if reference:
+        args += ["--reference-if-able", str(reference)]
+    await git(None, *args, url, str(target), timeout=timeout)
+
+
+_mirror_locks = {}
+
+
+async def mirror(url: str, cache_dir: Path, timeout: float = DEFAULT_TIMEOUT) -> Path:
+    """Create or refresh a bare mirror of url in cache_dir and return its path
+
+    Clones made with reference=<mirror> borrow its objects instead of
+    fetching and storing their own copy. Mirrors never auto-gc, so objects
+    that borrowing clones rely on are never pruned.
+    """
+    path = Path(cache_dir) / (hashlib.sha256(url.encode()).hexdigest()[:16] + ".git")
+    lock = _mirror_locks.setdefault(str(path), asyncio.Lock())
+    async with lock:
+        if path.exists():
+            await git(path, "fetch", "--quiet", "origin", timeout=timeout)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            await git(None, "clone", "--quiet", "--mirror", url, str(path), timeout=timeout)
+            await git(path, "config", "gc.auto", "0")
+    return path
+
+
+async def rev_parse(cwd, ref: str = "HEAD", timeout: float = 60) -> str:
+    return await git(cwd, "rev-parse", ref, timeout=timeout)
+
+
+async def remote_head(cwd, timeout: float = 60) -> Optional[str]:
+    """Hash of the upstream branch as the remote has it now (refs only, no objects)"""
+    upstream = await git(cwd, "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}", timeout=timeout)
+    remote, _, branch = upstream.partition("/")
+    output = (await git(cwd, "ls-remote", remote, f"refs/heads/{branch}", timeout=timeout)).split()
+    return output[0] if output else None
+
+
+async def pull(cwd, depth: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT):
+    """Bring cwd up to its upstream branch
+
+    A shallow clone (depth) can't fast-forward across history it doesn't
+    have, so it fetches the upstream tip at that depth and resets to it;
+    local changes are discarded, which suits a read-only checkout.
+    """
+    if not depth:
+        await git(cwd, "pull", "--quiet", "--ff-only", timeout=timeout)
+        return
+    upstream = await git(cwd, "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}", timeout=timeout)
+    remote, _, branch = upstream.partition("/")
+    await git(cwd, "fetch", "--quiet", "--depth", str(depth), remote, branch, timeout=timeout)
+    await git(cwd, "reset", "--quiet", "--hard", "FETCH_HEAD", timeout=timeout)
+
+
+async def commit_all(cwd, message: str, timeout: float = DEFAULT_TIMEOUT) -> bool:
+    """Stage every change and commit it; False when there was nothing to commit"""
+    await git(cwd, "add", "--all", timeout=timeout)
+    if await returncode(cwd, "diff", "--cached", "--quiet", timeout=timeout) == 0:
+        return False
+    await git(cwd, "commit", "--quiet", "-m", message, timeout=timeout)
+    return True
+
+
+async def tree_changed(cwd, timeout: float = DEFAULT_TIMEOUT) -> bool:
+    """Whether the work tree differs from HEAD, without reading unchanged files
+
+    update-index --refresh revalidates the index stat cache, so diff-index
+    only compares files whose stat data changed; untracked files count too.
+    """
+    await returncode(cwd, "update-index", "-q", "--refresh", timeout=timeout)
+    if await returncode(cwd, "diff-index", "--quiet", "HEAD", "--", timeout=timeout) != 0:
+        return True
+    untracked = await git(cwd, "ls-files", "--others", "--exclude-standard", "--directory",
+                          "--no-empty-directory", timeout=timeout)
+    return bool(untracked)
+
+
+async def diff_stats(cwd, base: Optional[str], head: str = "HEAD", timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """Files changed, insertions and deletions between base (None: empty tree) and head"""
+    output = await git(cwd, "diff", "--numstat", base or EMPTY_TREE, head, timeout=timeout)
+    stats = {"files": 0, "insertions": 0, "deletions": 0, "binary": 0}
+    for line in output.splitlines():
+        added, deleted, _ = line.split("\t", 2)
+        stats["files"] += 1
+        if added == "-":
+            stats["binary"] += 1
+        else:
+            stats["insertions"] += int(added)
+            stats["deletions"] += int(deleted)
+    return stats
+
+
+async def push(cwd, timeout: float = DEFAULT_TIMEOUT):
+    await git(cwd, "push", "--quiet", timeout=timeout)
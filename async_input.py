@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Asyncio-native terminal input for the interactive CLIs.
+
+The builtin input() blocks the event loop, so nothing else runs while the
+CLI waits for a prompt and nothing can be typed while Claude streams.
+InputReader instead reads stdin lines on a daemon thread into an asyncio
+queue:
+
+- lines typed while a query is running are queued (type-ahead) and used
+  as the next prompts, in order
+- Ctrl-C while a query runs cancels just that query; at the prompt it
+  only prints a hint, as before
+- the loop stays free for timers such as the Spinner and renderer frames
+
+On platforms without loop signal handlers (Windows) Ctrl-C keeps raising
+KeyboardInterrupt, which the CLIs already handle.
+"""
+
+import asyncio
+import signal
+import sys
+import threading
+from typing import Awaitable, Callable, Optional, TextIO
+
+from ui_theme import Colors, Icons
+
+
+EOF = object()
+
+
+class InputReader:
+    """Prompt lines from a reader thread, with type-ahead and query cancellation"""
+
+    def __init__(self, stream: Optional[TextIO] = None, output: Optional[TextIO] = None,
+                 on_idle_interrupt: Optional[Callable[[], None]] = None):
+        self.stream = stream or sys.stdin
+        self.output = output or sys.stdout
+        self.on_idle_interrupt = on_idle_interrupt
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Future] = None
+        self._interrupted = False
+        self._prompt = ''
+        self._signals = False
+
+    @property
+    def pending(self) -> int:
+        """Lines typed ahead and not read yet"""
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        """Start the reader thread and take over Ctrl-C; called by the first read()"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._thread = threading.Thread(target=self._read_lines, name='input-reader', daemon=True)
+        self._thread.start()
+        try:
+            self._loop.add_signal_handler(signal.SIGINT, self.interrupt)
+            self._signals = True
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass  # no loop signal handlers here; Ctrl-C raises KeyboardInterrupt
+
+    def close(self):
+        if self._signals:
+            self._loop.remove_signal_handler(signal.SIGINT)
+            self._signals = False
+
+    def _read_lines(self):
+        while True:
+            try:
+                line = self.stream.readline()
+            except (OSError, ValueError):
+                line = ''
+            if not line:
+                self._loop.call_soon_threadsafe(self._queue.put_nowait, EOF)
+                return
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, line.rstrip('\r\n'))
+
+    async def read(self, prompt: str = '') -> str:
+        """Next line, showing prompt; raises EOFError at end of input
+
+        A line that was typed ahead is echoed after the prompt so the
+        transcript shows what was sent.
+        """
+        self.start()
+        self._prompt = prompt
+        if self._queue.empty():
+            self.output.write(prompt)
+            self.output.flush()
+            line = await self._queue.get()
+        else:
+            line = self._queue.get_nowait()
+            if line is not EOF:
+                self.output.write(f"{prompt}{line} {Colors.MUTED}(queued){Colors.RESET}\n")
+                self.output.flush()
+        if line is EOF:
+            self._queue.put_nowait(EOF)  # later reads see EOF too
+            raise EOFError
+        return line
+
+    async def run(self, awaitable: Awaitable) -> bool:
+        """Run a query so Ctrl-C cancels it; False if it was interrupted"""
+        self.start()
+        self._task = asyncio.ensure_future(awaitable)
+        self._interrupted = False
+        try:
+            await self._task
+            return True
+        except asyncio.CancelledError:
+            if not self._interrupted:
+                raise  # we were cancelled ourselves, not by Ctrl-C
+            return False
+        finally:
+            self._task = None
+
+    def interrupt(self):
+        """Ctrl-C: cancel the running query, or hint at the prompt"""
+        if self._task is not None and not self._task.done():
+            self._interrupted = True
+            self._task.cancel()
+        elif self.on_idle_interrupt is not None:
+            self.on_idle_interrupt()
+            self.output.write(self._prompt)
+            self.output.flush()
+
+
+class Spinner:
+    """Animated status line shown while waiting for the first response"""
+
+    def __init__(self, text: str, stream: Optional[TextIO] = None, interval: float = 0.08):
+        self.text = text
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and getattr(self.stream, 'isatty', lambda: False)():
+            self._task = asyncio.get_running_loop().create_task(self._spin())
+
+    async def _spin(self):
+        frame = 0
+        while True:
+            icon = Icons.SPINNER[frame % len(Icons.SPINNER)]
+            self.stream.write(f"\r{Colors.PRIMARY}{icon}{Colors.RESET} {self.text}")
+            self.stream.flush()
+            frame += 1
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        """Stop and clear the spinner line; safe to call repeatedly"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self.stream.write(f"\r{' ' * 50}\r")
+        self.stream.flush()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the CLI entry points.
+
+For each CLI this measures two things in fresh interpreters:
+
+- import time of the module (python -X importtime), with its slowest imports
+- wall time from process start to the first input prompt, with a throwaway
+  HOME so no real project data is read
+
+Usage:
+    python bench_startup.py [--runs N] [--budget-ms MS] [CLI ...]
+
+Exits non-zero when a CLI's median time to prompt is over the budget.
+"""
+
+import argparse
+import os
+import select
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+CLIS = ['claude_cli_interface.py', 'claude_cli_interface_modern.py',
+        'advanced_claude_cli.py', 'claude_cli_with_projects.py']
+PROMPT_MARKER = '❯'.encode()
+REPO_DIR = Path(__file__).resolve().parent
+
+
+def import_times(module: str):
+    """(total µs, [(cumulative µs, name)] of the slowest imports) for importing module"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = line.replace('import time:', '|', 1).split('|')
+        # The name keeps its indentation, which shows the import nesting
+        rows.append((int(cumulative_us), name[1:].rstrip()))
+    total = next(us for us, name in reversed(rows) if name == module)
+    # Top-level imports of the module (one indent level below it)
+    direct = [(us, name.strip()) for us, name in rows if name.startswith('  ') and not name.startswith('    ')]
+    return total, sorted(direct, reverse=True)
+
+
+def time_to_prompt(script: str, home: Path, timeout: float = 30.0) -> float:
+    """Seconds until the CLI prints its input prompt"""
+    env = dict(os.environ, HOME=str(home), PYTHONDONTWRITEBYTECODE='1')
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script], cwd=REPO_DIR, env=env,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output = b''
+    try:
+        while PROMPT_MARKER not in output:
+            remaining = timeout - (time.perf_counter() - started)
+            ready, _, _ = select.select([process.stdout], [], [], max(remaining, 0))
+            if not ready:
+                raise RuntimeError(f"no prompt within {timeout:.0f}s")
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                error = process.stderr.read().decode(errors='replace').strip().splitlines()
+                raise RuntimeError(error[-1] if error else "exited before prompting")
+            output += chunk
+        return time.perf_counter() - started
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure CLI cold-start time to the first prompt')
+    parser.add_argument('clis', nargs='*', default=CLIS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=300, help='Fail if median time to prompt is over this')
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports to list per CLI')
+    args = parser.parse_args()
+
+    over_budget = []
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as home:
+        for script in args.clis:
+            module = Path(script).stem
+            print(f"\n{script}")
+            try:
+                total_us, slowest = import_times(module)
+                samples = [time_to_prompt(script, Path(home)) for _ in range(args.runs)]
+            except RuntimeError as e:
+                print(f"  failed: {e}")
+                over_budget.append(script)
+                continue
+
+            median_ms = statistics.median(samples) * 1000
+            print(f"  import:          {total_us / 1000:8.1f} ms")
+            for us, name in slowest[:args.top]:
+                print(f"    {name:<28} {us / 1000:8.1f} ms")
+            print(f"  time to prompt:  {median_ms:8.1f} ms median, {min(samples) * 1000:.1f} ms best "
+                  f"({args.runs} runs, budget {args.budget_ms:.0f} ms)")
+            if median_ms > args.budget_ms:
+                over_budget.append(script)
+
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
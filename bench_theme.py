@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the ui_theme rendering primitives.
+
+Times the Theme calls the CLIs make per prompt and per tool use, with
+warm caches (the steady state) and with the caches cleared before every
+call (what each call cost before the fragments were cached).
+
+Usage:
+    python bench_theme.py [--number N] [--tools N]
+"""
+
+import argparse
+import timeit
+
+import ui_theme
+from ui_theme import Theme
+
+
+CACHES = [ui_theme.fragments, ui_theme._tool_head, ui_theme._header,
+          ui_theme._box_edges, ui_theme._prompt]
+
+
+def clear_caches():
+    for cache in CACHES:
+        cache.cache_clear()
+    ui_theme._clock_minute = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the Theme rendering primitives')
+    parser.add_argument('--number', type=int, default=20000, help='Calls per measurement')
+    parser.add_argument('--tools', type=int, default=200, help='Tool uses in the batch case')
+    args = parser.parse_args()
+
+    events = [('Edit', {'file_path': f'/src/module_{i}.py'}) if i % 2 else
+              ('Bash', {'command': f'python -m pytest tests/test_{i}.py -q'}) for i in range(args.tools)]
+    output = '\n'.join(f'{i:4} ' + 'result 🔧 中文 ' * 12 for i in range(500))
+    cases = {
+        'prompt': lambda: Theme.prompt('/home/user/project', 'acceptEdits'),
+        'status': lambda: Theme.status('Session saved', 'success'),
+        'header': lambda: Theme.header('Claude Code CLI', 60),
+        'box': lambda: Theme.box('line one\nline two', 'Info'),
+        'box (wrapped 500)': lambda: Theme.box(output, 'Output', width=100),
+        'tool_use': lambda: Theme.tool_use('Edit', {'file_path': '/src/app.py'}),
+        f'tool_use x{args.tools}': lambda: ''.join(Theme.tool_use(name, params) for name, params in events),
+        f'tool_uses ({args.tools})': lambda: Theme.tool_uses(events),
+    }
+
+    print(f"{'call':<20} {'warm µs':>10} {'cold µs':>10}")
+    for name, call in cases.items():
+        number = args.number if '(' not in name and ' x' not in name else max(args.number // 500, 1)
+        warm = timeit.timeit(call, number=number) / number
+        cold = timeit.timeit(lambda: (clear_caches(), call()), number=number) / number
+        print(f"{name:<20} {warm * 1e6:10.2f} {cold * 1e6:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
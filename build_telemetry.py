@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Structured telemetry for claude_code_sdk.query runs.
+
+instrument() wraps a query's message stream and emits JSONL events to a
+ledger: one "turn" event per assistant message (latency since the previous
+message), one "tool" event per completed tool call (with its duration) and a
+"query" summary with time to first assistant token, tool counts, tokens and
+cost. Events are handed to a background writer thread, so the query loop
+never waits on disk; the ledger file is rotated by size.
+
+Telemetry is opt-in: nothing is written unless CLAUDE_TELEMETRY is set.
+
+Settings:
+    CLAUDE_TELEMETRY=1            enable
+    CLAUDE_TELEMETRY_LEDGER=PATH  ledger file (default ~/.claude_telemetry/ledger.jsonl)
+    CLAUDE_TELEMETRY_MAX_MB=N     rotate after N MB (default 20, 5 backups kept)
+
+Usage:
+    python build_telemetry.py report [--ledger PATH] [--build ID] [--last N]
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+
+DEFAULT_LEDGER = Path.home() / '.claude_telemetry' / 'ledger.jsonl'
+
+
+class TelemetryLedger:
+    """Size-rotated JSONL file fed by a background writer thread"""
+
+    def __init__(self, path: Path, max_bytes: int = 20 * 1024 * 1024, backups: int = 5,
+                 queue_size: int = 10000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._writer, name='telemetry-ledger', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, event: Dict):
+        """Queue an event; never blocks (events are dropped if the writer falls behind)"""
+        event.setdefault('ts', time.time())
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued events and stop the writer"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def _writer(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            batch = [event]
+            # Write whatever else is already queued in the same append
+            while len(batch) < 1000:
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    self._write(batch)
+                    return
+                batch.append(event)
+            self._write(batch)
+
+    def _write(self, batch: List[Dict]):
+        try:
+            if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a') as f:
+                f.write(''.join(json.dumps(e, default=str) + '\n' for e in batch))
+        except OSError:
+            self.dropped += len(batch)
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def telemetry_enabled() -> bool:
+    return os.environ.get('CLAUDE_TELEMETRY', '0').lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_ledger() -> Optional[TelemetryLedger]:
+    """Process-wide ledger configured from the environment (None unless enabled)"""
+    global _ledger
+    if not telemetry_enabled():
+        return None
+    with _ledger_lock:
+        if _ledger is None:
+            path = Path(os.environ.get('CLAUDE_TELEMETRY_LEDGER', DEFAULT_LEDGER))
+            max_mb = float(os.environ.get('CLAUDE_TELEMETRY_MAX_MB', 20))
+            _ledger = TelemetryLedger(path, max_bytes=int(max_mb * 1024 * 1024))
+    return _ledger
+
+
+def new_build_id(prefix: str = 'build') -> str:
+    return f"{prefix}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+async def instrument(messages: AsyncIterator, build_id: str, source: str,
+                     ledger: Optional[TelemetryLedger] = None) -> AsyncIterator:
+    """Pass messages through unchanged while emitting telemetry events"""
+    ledger = ledger or get_ledger()
+    if ledger is None:
+        async for message in messages:
+            yield message
+        return
+
+    query_id = uuid.uuid4().hex[:12]
+    base = {'build_id': build_id, 'query_id': query_id, 'source': source}
+    started = last = time.perf_counter()
+    first_token = None
+    turns = 0
+    tools_started = {}
+    tool_counts = defaultdict(int)
+    tool_seconds = defaultdict(float)
+    summary = {'cost_usd': 0.0, 'input_tokens': 0, 'output_tokens': 0, 'is_error': False}
+    status = 'ok'
+
+    try:
+        async for message in messages:
+            now = time.perf_counter()
+            content = getattr(message, 'content', None)
+            if hasattr(message, 'model') and isinstance(content, list):
+                turns += 1
+                if first_token is None and any(hasattr(b, 'text') for b in content):
+                    first_token = now - started
+                ledger.emit(dict(base, event='turn', turn=turns, latency_s=round(now - last, 4)))
+                for block in content:
+                    if hasattr(block, 'name') and hasattr(block, 'id'):
+                        tools_started[block.id] = (block.name, now)
+            elif isinstance(content, list):
+                # Tool results come back in user messages
+                for block in content:
+                    started_tool = tools_started.pop(getattr(block, 'tool_use_id', None), None)
+                    if started_tool:
+                        name, tool_start = started_tool
+                        tool_counts[name] += 1
+                        tool_seconds[name] += now - tool_start
+                        ledger.emit(dict(base, event='tool', tool=name,
+                                         duration_s=round(now - tool_start, 4),
+                                         is_error=bool(getattr(block, 'is_error', False))))
+            elif hasattr(message, 'total_cost_usd'):
+                usage = getattr(message, 'usage', None) or {}
+                summary.update(
+                    cost_usd=message.total_cost_usd or 0.0,
+                    input_tokens=usage.get('input_tokens', 0),
+                    output_tokens=usage.get('output_tokens', 0),
+                    is_error=bool(getattr(message, 'is_error', False)),
+                    api_duration_s=(getattr(message, 'duration_api_ms', 0) or 0) / 1000,
+                    cached=bool(getattr(message, 'cached', False)),
+                )
+            yield message
+            # Time spent by the consumer between messages isn't model latency
+            last = time.perf_counter()
+    except BaseException as e:
+        status = 'cancelled' if isinstance(e, (GeneratorExit, KeyboardInterrupt, asyncio.CancelledError)) else 'error'
+        summary['error'] = str(e) or type(e).__name__
+        raise
+    finally:
+        if summary['is_error'] and status == 'ok':
+            status = 'error'
+        ledger.emit(dict(
+            base, event='query', status=status, turns=turns,
+            wall_s=round(time.perf_counter() - started, 4),
+            ttft_s=round(first_token, 4) if first_token is not None else None,
+            tool_counts=dict(tool_counts),
+            tool_seconds={k: round(v, 4) for k, v in tool_seconds.items()},
+            **summary,
+        ))
+
+
+def emit(event: Dict):
+    """Record a non-query event (e.g. a build summary) if telemetry is on"""
+    ledger = get_ledger()
+    if ledger:
+        ledger.emit(event)
+
+
+# Reporting
+
+def read_events(path: Path) -> List[Dict]:
+    """Events from the ledger and its rotated backups, oldest first"""
+    backups = sorted((p for p in path.parent.glob(f"{path.name}.*") if p.suffix[1:].isdigit()),
+                     key=lambda p: int(p.suffix[1:]), reverse=True)
+    events = []
+    for f in backups + [path]:
+        if not f.exists():
+            continue
+        with open(f) as fh:
+            for line in fh:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    return events
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(events: List[Dict]) -> List[Dict]:
+    """Per-build aggregates, in order of first appearance"""
+    builds = {}
+    for event in events:
+        build = builds.setdefault(event.get('build_id'), {
+            'build_id': event.get('build_id'), 'source': event.get('source'), 'started': event.get('ts'),
+            'queries': 0, 'errors': 0, 'turn_latency': [], 'ttft': [], 'cost_usd': 0.0,
+            'input_tokens': 0, 'output_tokens': 0, 'tools': defaultdict(int),
+        })
+        if event.get('event') == 'turn':
+            build['turn_latency'].append(event['latency_s'])
+        elif event.get('event') == 'query':
+            build['queries'] += 1
+            build['errors'] += event.get('status') != 'ok'
+            build['cost_usd'] += event.get('cost_usd') or 0.0
+            build['input_tokens'] += event.get('input_tokens') or 0
+            build['output_tokens'] += event.get('output_tokens') or 0
+            if event.get('ttft_s') is not None:
+                build['ttft'].append(event['ttft_s'])
+            for tool, count in (event.get('tool_counts') or {}).items():
+                build['tools'][tool] += count
+
+    report = []
+    for build in builds.values():
+        report.append({
+            'build_id': build['build_id'],
+            'source': build['source'],
+            'started': build['started'],
+            'queries': build['queries'],
+            'errors': build['errors'],
+            'turn_p50_s': percentile(build['turn_latency'], 50),
+            'turn_p95_s': percentile(build['turn_latency'], 95),
+            'ttft_p50_s': percentile(build['ttft'], 50),
+            'ttft_p95_s': percentile(build['ttft'], 95),
+            'cost_usd': round(build['cost_usd'], 4),
+            'tokens': build['input_tokens'] + build['output_tokens'],
+            'tools': dict(build['tools']),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate query telemetry per build')
+    parser.add_argument('command', choices=['report'])
+    parser.add_argument('--ledger', type=Path,
+                        default=Path(os.environ.get('CLAUDE_TELEMETRY_LEDGER', DEFAULT_LEDGER)))
+    parser.add_argument('--build', help='Only this build id')
+    parser.add_argument('--last', type=int, default=20, help='Show the last N builds')
+    args = parser.parse_args()
+
+    report = summarize(read_events(args.ledger))
+    if args.build:
+        report = [b for b in report if b['build_id'] == args.build]
+    report = report[-args.last:]
+    if not report:
+        print(f"No telemetry in {args.ledger}")
+        return
+
+    def fmt(value):
+        return f"{value:.2f}" if value is not None else "-"
+
+    print(f"{'build':<40} {'queries':>7} {'err':>4} {'turn p50':>9} {'turn p95':>9} "
+          f"{'ttft p50':>9} {'ttft p95':>9} {'cost $':>9} {'tokens':>9}")
+    for b in report:
+        print(f"{str(b['build_id'])[:40]:<40} {b['queries']:>7} {b['errors']:>4} {fmt(b['turn_p50_s']):>9} "
+              f"{fmt(b['turn_p95_s']):>9} {fmt(b['ttft_p50_s']):>9} {fmt(b['ttft_p95_s']):>9} "
+              f"{b['cost_usd']:>9.4f} {b['tokens']:>9}")
+    if args.build and report:
+        tools = sorted(report[0]['tools'].items(), key=lambda item: -item[1])
+        print("Tools: " + ", ".join(f"{name} x{count}" for name, count in tools))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,36 +3,54 @@
 Flask backend for Claude Web Interface with project management
 """
 
-from flask import Flask, jsonify, request, session
+from flask import Flask, Response, jsonify, request, session
 from flask_cors import CORS
 from datetime import datetime
 import json
 import os
+import re
 from pathlib import Path
+import sys
 import uuid
 import asyncio
 from functools import wraps
 
+# json_store.py and query_scheduler.py live at the repository root, shared with the CLI tools
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from storage import create_storage, DEFAULT_PAGE_SIZE
+from claude_stream import ClaudeStreamer, ClaudeCodeOptions, QueueFullError, wants_event_stream
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
-CORS(app, origins=['http://localhost:3001', 'https://kevinalthaus.com', 'http://kevinalthaus.com'], supports_credentials=True)
+CORS_ORIGINS = ['http://localhost:3001', 'https://kevinalthaus.com', 'http://kevinalthaus.com']
+CORS(app, origins=CORS_ORIGINS, supports_credentials=True)
 
 # Storage paths
-DATA_DIR = Path.home() / '.claude_web'
-DATA_DIR.mkdir(exist_ok=True)
-PROJECTS_FILE = DATA_DIR / 'projects.json'
-SESSIONS_DIR = DATA_DIR / 'sessions'
-SESSIONS_DIR.mkdir(exist_ok=True)
+DATA_DIR = Path(os.environ.get('CLAUDE_WEB_DATA_DIR', Path.home() / '.claude_web'))
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# 'json' (projects.json + session files) or 'sqlite' (see migrate_to_sqlite.py)
+storage = create_storage(os.environ.get('CLAUDE_WEB_STORAGE', 'json'), DATA_DIR)
+
+# Permission modes a client may request. bypassPermissions is never accepted
+# from a request: it would run tools on this host without any checks.
+ALLOWED_PERMISSION_MODES = ('default', 'acceptEdits', 'plan')
+# Comma-separated model names clients may pick; unset allows any model name
+ALLOWED_MODELS = [m.strip() for m in os.environ.get('CLAUDE_WEB_MODELS', '').split(',') if m.strip()]
+MODEL_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._:-]{0,99}$')
+
+# Shared background event loop for all Claude runs in this worker
+streamer = ClaudeStreamer(
+    queue_size=int(os.environ.get('CLAUDE_STREAM_QUEUE_SIZE', 64)),
+    client_timeout=float(os.environ.get('CLAUDE_STREAM_CLIENT_TIMEOUT', 30))
+)
 
 
 class ProjectManager:
     @staticmethod
     def load_projects():
-        """Load all projects from disk"""
-        if PROJECTS_FILE.exists():
-            with open(PROJECTS_FILE, 'r') as f:
-                return json.load(f)
-        return {}
+        """Load all projects from storage"""
+        return {p['id']: p for p in storage.list_projects()}
     
     @staticmethod
     def save_projects(projects):
@@ -41,13 +59,11 @@ class ProjectManager:
             pid: proj for pid, proj in projects.items() 
             if not proj.get('is_temp', False)
         }
-        with open(PROJECTS_FILE, 'w') as f:
-            json.dump(permanent_projects, f, indent=2)
+        storage.replace_projects(permanent_projects)
     
     @staticmethod
     def create_project(name, path=None, is_temp=False):
         """Create a new project"""
-        projects = ProjectManager.load_projects()
         project_id = str(uuid.uuid4())
         
         project = {
@@ -60,47 +76,36 @@ class ProjectManager:
             'session_count': 0
         }
         
-        projects[project_id] = project
-        
         if not is_temp:
-            ProjectManager.save_projects(projects)
+            storage.put_project(project)
         
         return project
     
-    @staticmethod
-    def get_session_file(project_id, session_id):
-        """Get path to session file"""
-        return SESSIONS_DIR / f"{project_id}_{session_id}.json"
-    
     @staticmethod
     def save_session(project_id, session_data):
         """Save a session"""
         session_id = str(uuid.uuid4())
-        session_file = ProjectManager.get_session_file(project_id, session_id)
         
-        with open(session_file, 'w') as f:
-            json.dump({
-                'id': session_id,
-                'project_id': project_id,
-                'created_at': datetime.now().isoformat(),
-                'messages': session_data.get('messages', []),
-                'metadata': session_data.get('metadata', {})
-            }, f, indent=2)
+        storage.save_session({
+            'id': session_id,
+            'project_id': project_id,
+            'created_at': datetime.now().isoformat(),
+            'messages': session_data.get('messages', []),
+            'metadata': session_data.get('metadata', {})
+        })
         
         # Update project session count
-        projects = ProjectManager.load_projects()
-        if project_id in projects:
-            projects[project_id]['session_count'] += 1
-            projects[project_id]['last_accessed'] = datetime.now().isoformat()
-            ProjectManager.save_projects(projects)
+        storage.update_project(
+            project_id,
+            increments={'session_count': 1},
+            last_accessed=datetime.now().isoformat()
+        )
         
         return session_id
     
     @staticmethod
     def convert_temp_to_permanent(temp_project_id, new_name=None):
         """Convert a temporary project to permanent"""
-        projects = ProjectManager.load_projects()
-        
         # Get temp project from session
         temp_projects = session.get('temp_projects', {})
         if temp_project_id not in temp_projects:
@@ -112,8 +117,7 @@ class ProjectManager:
             project['name'] = new_name
         
         # Add to permanent projects
-        projects[temp_project_id] = project
-        ProjectManager.save_projects(projects)
+        storage.put_project(project)
         
         # Remove from temp projects
         del temp_projects[temp_project_id]
@@ -127,11 +131,10 @@ class ProjectManager:
 @app.route('/api/projects', methods=['GET'])
 def get_projects():
     """Get all projects including temp ones from session"""
-    projects = ProjectManager.load_projects()
-    
     # Add temp projects from session
     temp_projects = session.get('temp_projects', {})
-    all_projects = {**projects, **temp_projects}
+    all_projects = ProjectManager.load_projects()
+    all_projects.update(temp_projects)
     
     # Convert to list and sort by last accessed
     project_list = list(all_projects.values())
@@ -168,19 +171,16 @@ def create_project():
 @app.route('/api/projects/<project_id>/select', methods=['POST'])
 def select_project(project_id):
     """Select a project as current"""
-    projects = ProjectManager.load_projects()
     temp_projects = session.get('temp_projects', {})
     
-    if project_id not in projects and project_id not in temp_projects:
+    # Update last accessed
+    updated = storage.update_project(project_id, last_accessed=datetime.now().isoformat())
+    
+    if updated is None and project_id not in temp_projects:
         return jsonify({'error': 'Project not found'}), 404
     
     session['current_project_id'] = project_id
     
-    # Update last accessed
-    if project_id in projects:
-        projects[project_id]['last_accessed'] = datetime.now().isoformat()
-        ProjectManager.save_projects(projects)
-    
     return jsonify({'success': True, 'project_id': project_id})
 
 
@@ -216,37 +216,123 @@ def save_session():
 
 @app.route('/api/sessions/<project_id>', methods=['GET'])
 def get_sessions(project_id):
-    """Get all sessions for a project"""
-    sessions = []
+    """Get a page of session summaries for a project, newest first"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, 200))
+    cursor = request.args.get('cursor')
+    
+    try:
+        sessions, next_cursor = storage.list_session_summaries(project_id, limit, cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    for session_file in SESSIONS_DIR.glob(f"{project_id}_*.json"):
-        with open(session_file, 'r') as f:
-            sessions.append(json.load(f))
+    return jsonify({'sessions': sessions, 'next_cursor': next_cursor})
+
+
+@app.route('/api/sessions/<project_id>/<session_id>', methods=['GET'])
+def get_session(project_id, session_id):
+    """Get a single session including its full message history"""
+    session_record = storage.get_session(project_id, session_id)
     
-    sessions.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+    if session_record is None:
+        return jsonify({'error': 'Session not found'}), 404
     
-    return jsonify({'sessions': sessions})
+    return jsonify(session_record)
+
+
+def query_options(data, flask_session):
+    """Build SDK options for a query request; returns (options, project_id)
+    
+    Raises ValueError for a permission mode or model the client may not use.
+    """
+    permission_mode = data.get('permission_mode', 'default')
+    if permission_mode not in ALLOWED_PERMISSION_MODES:
+        raise ValueError(f"Invalid permission_mode: {permission_mode!r}")
+    model = data.get('model')
+    if model is not None and (not isinstance(model, str) or not MODEL_NAME.match(model)
+                              or (ALLOWED_MODELS and model not in ALLOWED_MODELS)):
+        raise ValueError(f"Invalid model: {model!r}")
+    
+    project_id = data.get('project_id') or flask_session.get('current_project_id')
+    
+    project = storage.get_project(project_id) if project_id else None
+    if project is None:
+        project = flask_session.get('temp_projects', {}).get(project_id)
+    
+    options = ClaudeCodeOptions(
+        cwd=project['path'] if project else os.getcwd(),
+        permission_mode=permission_mode,
+        model=model
+    )
+    return options, project_id
+
+
+def queue_full_response(error):
+    """429 with Retry-After when the query scheduler is saturated"""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def query_response(result, project_id):
+    """JSON body for a completed (non-streamed) query"""
+    return {
+        'response': result['response'],
+        'tool_uses': result['tool_uses'],
+        'cost': result['result'].get('total_cost_usd'),
+        'project_id': project_id,
+        'timestamp': datetime.now().isoformat()
+    }
 
 
 @app.route('/api/claude/query', methods=['POST'])
-async def claude_query():
-    """Proxy Claude queries through the backend"""
+def claude_query():
+    """Proxy Claude queries through the backend
+    
+    Returns a single JSON response by default. With 'Accept: text/event-stream'
+    (or ?stream=1) the run is relayed as Server-Sent Events: 'text' and
+    'tool_use' as they arrive, then 'result' (cost/duration) and 'done'.
+    """
     data = request.json
     prompt = data.get('prompt')
-    project_id = session.get('current_project_id')
     
     if not prompt:
         return jsonify({'error': 'No prompt provided'}), 400
     
-    # Here you would integrate with claude-code-sdk
-    # For now, return a mock response
-    response = {
-        'response': f"Mock response to: {prompt}",
-        'project_id': project_id,
-        'timestamp': datetime.now().isoformat()
-    }
+    try:
+        options, project_id = query_options(data, session)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        streamer.scheduler.check_admission()
+    except QueueFullError as e:
+        return queue_full_response(e)
     
-    return jsonify(response)
+    if wants_event_stream(request.args.get('stream'), request.headers.get('Accept')):
+        return Response(
+            streamer.stream(prompt, options, project_id),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                # Stop nginx from buffering the stream
+                'X-Accel-Buffering': 'no'
+            }
+        )
+    
+    try:
+        result = streamer.run(prompt, options, project_id)
+    except QueueFullError as e:
+        return queue_full_response(e)
+    
+    return jsonify(query_response(result, project_id))
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Query scheduler metrics: running/queued runs and queue wait times"""
+    return jsonify({'scheduler': streamer.scheduler.stats()})
 
 
 @app.route('/api/health', methods=['GET'])
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the backend.
+
+    uvicorn asgi:app --host 127.0.0.1 --port 5001
+
+POST /api/claude/query runs natively on the server's event loop, so hundreds
+of concurrent SDK streams share one loop instead of each pinning a worker.
+Every other /api/* route is the Flask view served through asgiref's WSGI
+adapter, so projects and sessions behave exactly as in the WSGI deployment.
+"""
+
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, CORS_ORIGINS, query_options, query_response, streamer
+from claude_stream import QueueFullError, wants_event_stream
+
+
+flask_asgi = WsgiToAsgi(flask_app)
+
+
+def _headers(scope) -> dict:
+    return {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+
+
+def load_flask_session(headers: dict) -> dict:
+    """Decode the Flask session cookie so native routes see the same session"""
+    cookie_name = flask_app.config.get('SESSION_COOKIE_NAME', 'session')
+    cookies = SimpleCookie(headers.get('cookie', ''))
+    if cookie_name not in cookies:
+        return {}
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        return serializer.loads(
+            cookies[cookie_name].value,
+            max_age=int(flask_app.permanent_session_lifetime.total_seconds())
+        )
+    except Exception:
+        return {}
+
+
+def cors_headers(headers: dict) -> list:
+    """Mirror flask_cors for the natively served route"""
+    origin = headers.get('origin')
+    if origin not in CORS_ORIGINS:
+        return []
+    return [
+        (b'access-control-allow-origin', origin.encode()),
+        (b'access-control-allow-credentials', b'true'),
+        (b'vary', b'Origin'),
+    ]
+
+
+async def read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionResetError()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_json(send, status: int, payload: dict, extra_headers: list):
+    body = json.dumps(payload).encode()
+    if status == 429:
+        extra_headers = extra_headers + [(b'retry-after', str(payload['retry_after']).encode())]
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())] + extra_headers,
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def stream_param(scope):
+    """First ?stream= value, as Flask's request.args.get('stream') sees it"""
+    values = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True).get('stream')
+    return values[0] if values else None
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def run_until_disconnect(receive, awaitable):
+    """Await awaitable, cancelling it if the client disconnects first
+
+    Raises ConnectionResetError on disconnect, so an abandoned request does
+    not keep its SDK run going.
+    """
+    task = asyncio.ensure_future(awaitable)
+    disconnect_task = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await asyncio.wait({task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # A disconnect cancels the SDK run; a finished run stops the watcher
+        for t in (task, disconnect_task):
+            t.cancel()
+        await asyncio.gather(task, disconnect_task, return_exceptions=True)
+    if not task.done() or task.cancelled():
+        raise ConnectionResetError()
+    return task.result()
+
+
+async def claude_query(scope, receive, send):
+    """Native version of app.claude_query"""
+    headers = _headers(scope)
+    extra_headers = cors_headers(headers)
+
+    try:
+        data = json.loads(await read_body(receive) or b'null')
+    except ConnectionResetError:
+        return
+    except ValueError:
+        await send_json(send, 400, {'error': 'Invalid JSON body'}, extra_headers)
+        return
+    if not isinstance(data, dict):
+        await send_json(send, 415, {'error': 'Expected a JSON object'}, extra_headers)
+        return
+
+    prompt = data.get('prompt')
+    if not prompt:
+        await send_json(send, 400, {'error': 'No prompt provided'}, extra_headers)
+        return
+
+    try:
+        options, project_id = query_options(data, load_flask_session(headers))
+    except ValueError as e:
+        await send_json(send, 400, {'error': str(e)}, extra_headers)
+        return
+
+    try:
+        streamer.scheduler.check_admission()
+    except QueueFullError as e:
+        await send_json(send, 429, {'error': str(e), 'retry_after': e.retry_after}, extra_headers)
+        return
+
+    if not wants_event_stream(stream_param(scope), headers.get('accept')):
+        try:
+            result = await run_until_disconnect(receive, streamer.collect(prompt, options, project_id))
+        except ConnectionResetError:
+            return
+        except QueueFullError as e:
+            await send_json(send, 429, {'error': str(e), 'retry_after': e.retry_after}, extra_headers)
+            return
+        await send_json(send, 200, query_response(result, project_id), extra_headers)
+        return
+
+    async def relay():
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ] + extra_headers,
+        })
+        async for frame in streamer.astream(prompt, options, project_id):
+            # send() waits while the client is behind; give up on stalled clients
+            await asyncio.wait_for(
+                send({'type': 'http.response.body', 'body': frame.encode(), 'more_body': True}),
+                streamer.client_timeout
+            )
+        await send({'type': 'http.response.body', 'body': b''})
+
+    try:
+        await run_until_disconnect(receive, relay())
+    except (ConnectionResetError, asyncio.TimeoutError):
+        pass  # client went away or stalled
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    if scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/api/claude/query':
+        await claude_query(scope, receive, send)
+        return
+
+    await flask_asgi(scope, receive, send)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Relay claude_code_sdk.query runs to HTTP clients as Server-Sent Events.
+
+All SDK runs share one asyncio event loop on a background thread, so a
+request thread only drains a small bounded queue of ready-made SSE frames.
+When that queue is full the producer stops reading from the SDK (which in
+turn stops reading from the CLI subprocess) until the client catches up; a
+client that stays stalled for longer than client_timeout is dropped and its
+run cancelled.
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from claude_code_sdk import (
+    query, ClaudeCodeOptions, AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+)
+
+if os.environ.get('CLAUDE_SDK_STUB'):
+    # Canned responses for load tests (see loadtest.py)
+    from sdk_stub import query
+
+from query_scheduler import QueryScheduler, QueueFullError, get_scheduler
+
+
+_DONE = object()
+
+
+def wants_event_stream(stream: Optional[str], accept: Optional[str]) -> bool:
+    """True if the client asked for Server-Sent Events
+
+    Either ?stream=1 (or true), or text/event-stream as the Accept header's
+    preferred type (highest q, earliest on ties). Shared by the Flask and
+    ASGI entry points so both choose the same response.
+    """
+    if stream is not None and stream.lower() in ('1', 'true'):
+        return True
+    best, best_q = None, 0.0
+    for item in (accept or '').split(','):
+        mime, *params = [part.strip() for part in item.split(';')]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if mime and q > best_q:
+            best, best_q = mime.lower(), q
+    return best == 'text/event-stream'
+
+
+def format_sse(event: str, data: Dict) -> str:
+    """Encode one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def message_events(message) -> Iterator[tuple]:
+    """Translate an SDK message into (event, data) pairs"""
+    if isinstance(message, AssistantMessage):
+        for block in message.content:
+            if isinstance(block, TextBlock):
+                yield 'text', {'text': block.text}
+            elif isinstance(block, ToolUseBlock):
+                yield 'tool_use', {'id': block.id, 'name': block.name, 'input': block.input}
+    elif isinstance(message, ResultMessage):
+        yield 'result', {
+            'session_id': message.session_id,
+            'total_cost_usd': message.total_cost_usd,
+            'duration_ms': message.duration_ms,
+            'num_turns': message.num_turns,
+            'is_error': message.is_error
+        }
+
+
+class ClientTooSlow(Exception):
+    """The client did not drain its queue within client_timeout"""
+
+
+class ClaudeStreamer:
+    """Runs SDK queries on a shared background loop and streams their events"""
+
+    def __init__(self, queue_size: int = 64, client_timeout: float = 30.0, heartbeat: float = 15.0,
+                 scheduler: Optional[QueryScheduler] = None):
+        self.scheduler = scheduler or get_scheduler()
+        self.queue_size = queue_size
+        self.client_timeout = client_timeout
+        self.heartbeat = heartbeat
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The shared event loop, started on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='claude-stream-loop', daemon=True).start()
+            return self._loop
+
+    async def _put(self, frames: queue.Queue, frame):
+        """Enqueue a frame, waiting (without blocking the loop) while the client is behind"""
+        deadline = time.monotonic() + self.client_timeout
+        delay = 0.005
+        while True:
+            try:
+                frames.put_nowait(frame)
+                return
+            except queue.Full:
+                if time.monotonic() > deadline:
+                    raise ClientTooSlow()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.25)
+
+    def _scheduled(self, prompt: str, options: ClaudeCodeOptions, project: Optional[str]):
+        return self.scheduler.query(prompt, options, project=project or 'default', query_fn=query)
+
+    async def _produce(self, prompt: str, options: ClaudeCodeOptions, project: Optional[str], frames: queue.Queue,
+                       finished: threading.Event):
+        try:
+            async for message in self._scheduled(prompt, options, project):
+                for event, data in message_events(message):
+                    await self._put(frames, format_sse(event, data))
+            await self._put(frames, format_sse('done', {}))
+        except ClientTooSlow:
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            try:
+                await self._put(frames, format_sse('error', {'error': str(e)}))
+            except ClientTooSlow:
+                return
+        finally:
+            # finished always gets through; _DONE only wakes a consumer blocked on
+            # an empty queue, so it is not needed when the queue is full
+            finished.set()
+            try:
+                frames.put_nowait(_DONE)
+            except queue.Full:
+                pass
+
+    async def collect(self, prompt: str, options: ClaudeCodeOptions, project: Optional[str] = None) -> Dict:
+        """Run a query on the current loop and aggregate its events"""
+        text_parts = []
+        tool_uses = []
+        result = {}
+        async for message in self._scheduled(prompt, options, project):
+            for event, data in message_events(message):
+                if event == 'text':
+                    text_parts.append(data['text'])
+                elif event == 'tool_use':
+                    tool_uses.append(data)
+                elif event == 'result':
+                    result = data
+        return {'response': ''.join(text_parts), 'tool_uses': tool_uses, 'result': result}
+
+    async def astream(self, prompt: str, options: ClaudeCodeOptions, project: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield SSE frames for one query on the caller's event loop (ASGI)
+
+        Backpressure comes from the server awaiting each send, so no queue is
+        needed here.
+        """
+        yield ': connected\n\n'
+        try:
+            async for message in self._scheduled(prompt, options, project):
+                for event, data in message_events(message):
+                    yield format_sse(event, data)
+            yield format_sse('done', {})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            yield format_sse('error', {'error': str(e)})
+
+    def run(self, prompt: str, options: ClaudeCodeOptions, project: Optional[str] = None) -> Dict:
+        """Run a query to completion and return the aggregated response"""
+        future = asyncio.run_coroutine_threadsafe(self.collect(prompt, options, project), self.loop)
+        return future.result()
+
+    def stream(self, prompt: str, options: ClaudeCodeOptions, project: Optional[str] = None) -> Iterator[str]:
+        """Yield SSE frames for one query; closing the iterator cancels the run"""
+        frames: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        finished = threading.Event()
+        future = asyncio.run_coroutine_threadsafe(self._produce(prompt, options, project, frames, finished), self.loop)
+        try:
+            # Send something immediately so proxies and browsers open the stream
+            yield ': connected\n\n'
+            while True:
+                # Every frame is queued before finished is set, so once it is set
+                # an empty queue means the stream is over
+                if finished.is_set() and frames.empty():
+                    break
+                try:
+                    frame = frames.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    if future.done():
+                        break
+                    yield ': keepalive\n\n'
+                    continue
+                if frame is _DONE:
+                    break
+                yield frame
+        finally:
+            # Client went away (GeneratorExit) or the run finished
+            future.cancel()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Concurrent-query load test: WSGI (gunicorn) vs ASGI (uvicorn) deployments.
+
+Each server is started with the stubbed SDK (sdk_stub.py), then N streaming
+queries are fired at once. For every mode this reports wall time, time to
+first event (p50/p95) and completed queries per second.
+
+Usage:
+    python loadtest.py --concurrency 100 --turns 5 --delay 0.2
+    python loadtest.py --modes wsgi asgi
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+SERVERS = {
+    # What claude-backend.service ran before streaming support
+    'wsgi': ['gunicorn', '--bind', '127.0.0.1:{port}', '--workers', '2', 'wsgi:app'],
+    'wsgi-gthread': ['gunicorn', '--bind', '127.0.0.1:{port}', '--workers', '2',
+                     '--worker-class', 'gthread', '--threads', '32', 'wsgi:app'],
+    'asgi': ['uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def start_server(mode: str, port: int, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        CLAUDE_SDK_STUB='1',
+        CLAUDE_SDK_STUB_TURNS=str(args.turns),
+        CLAUDE_SDK_STUB_DELAY=str(args.delay),
+        CLAUDE_WEB_DATA_DIR=tempfile.mkdtemp(prefix='claude_web_load_'),
+        # Measure the server, not the query scheduler's cap
+        CLAUDE_MAX_CONCURRENT_QUERIES=str(args.concurrency),
+        CLAUDE_MAX_QUEUE_DEPTH=str(args.concurrency),
+    )
+    command = [part.format(port=port) for part in SERVERS[mode]]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+async def streaming_query(port: int, prompt: str, timeout: float) -> dict:
+    """Send one SSE query and time the first event and completion"""
+    body = json.dumps({'prompt': prompt}).encode()
+    request = (
+        f"POST /api/claude/query?stream=1 HTTP/1.1\r\n"
+        f"Host: 127.0.0.1:{port}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Accept: text/event-stream\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n"
+    ).encode() + body
+
+    started = time.perf_counter()
+    first_event = None
+    received = b''
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+        writer.write(request)
+        await writer.drain()
+        while True:
+            chunk = await asyncio.wait_for(reader.read(65536), timeout)
+            if not chunk:
+                break
+            received += chunk
+            if first_event is None and b'event: text' in received:
+                first_event = time.perf_counter() - started
+        writer.close()
+    except (asyncio.TimeoutError, OSError):
+        pass
+
+    return {
+        'ok': b'event: done' in received,
+        'first_event': first_event,
+        'total': time.perf_counter() - started,
+    }
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def run_load(port: int, args) -> dict:
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        streaming_query(port, f"load test prompt {i}", args.timeout)
+        for i in range(args.concurrency)
+    ])
+    wall = time.perf_counter() - started
+
+    completed = [r for r in results if r['ok']]
+    first_events = [r['first_event'] for r in completed if r['first_event'] is not None]
+    return {
+        'completed': len(completed),
+        'failed': len(results) - len(completed),
+        'wall': wall,
+        'ttfe_p50': percentile(first_events, 50),
+        'ttfe_p95': percentile(first_events, 95),
+        'qps': len(completed) / wall if wall else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare concurrent query capacity of WSGI and ASGI deployments')
+    parser.add_argument('--modes', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--concurrency', type=int, default=50, help='Simultaneous streaming queries')
+    parser.add_argument('--turns', type=int, default=5, help='Stub assistant turns per query')
+    parser.add_argument('--delay', type=float, default=0.2, help='Stub seconds per turn')
+    parser.add_argument('--timeout', type=float, default=120, help='Per-request timeout in seconds')
+    parser.add_argument('--port', type=int, default=5081)
+    args = parser.parse_args()
+
+    run_seconds = args.turns * args.delay
+    print(f"{args.concurrency} concurrent queries, stub run time {run_seconds:.1f}s each\n")
+    print(f"{'mode':<14} {'done':>5} {'fail':>5} {'wall s':>8} {'TTFE p50':>9} {'TTFE p95':>9} {'q/s':>7}")
+
+    for offset, mode in enumerate(args.modes):
+        port = args.port + offset
+        try:
+            process = start_server(mode, port, args)
+        except (OSError, RuntimeError) as e:
+            print(f"{mode:<14} skipped: {e}")
+            continue
+        try:
+            stats = asyncio.run(run_load(port, args))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+        print(f"{mode:<14} {stats['completed']:>5} {stats['failed']:>5} {stats['wall']:>8.2f} "
+              f"{stats['ttfe_p50']:>9.3f} {stats['ttfe_p95']:>9.3f} {stats['qps']:>7.1f}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of the JSON project/session tree into SQLite.
+
+Usage:
+    python migrate_to_sqlite.py [--data-dir ~/.claude_web] [--db path/to/claude_web.db]
+
+Afterwards start the backend with CLAUDE_WEB_STORAGE=sqlite.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# storage needs json_store.py from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from storage import SQLiteStorage
+
+
+def main():
+    default_data_dir = Path(os.environ.get('CLAUDE_WEB_DATA_DIR', Path.home() / '.claude_web'))
+
+    parser = argparse.ArgumentParser(description='Import projects.json and session files into SQLite')
+    parser.add_argument('--data-dir', type=Path, default=default_data_dir, help='JSON data directory to import')
+    parser.add_argument('--db', type=Path, help='Target database (default: <data-dir>/claude_web.db)')
+    args = parser.parse_args()
+
+    data_dir = args.data_dir.expanduser()
+    db_path = args.db or data_dir / 'claude_web.db'
+
+    storage = SQLiteStorage(db_path)
+    counts = storage.import_json_tree(data_dir)
+
+    print(f"Imported {counts['projects']} projects, {counts['sessions']} sessions "
+          f"and {counts['messages']} messages into {db_path}")
+
+
+if __name__ == '__main__':
+    main()
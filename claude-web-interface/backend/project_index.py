@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Process-resident project index for the Flask backend.
+
+projects.json is loaded once per process and served from memory. The file is
+re-read only when its inode/mtime/size signature changes, and mutations are
+written back by a background flusher that coalesces bursts of updates into a
+single write.
+
+Several gunicorn workers share the file, so every flush is a locked
+read-modify-write: the pending operations of this process are replayed on top
+of whatever is on disk, then the result is written to a temp file, fsynced and
+renamed into place. Each project carries a version counter that is bumped on
+every change. Whole-record writes remember the version they were based on;
+if another worker has changed the project since, only the fields this
+process actually changed are replayed onto the newer record.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from json_store import atomic_write_json, locked_file
+
+
+def _put(projects: Dict[str, Dict], project: Dict, base: Optional[Dict]):
+    """Write a whole project record that was edited from base
+
+    If the stored record is no longer at base's version, another writer got
+    there first: keep its record and apply only the fields changed from base.
+    """
+    current = projects.get(project['id'])
+    if current is not None and base is not None and current.get('version', 0) != base.get('version', 0):
+        merged = dict(current)
+        merged.update({k: v for k, v in project.items() if k != 'version' and base.get(k) != v})
+        project = merged
+    else:
+        project = dict(project)
+    project['version'] = (current or {}).get('version', 0) + 1
+    projects[project['id']] = project
+
+
+def _apply(projects: Dict[str, Dict], op: tuple):
+    """Apply one pending operation to a projects mapping"""
+    kind = op[0]
+    if kind == 'put':
+        _, project, base = op
+        _put(projects, project, base)
+    elif kind == 'update':
+        _, project_id, changes, increments = op
+        project = projects.get(project_id)
+        if project is None:
+            return
+        project.update(changes)
+        for field, delta in increments.items():
+            project[field] = project.get(field, 0) + delta
+        project['version'] = project.get('version', 0) + 1
+    elif kind == 'replace':
+        _, replacement, base = op
+        for project_id, project in replacement.items():
+            previous = base.get(project_id)
+            if previous is not None and projects.get(project_id, {}).get('version') == previous.get('version') \
+                    and {k: v for k, v in project.items() if k != 'version'} == \
+                    {k: v for k, v in previous.items() if k != 'version'}:
+                continue  # unchanged by us; leave other writers' record alone
+            _put(projects, project, previous)
+        for project_id, previous in base.items():
+            # Removed by us, unless another writer changed it meanwhile
+            if project_id not in replacement and \
+                    projects.get(project_id, {}).get('version') == previous.get('version'):
+                projects.pop(project_id, None)
+
+
+class ProjectIndex:
+    """In-memory view of projects.json with write-behind persistence"""
+
+    def __init__(self, path: Path, flush_delay: float = 0.5, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.flush_delay = flush_delay
+        self.check_interval = check_interval
+
+        self._lock = threading.RLock()
+        self._projects: Dict[str, Dict] = {}
+        self._pending: List[tuple] = []
+        self._signature = None
+        self._checked_at = 0.0
+        self._loaded = False
+
+        self._wakeup = threading.Event()
+        self._flusher = None
+        atexit.register(self.flush)
+
+    # Disk state
+
+    def _stat_signature(self):
+        """Cheap change detector for the backing file"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_file(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _refresh(self, force: bool = False):
+        """Reload from disk if another process replaced the file"""
+        now = time.monotonic()
+        if self._loaded and not force and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        signature = self._stat_signature()
+        if self._loaded and signature == self._signature:
+            return
+
+        # Rebase local changes that have not been flushed yet onto the new file
+        projects = self._read_file()
+        for op in self._pending:
+            _apply(projects, op)
+        self._projects = projects
+        self._signature = signature
+        self._loaded = True
+
+    # Reads
+
+    def all(self) -> List[Dict]:
+        """Return copies of all persisted projects"""
+        with self._lock:
+            self._refresh()
+            return [dict(p) for p in self._projects.values()]
+
+    def get(self, project_id: str) -> Optional[Dict]:
+        """Return a copy of a single project, or None"""
+        with self._lock:
+            self._refresh()
+            project = self._projects.get(project_id)
+            return dict(project) if project is not None else None
+
+    def __contains__(self, project_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return project_id in self._projects
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Return a detached copy of the whole index keyed by project id"""
+        with self._lock:
+            self._refresh()
+            return {pid: dict(p) for pid, p in self._projects.items()}
+
+    # Writes
+
+    def _record(self, op: tuple):
+        _apply(self._projects, op)
+        self._pending.append(op)
+        self._mark_dirty()
+
+    def put(self, project: Dict):
+        """Insert or replace a project"""
+        with self._lock:
+            self._refresh()
+            base = self._projects.get(project['id'])
+            self._record(('put', dict(project), dict(base) if base is not None else None))
+
+    def update(self, project_id: str, increments: Optional[Dict[str, int]] = None, **changes) -> Optional[Dict]:
+        """Apply field changes and counter increments to a project"""
+        with self._lock:
+            self._refresh()
+            if project_id not in self._projects:
+                return None
+            self._record(('update', project_id, changes, dict(increments or {})))
+            return dict(self._projects[project_id])
+
+    def replace(self, projects: Dict[str, Dict]):
+        """Replace the whole index (used by the legacy save_projects API)"""
+        with self._lock:
+            self._refresh()
+            base = {pid: dict(p) for pid, p in self._projects.items()}
+            self._record(('replace', {pid: dict(p) for pid, p in projects.items()}, base))
+
+    # Write-behind
+
+    def _mark_dirty(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name='project-index-flusher', daemon=True)
+            self._flusher.start()
+        self._wakeup.set()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait()
+            # Let a burst of updates accumulate before writing
+            time.sleep(self.flush_delay)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing project index: {e}")
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self._lock:
+            if not self._pending:
+                return
+            with locked_file(self.path):
+                signature = self._stat_signature()
+                if signature == self._signature:
+                    # Nobody else wrote since our last read: memory is current
+                    projects = self._projects
+                else:
+                    # Optimistic check failed: replay our operations on the newer file
+                    projects = self._read_file()
+                    for op in self._pending:
+                        _apply(projects, op)
+
+                atomic_write_json(self.path, projects, separators=(',', ':'))
+                self._projects = projects
+                self._signature = self._stat_signature()
+                self._pending = []
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Stand-in for claude_code_sdk.query used by load tests.
+
+Enabled with CLAUDE_SDK_STUB=1. Each run emits CLAUDE_SDK_STUB_TURNS assistant
+messages spaced CLAUDE_SDK_STUB_DELAY seconds apart, then a ResultMessage, so
+it behaves like a slow multi-turn run without spawning the CLI.
+"""
+
+import asyncio
+import os
+
+from claude_code_sdk import AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+
+
+async def query(prompt, options=None):
+    turns = int(os.environ.get('CLAUDE_SDK_STUB_TURNS', 5))
+    delay = float(os.environ.get('CLAUDE_SDK_STUB_DELAY', 0.2))
+
+    for turn in range(turns):
+        await asyncio.sleep(delay)
+        yield AssistantMessage(
+            content=[
+                TextBlock(text=f"Turn {turn + 1} for: {prompt[:40]}\n"),
+                ToolUseBlock(id=f"tool-{turn}", name='Read', input={'file_path': 'README.md'})
+            ],
+            model='stub'
+        )
+
+    yield ResultMessage(
+        subtype='success',
+        duration_ms=int(turns * delay * 1000),
+        duration_api_ms=int(turns * delay * 1000),
+        is_error=False,
+        num_turns=turns,
+        session_id='stub-session',
+        total_cost_usd=0.0
+    )
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Pluggable storage backends for projects and sessions.
+
+JSONStorage keeps the original layout (projects.json plus one file per
+session). SQLiteStorage keeps everything in a single WAL-mode database with
+indexed tables for projects, sessions and messages.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from project_index import ProjectIndex, atomic_write_json, locked_file
+
+
+PROJECT_FIELDS = ('id', 'name', 'path', 'is_temp', 'created_at', 'last_accessed', 'session_count')
+SNIPPET_LENGTH = 120
+DEFAULT_PAGE_SIZE = 50
+
+
+def summarize_session(session_record: Dict) -> Dict:
+    """Metadata-only projection of a session used for listings"""
+    messages = session_record.get('messages', [])
+    first_prompt = ''
+    for message in messages:
+        if isinstance(message, dict) and message.get('role') == 'user':
+            first_prompt = str(message.get('content', ''))[:SNIPPET_LENGTH]
+            break
+    metadata = session_record.get('metadata') or {}
+    return {
+        'id': session_record['id'],
+        'project_id': session_record['project_id'],
+        'created_at': session_record.get('created_at', ''),
+        'message_count': len(messages),
+        'cost': metadata.get('cost', 0) or 0,
+        'first_prompt': first_prompt
+    }
+
+
+def encode_cursor(summary: Dict) -> str:
+    """Opaque pagination cursor for the last item of a page"""
+    raw = f"{summary['created_at']}|{summary['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return (created_at, id) from a cursor produced by encode_cursor"""
+    try:
+        created_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, session_id
+
+
+def paginate_summaries(summaries: List[Dict], limit: int, cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+    """Newest-first page of summaries strictly after the cursor"""
+    summaries = sorted(summaries, key=lambda x: (x['created_at'], x['id']), reverse=True)
+    if cursor:
+        position = decode_cursor(cursor)
+        summaries = [s for s in summaries if (s['created_at'], s['id']) < position]
+    page = summaries[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(summaries) > limit else None
+    return page, next_cursor
+
+
+class Storage(ABC):
+    """Interface shared by all storage backends"""
+
+    @abstractmethod
+    def list_projects(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def get_project(self, project_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def put_project(self, project: Dict):
+        ...
+
+    @abstractmethod
+    def update_project(self, project_id: str, increments: Optional[Dict[str, int]] = None, **changes) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def replace_projects(self, projects: Dict[str, Dict]):
+        ...
+
+    @abstractmethod
+    def save_session(self, session_record: Dict):
+        ...
+
+    @abstractmethod
+    def list_sessions(self, project_id: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def list_session_summaries(self, project_id: str, limit: int = DEFAULT_PAGE_SIZE,
+                               cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Return one newest-first page of session summaries and the next cursor"""
+        ...
+
+    @abstractmethod
+    def get_session(self, project_id: str, session_id: str) -> Optional[Dict]:
+        ...
+
+
+class JSONStorage(Storage):
+    """projects.json plus SESSIONS_DIR/{project_id}_{session_id}.json
+
+    Each project also has a sidecar SESSIONS_DIR/{project_id}.index.jsonl with
+    one summary line per session, so listings never parse message bodies.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.projects_file = self.data_dir / 'projects.json'
+        self.sessions_dir = self.data_dir / 'sessions'
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+        self.index = ProjectIndex(self.projects_file)
+
+    def session_file(self, project_id: str, session_id: str) -> Path:
+        """Get path to session file"""
+        return self.sessions_dir / f"{project_id}_{session_id}.json"
+
+    def summary_index_file(self, project_id: str) -> Path:
+        """Get path to the per-project session summary index"""
+        return self.sessions_dir / f"{project_id}.index.jsonl"
+
+    def list_projects(self) -> List[Dict]:
+        return self.index.all()
+
+    def get_project(self, project_id: str) -> Optional[Dict]:
+        return self.index.get(project_id)
+
+    def put_project(self, project: Dict):
+        self.index.put(project)
+
+    def update_project(self, project_id: str, increments: Optional[Dict[str, int]] = None, **changes) -> Optional[Dict]:
+        return self.index.update(project_id, increments=increments, **changes)
+
+    def replace_projects(self, projects: Dict[str, Dict]):
+        self.index.replace(projects)
+
+    def save_session(self, session_record: Dict):
+        session_file = self.session_file(session_record['project_id'], session_record['id'])
+        atomic_write_json(session_file, session_record, indent=2)
+
+        index_file = self.summary_index_file(session_record['project_id'])
+        with locked_file(index_file):
+            if not index_file.exists():
+                # Build the index from existing session files before appending
+                self._rebuild_summary_index(session_record['project_id'])
+            else:
+                with open(index_file, 'a') as f:
+                    f.write(json.dumps(summarize_session(session_record)) + '\n')
+
+    def _rebuild_summary_index(self, project_id: str) -> List[Dict]:
+        """Recreate the sidecar index from session files (legacy data)
+
+        Callers hold locked_file(index file), the lock appenders take, so no
+        summary appended meanwhile is lost when the rebuilt file replaces it.
+        """
+        summaries = [summarize_session(s) for s in self.list_sessions(project_id)]
+        index_file = self.summary_index_file(project_id)
+        tmp_file = index_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'w') as f:
+            for summary in summaries:
+                f.write(json.dumps(summary) + '\n')
+        tmp_file.replace(index_file)
+        return summaries
+
+    def _read_summary_index(self, project_id: str) -> List[Dict]:
+        index_file = self.summary_index_file(project_id)
+        if not index_file.exists():
+            with locked_file(index_file):
+                if not index_file.exists():
+                    return self._rebuild_summary_index(project_id)
+
+        summaries = {}
+        with open(index_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    summary = json.loads(line)
+                    summaries[summary['id']] = summary
+        return list(summaries.values())
+
+    def list_session_summaries(self, project_id: str, limit: int = DEFAULT_PAGE_SIZE,
+                               cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        return paginate_summaries(self._read_summary_index(project_id), limit, cursor)
+
+    def list_sessions(self, project_id: str) -> List[Dict]:
+        sessions = []
+        for session_file in self.sessions_dir.glob(f"{project_id}_*.json"):
+            with open(session_file, 'r') as f:
+                sessions.append(json.load(f))
+        sessions.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        return sessions
+
+    def get_session(self, project_id: str, session_id: str) -> Optional[Dict]:
+        session_file = self.session_file(project_id, session_id)
+        if not session_file.exists():
+            return None
+        with open(session_file, 'r') as f:
+            return json.load(f)
+
+
+class SQLiteStorage(Storage):
+    """Single-file SQLite database in WAL mode"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS projects (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        path TEXT,
+        is_temp INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT,
+        last_accessed TEXT,
+        session_count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_projects_last_accessed ON projects (last_accessed);
+
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        project_id TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        metadata TEXT NOT NULL DEFAULT '{}',
+        message_count INTEGER NOT NULL DEFAULT 0,
+        cost REAL NOT NULL DEFAULT 0,
+        first_prompt TEXT NOT NULL DEFAULT ''
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_project_created ON sessions (project_id, created_at);
+
+    CREATE TABLE IF NOT EXISTS messages (
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        role TEXT,
+        data TEXT NOT NULL,
+        PRIMARY KEY (session_id, seq)
+    );
+    """
+
+    # Summary columns added after the first schema version
+    SUMMARY_COLUMNS = {
+        'message_count': "INTEGER NOT NULL DEFAULT 0",
+        'cost': "REAL NOT NULL DEFAULT 0",
+        'first_prompt': "TEXT NOT NULL DEFAULT ''",
+    }
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        self._upgrade_schema(conn)
+        conn.commit()
+
+    def _upgrade_schema(self, conn: sqlite3.Connection):
+        """Add summary columns to databases created before they existed"""
+        existing = {row['name'] for row in conn.execute('PRAGMA table_info(sessions)')}
+        missing = [name for name in self.SUMMARY_COLUMNS if name not in existing]
+        for name in missing:
+            conn.execute(f"ALTER TABLE sessions ADD COLUMN {name} {self.SUMMARY_COLUMNS[name]}")
+        if missing:
+            rows = conn.execute('SELECT id, project_id, created_at, metadata FROM sessions').fetchall()
+            for row in rows:
+                messages = [
+                    json.loads(m['data']) for m in conn.execute(
+                        'SELECT data FROM messages WHERE session_id = ? ORDER BY seq', (row['id'],)
+                    )
+                ]
+                summary = summarize_session({**dict(row), 'messages': messages, 'metadata': json.loads(row['metadata'])})
+                conn.execute(
+                    'UPDATE sessions SET message_count = ?, cost = ?, first_prompt = ? WHERE id = ?',
+                    (summary['message_count'], summary['cost'], summary['first_prompt'], row['id'])
+                )
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections are not thread-safe"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _project_from_row(row: sqlite3.Row) -> Dict:
+        project = dict(row)
+        project['is_temp'] = bool(project['is_temp'])
+        return project
+
+    @staticmethod
+    def _project_params(project: Dict) -> tuple:
+        return (
+            project['id'],
+            project['name'],
+            project.get('path'),
+            int(bool(project.get('is_temp', False))),
+            project.get('created_at'),
+            project.get('last_accessed'),
+            project.get('session_count', 0),
+        )
+
+    def list_projects(self) -> List[Dict]:
+        rows = self._conn().execute('SELECT * FROM projects').fetchall()
+        return [self._project_from_row(row) for row in rows]
+
+    def get_project(self, project_id: str) -> Optional[Dict]:
+        row = self._conn().execute('SELECT * FROM projects WHERE id = ?', (project_id,)).fetchone()
+        return self._project_from_row(row) if row else None
+
+    def put_project(self, project: Dict):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO projects ({', '.join(PROJECT_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._project_params(project)
+            )
+
+    def update_project(self, project_id: str, increments: Optional[Dict[str, int]] = None, **changes) -> Optional[Dict]:
+        assignments = []
+        params = []
+        for field, value in changes.items():
+            if field not in PROJECT_FIELDS or field == 'id':
+                raise ValueError(f"Unknown project field: {field}")
+            assignments.append(f"{field} = ?")
+            params.append(int(value) if field == 'is_temp' else value)
+        for field, delta in (increments or {}).items():
+            if field != 'session_count':
+                raise ValueError(f"Field cannot be incremented: {field}")
+            assignments.append(f"{field} = {field} + ?")
+            params.append(delta)
+
+        conn = self._conn()
+        with conn:
+            if assignments:
+                conn.execute(f"UPDATE projects SET {', '.join(assignments)} WHERE id = ?", (*params, project_id))
+            row = conn.execute('SELECT * FROM projects WHERE id = ?', (project_id,)).fetchone()
+        return self._project_from_row(row) if row else None
+
+    def replace_projects(self, projects: Dict[str, Dict]):
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM projects')
+            conn.executemany(
+                f"INSERT INTO projects ({', '.join(PROJECT_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._project_params(p) for p in projects.values()]
+            )
+
+    def save_session(self, session_record: Dict):
+        conn = self._conn()
+        with conn:
+            self._insert_session(conn, session_record)
+
+    @staticmethod
+    def _insert_session(conn: sqlite3.Connection, session_record: Dict):
+        summary = summarize_session(session_record)
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO sessions
+                (id, project_id, created_at, metadata, message_count, cost, first_prompt)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                session_record['id'],
+                session_record['project_id'],
+                summary['created_at'],
+                json.dumps(session_record.get('metadata', {})),
+                summary['message_count'],
+                summary['cost'],
+                summary['first_prompt']
+            )
+        )
+        conn.execute('DELETE FROM messages WHERE session_id = ?', (session_record['id'],))
+        conn.executemany(
+            'INSERT INTO messages (session_id, seq, role, data) VALUES (?, ?, ?, ?)',
+            [
+                (session_record['id'], seq, message.get('role') if isinstance(message, dict) else None, json.dumps(message))
+                for seq, message in enumerate(session_record.get('messages', []))
+            ]
+        )
+
+    def list_sessions(self, project_id: str) -> List[Dict]:
+        rows = self._conn().execute(
+            """
+            SELECT s.id, s.project_id, s.created_at, s.metadata, m.data AS message
+            FROM sessions s
+            LEFT JOIN messages m ON m.session_id = s.id
+            WHERE s.project_id = ?
+            ORDER BY s.created_at DESC, s.id, m.seq
+            """,
+            (project_id,)
+        ).fetchall()
+
+        sessions: List[Dict] = []
+        for row in rows:
+            if not sessions or sessions[-1]['id'] != row['id']:
+                sessions.append({
+                    'id': row['id'],
+                    'project_id': row['project_id'],
+                    'created_at': row['created_at'],
+                    'messages': [],
+                    'metadata': json.loads(row['metadata'])
+                })
+            if row['message'] is not None:
+                sessions[-1]['messages'].append(json.loads(row['message']))
+        return sessions
+
+    def list_session_summaries(self, project_id: str, limit: int = DEFAULT_PAGE_SIZE,
+                               cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        sql = """
+            SELECT id, project_id, created_at, message_count, cost, first_prompt
+            FROM sessions
+            WHERE project_id = ?
+        """
+        params: list = [project_id]
+        if cursor:
+            created_at, session_id = decode_cursor(cursor)
+            sql += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+            params += [created_at, created_at, session_id]
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._conn().execute(sql, params).fetchall()
+        page = [dict(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+        return page, next_cursor
+
+    def get_session(self, project_id: str, session_id: str) -> Optional[Dict]:
+        conn = self._conn()
+        row = conn.execute(
+            'SELECT * FROM sessions WHERE id = ? AND project_id = ?', (session_id, project_id)
+        ).fetchone()
+        if row is None:
+            return None
+        messages = conn.execute(
+            'SELECT data FROM messages WHERE session_id = ? ORDER BY seq', (session_id,)
+        ).fetchall()
+        return {
+            'id': row['id'],
+            'project_id': row['project_id'],
+            'created_at': row['created_at'],
+            'messages': [json.loads(m['data']) for m in messages],
+            'metadata': json.loads(row['metadata'])
+        }
+
+    def import_json_tree(self, data_dir: Path) -> Dict[str, int]:
+        """Import an existing JSONStorage directory in a single transaction"""
+        data_dir = Path(data_dir)
+        projects_file = data_dir / 'projects.json'
+        projects = {}
+        if projects_file.exists():
+            with open(projects_file, 'r') as f:
+                projects = json.load(f)
+
+        counts = {'projects': 0, 'sessions': 0, 'messages': 0}
+        conn = self._conn()
+        with conn:
+            for project in projects.values():
+                conn.execute(
+                    f"INSERT OR REPLACE INTO projects ({', '.join(PROJECT_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    self._project_params(project)
+                )
+                counts['projects'] += 1
+
+            for session_file in sorted((data_dir / 'sessions').glob('*.json')):
+                with open(session_file, 'r') as f:
+                    session_record = json.load(f)
+                if 'id' not in session_record or 'project_id' not in session_record:
+                    continue
+                self._insert_session(conn, session_record)
+                counts['sessions'] += 1
+                counts['messages'] += len(session_record.get('messages', []))
+        return counts
+
+
+def create_storage(backend: str, data_dir: Path) -> Storage:
+    """Create the storage backend selected by CLAUDE_WEB_STORAGE"""
+    if backend == 'json':
+        return JSONStorage(data_dir)
+    if backend == 'sqlite':
+        return SQLiteStorage(Path(data_dir) / 'claude_web.db')
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test the SSE relay: the stream ends promptly for a slow client whose queue
+was full when the run finished, and both entry points pick SSE alike.
+"""
+
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [BACKEND_DIR, os.path.dirname(os.path.dirname(BACKEND_DIR))]
+
+from claude_stream import AssistantMessage, ClaudeStreamer, TextBlock, wants_event_stream
+
+
+class FakeScheduler:
+    def __init__(self, messages):
+        self.messages = messages
+
+    def query(self, prompt, options, project=None, query_fn=None):
+        async def run():
+            for i in range(self.messages):
+                yield AssistantMessage(content=[TextBlock(f"part {i}")], model='test')
+        return run()
+
+
+def test_slow_client_sees_end_without_waiting_for_heartbeat():
+    """The completion signal doesn't depend on a free queue slot"""
+    streamer = ClaudeStreamer(queue_size=2, heartbeat=5.0, scheduler=FakeScheduler(10))
+    frames = []
+    started = time.monotonic()
+    for frame in streamer.stream("hi", None):
+        frames.append(frame)
+        time.sleep(0.02)  # a client slower than the run
+    elapsed = time.monotonic() - started
+
+    assert sum('event: text' in f for f in frames) == 10 and 'event: done' in frames[-1]
+    assert elapsed < 2, f"stream took {elapsed:.1f}s to end"
+    print(f"✓ Slow client stream ended {elapsed:.2f}s after it started (heartbeat 5s)")
+
+
+def test_event_stream_negotiation():
+    """?stream= and the preferred Accept type decide SSE vs JSON"""
+    assert wants_event_stream('1', None) and wants_event_stream('True', 'application/json')
+    assert not wants_event_stream(None, 'application/json, text/event-stream')
+    assert wants_event_stream(None, 'application/json;q=0.5, text/event-stream')
+    assert not wants_event_stream('0', '*/*')
+    print("✓ Streaming chosen by one shared rule")
+
+
+if __name__ == "__main__":
+    test_slow_client_sees_end_without_waiting_for_heartbeat()
+    test_event_stream_negotiation()
+    print("\n✅ All tests passed!")
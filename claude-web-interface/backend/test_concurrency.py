@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Multi-process stress test for concurrent writes to projects.json.
+
+Each worker process imports its own copy of the app (like a gunicorn worker)
+and hammers the session and select endpoints for the same projects. The
+resulting session counts must be exact.
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(BACKEND_DIR))
+
+WORKERS = 4
+SAVES_PER_WORKER = 25
+
+
+def _worker(data_dir, project_ids, ready, start):
+    os.environ['CLAUDE_WEB_DATA_DIR'] = data_dir
+    os.environ['CLAUDE_WEB_STORAGE'] = 'json'
+    sys.path.insert(0, BACKEND_DIR)
+    import app as backend
+
+    # Flush often so workers really interleave on disk
+    backend.storage.index.flush_delay = 0.01
+    backend.storage.index.check_interval = 0.0
+    client = backend.app.test_client()
+
+    ready.set()
+    start.wait()
+    for i in range(SAVES_PER_WORKER):
+        project_id = project_ids[i % len(project_ids)]
+        response = client.post('/api/sessions', json={'project_id': project_id, 'messages': []})
+        assert response.status_code == 200, response.data
+        response = client.post(f'/api/projects/{project_id}/select')
+        assert response.status_code == 200, response.data
+
+    # multiprocessing children skip atexit handlers
+    backend.storage.index.flush()
+
+
+def test_concurrent_session_counts():
+    """Session counts are exact after concurrent saves from several processes"""
+    data_dir = tempfile.mkdtemp(prefix='claude_web_stress_')
+    os.environ['CLAUDE_WEB_DATA_DIR'] = data_dir
+    os.environ['CLAUDE_WEB_STORAGE'] = 'json'
+    sys.path.insert(0, BACKEND_DIR)
+    import app as backend
+
+    client = backend.app.test_client()
+    project_ids = [
+        client.post('/api/projects', json={'name': f'stress-{i}'}).get_json()['id']
+        for i in range(3)
+    ]
+    backend.storage.index.flush()
+
+    ctx = multiprocessing.get_context('spawn')
+    start = ctx.Event()
+    readies = [ctx.Event() for _ in range(WORKERS)]
+    processes = [
+        ctx.Process(target=_worker, args=(data_dir, project_ids, readies[i], start))
+        for i in range(WORKERS)
+    ]
+    for p in processes:
+        p.start()
+    for ready in readies:
+        ready.wait(timeout=60)
+    start.set()
+    for p in processes:
+        p.join(timeout=120)
+        assert p.exitcode == 0
+
+    with open(Path(data_dir) / 'projects.json') as f:
+        projects = json.load(f)
+
+    total_saves = WORKERS * SAVES_PER_WORKER
+    expected = {
+        pid: sum(1 for i in range(SAVES_PER_WORKER) if i % len(project_ids) == n) * WORKERS
+        for n, pid in enumerate(project_ids)
+    }
+    for pid, count in expected.items():
+        assert projects[pid]['session_count'] == count, (pid, projects[pid]['session_count'], count)
+
+    session_files = list((Path(data_dir) / 'sessions').glob('*_*.json'))
+    assert len(session_files) == total_saves
+
+    print(f"✓ {total_saves} concurrent saves from {WORKERS} processes, counts exact: {expected}")
+
+
+def test_stale_whole_record_writes_keep_newer_fields():
+    """A put or replace based on an old version replays only the fields it changed"""
+    sys.path[:0] = [BACKEND_DIR, REPO_DIR]
+    from project_index import ProjectIndex
+
+    path = Path(tempfile.mkdtemp(prefix='claude_web_index_')) / 'projects.json'
+    first = ProjectIndex(path, check_interval=0.0)
+    first.put({'id': 'p', 'name': 'app', 'session_count': 0, 'last_accessed': 't0'})
+    first.flush()
+
+    second = ProjectIndex(path, check_interval=0.0)
+    stale = second.get('p')
+    # Whole-record writes queued in this worker, based on version 1
+    second.put(dict(stale, name='renamed'))
+    second.replace({'p': dict(second.get('p'), last_accessed='t1'), 'q': {'id': 'q', 'name': 'new'}})
+
+    # Another worker bumps the counter and flushes first
+    first.update('p', increments={'session_count': 2})
+    first.flush()
+    second.flush()
+
+    with open(path) as f:
+        projects = json.load(f)
+    assert projects['p']['session_count'] == 2
+    assert projects['p']['name'] == 'renamed' and projects['p']['last_accessed'] == 't1'
+    assert projects['q']['name'] == 'new' and projects['p']['version'] == 4
+    print("✓ Stale whole-record writes merged field by field onto the newer record")
+
+
+if __name__ == "__main__":
+    test_concurrent_session_counts()
+    test_stale_whole_record_writes_keep_newer_fields()
@@ -6,8 +6,11 @@ A CLI interface for claude-code-sdk that mimics the Claude Code CLI experience.
 import asyncio
 import sys
 import os
-from claude_code_sdk import query, ClaudeCodeOptions
+from lazy_sdk import PendingOptions, query
 from ui_theme import Colors, Icons, Theme
+from stream_renderer import StreamRenderer
+from async_input import InputReader, Spinner
+from build_telemetry import instrument, new_build_id
 
 
 async def main():
@@ -15,16 +18,48 @@ async def main():
     print(f"{Colors.MUTED}Type 'exit' or 'quit' to end the conversation{Colors.RESET}")
     print()
     
-    options = ClaudeCodeOptions(
+    options = PendingOptions(
         permission_mode='default',  # Can be changed to 'acceptEdits' or 'bypassPermissions'
         cwd='.',
         continue_conversation=True
     )
+    build_id = new_build_id('cli')
+    renderer = StreamRenderer()
+    spinner = Spinner(f"{Colors.MUTED}thinking...{Colors.RESET}")
+    reader = InputReader(on_idle_interrupt=lambda: print(
+        "\n\n" + Theme.status("Interrupted. Type 'exit' to quit.", 'warning')))
+    
+    async def respond(prompt):
+        spinner.start()
+        # Query Claude
+        async for message in instrument(query(prompt=prompt, options=options), build_id, 'cli'):
+            spinner.stop()
+            if hasattr(message, 'content'):
+                # Handle AssistantMessage; consecutive tool uses are drawn as one batch
+                tools = []
+                for block in message.content:
+                    if hasattr(block, 'text'):
+                        if tools:
+                            renderer.flush()
+                            print(Theme.tool_uses(tools), end="", flush=True)
+                            tools = []
+                        renderer.feed(block.text)
+                    elif hasattr(block, 'name'):
+                        # Tool use block
+                        tools.append((block.name, block.input if hasattr(block, 'input') else {}))
+                if tools:
+                    renderer.flush()
+                    print(Theme.tool_uses(tools), end="", flush=True)
+            elif hasattr(message, 'result'):
+                # Handle ResultMessage
+                renderer.flush()
+                if message.total_cost_usd:
+                    print(f"\n\n{Colors.MUTED}[Cost: ${message.total_cost_usd:.4f}]{Colors.RESET}", end="")
     
     while True:
         try:
-            # Get user input
-            prompt = input(f"\n{Theme.prompt('You', options.permission_mode)}").strip()
+            # Get user input; lines typed while Claude responds are queued
+            prompt = (await reader.read(f"\n{Theme.prompt('You', options.permission_mode)}")).strip()
             
             if prompt.lower() in ['exit', 'quit']:
                 print(Theme.status("Goodbye!", 'success'))
@@ -35,31 +70,26 @@ async def main():
             
             print(f"\n{Colors.PRIMARY}Claude{Colors.RESET}: ", end="", flush=True)
             
-            # Query Claude
-            response_parts = []
-            async for message in query(prompt=prompt, options=options):
-                if hasattr(message, 'content'):
-                    # Handle AssistantMessage
-                    for block in message.content:
-                        if hasattr(block, 'text'):
-                            response_parts.append(block.text)
-                            print(block.text, end="", flush=True)
-                        elif hasattr(block, 'name'):
-                            # Tool use block
-                            params = block.input if hasattr(block, 'input') else {}
-                            print(Theme.tool_use(block.name, params), end="", flush=True)
-                elif hasattr(message, 'result'):
-                    # Handle ResultMessage
-                    if message.total_cost_usd:
-                        print(f"\n\n{Colors.MUTED}[Cost: ${message.total_cost_usd:.4f}]{Colors.RESET}", end="")
-            
+            # Ctrl-C cancels just this query
+            completed = await reader.run(respond(prompt))
+            spinner.stop()
+            renderer.finish()
+            if not completed:
+                print("\n\n" + Theme.status("Query interrupted.", 'warning'), end="")
             print()  # New line after response
             
+        except EOFError:
+            print(f"\n{Theme.status('Goodbye!', 'success')}")
+            break
         except KeyboardInterrupt:
-            print(f"\n\n{Theme.status('Interrupted. Type \'exit\' to quit.', 'warning')}")
+            spinner.stop()
+            renderer.finish()
+            print("\n\n" + Theme.status("Interrupted. Type 'exit' to quit.", 'warning'))
         except Exception as e:
+            spinner.stop()
+            renderer.finish()
             print(f"\n{Theme.status(f'Error: {e}', 'error')}")
-
+    reader.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -8,20 +8,28 @@ import asyncio
 import sys
 import os
 from datetime import datetime
-from claude_code_sdk import query, ClaudeCodeOptions, ResultMessage, AssistantMessage, SystemMessage
+from lazy_sdk import PendingOptions, load_sdk, query
 from ui_theme import Colors, Icons, Theme
+from stream_renderer import StreamRenderer
+from async_input import InputReader, Spinner
+from build_telemetry import instrument, new_build_id
 
 
 class ModernClaudeInterface:
     def __init__(self):
         self.session_id = None
-        self.options = ClaudeCodeOptions(
+        self.build_id = new_build_id('modern_cli')
+        self.options = PendingOptions(
             permission_mode='default',
             cwd=os.getcwd(),
             continue_conversation=True
         )
         self.message_count = 0
         self.start_time = None
+        self.renderer = StreamRenderer()
+        self.spinner = Spinner(f"{Colors.PRIMARY}Claude{Colors.RESET} {Colors.MUTED}is thinking...{Colors.RESET}")
+        self.input = InputReader(on_idle_interrupt=lambda: print(
+            f"\n\n{Theme.status('Interrupted. Type exit to quit or continue chatting.', 'warning')}"))
         
     def show_welcome(self):
         """Display welcome message with modern styling"""
@@ -43,6 +51,7 @@ class ModernClaudeInterface:
             'I can read, write, and edit files',
             'I can run terminal commands',
             'I track costs and provide session summaries',
+            'Type your next prompt while I respond; Ctrl-C cancels the current reply',
         ]
         
         print(Theme.help_section("Commands", commands))
@@ -58,11 +67,6 @@ class ModernClaudeInterface:
         
         print(Theme.box(status_text, "Session Status", Colors.INFO))
     
-    def format_assistant_response(self, text: str) -> str:
-        """Apply subtle formatting to assistant responses"""
-        # Could add markdown parsing here for even richer output
-        return text
-    
     async def run_conversation(self, prompt: str):
         """Run a single conversation turn with enhanced UI"""
         if not self.start_time:
@@ -74,34 +78,45 @@ class ModernClaudeInterface:
         
         try:
             # Show thinking indicator
-            print(f"\n{Colors.PRIMARY}Claude{Colors.RESET} {Colors.MUTED}is thinking...{Colors.RESET}", end='\r')
+            print()
+            self.spinner.start()
             
-            async for message in query(prompt=prompt, options=self.options):
-                if isinstance(message, AssistantMessage):
+            sdk = load_sdk()
+            async for message in instrument(query(prompt=prompt, options=self.options), self.build_id, 'modern_cli'):
+                if isinstance(message, sdk.AssistantMessage):
                     if not response_started:
                         # Clear thinking indicator and show response header
-                        print(f"\r{' ' * 50}\r", end='')  # Clear line
+                        self.spinner.stop()
                         print(f"{Colors.PRIMARY}Claude{Colors.RESET}:", end=" ")
                         response_started = True
                     
+                    # Consecutive tool uses are drawn as one batch
+                    tools = []
                     for block in message.content:
                         if hasattr(block, 'text'):
-                            formatted_text = self.format_assistant_response(block.text)
-                            print(formatted_text, end="", flush=True)
+                            if tools:
+                                self.renderer.flush()
+                                print(Theme.tool_uses(tools))
+                                tools = []
+                            # Markdown rendered and written at most once per frame
+                            self.renderer.feed(block.text)
                         elif hasattr(block, 'name'):
                             tool_uses.append(block.name)
-                            # Show tool usage with theme
-                            params = block.input if hasattr(block, 'input') else {}
-                            print(Theme.tool_use(block.name, params))
+                            tools.append((block.name, block.input if hasattr(block, 'input') else {}))
                             response_started = True
+                    if tools:
+                        self.renderer.flush()
+                        print(Theme.tool_uses(tools))
                 
-                elif isinstance(message, SystemMessage):
+                elif isinstance(message, sdk.SystemMessage):
                     if message.subtype == 'tool_result' and hasattr(message, 'content'):
                         # Optionally show tool results in a subtle way
                         if message.content and len(str(message.content)) < 100:
+                            self.renderer.flush()
                             print(f"\n{Colors.MUTED}→ {message.content}{Colors.RESET}")
                 
-                elif isinstance(message, ResultMessage):
+                elif isinstance(message, sdk.ResultMessage):
+                    self.renderer.finish()
                     # Store session info
                     self.session_id = message.session_id
                     
@@ -118,12 +133,13 @@ class ModernClaudeInterface:
                     
                     print(f"{cost_str}{tools_str}")
             
-            if not response_started:
-                # Clear thinking indicator if no response
-                print(f"\r{' ' * 50}\r", end='')
+            self.renderer.finish()
+            # Clear thinking indicator if no response
+            self.spinner.stop()
             
         except Exception as e:
-            print(f"\r{' ' * 50}\r", end='')  # Clear any pending output
+            self.renderer.finish()
+            self.spinner.stop()  # Clear any pending output
             print(Theme.status(f"Error: {e}", 'error'))
     
     async def run(self):
@@ -132,8 +148,8 @@ class ModernClaudeInterface:
         
         while True:
             try:
-                # Modern prompt with time and mode indicator
-                prompt_str = input(f"\n{Theme.prompt('You', self.options.permission_mode)}").strip()
+                # Modern prompt with time and mode indicator; lines typed while Claude responds are queued
+                prompt_str = (await self.input.read(f"\n{Theme.prompt('You', self.options.permission_mode)}")).strip()
                 
                 if prompt_str.lower() in ['exit', 'quit']:
                     # Show session summary if we had interactions
@@ -158,14 +174,18 @@ class ModernClaudeInterface:
                     self.show_status()
                     continue
                 
-                # Run the conversation
-                await self.run_conversation(prompt_str)
+                # Run the conversation; Ctrl-C cancels just this query
+                if not await self.input.run(self.run_conversation(prompt_str)):
+                    self.renderer.finish()
+                    self.spinner.stop()
+                    print(f"\n\n{Theme.status('Query interrupted.', 'warning')}")
                 
             except KeyboardInterrupt:
                 print(f"\n\n{Theme.status('Interrupted. Type exit to quit or continue chatting.', 'warning')}")
             except EOFError:
                 print(f"\n{Theme.status('Thank you for using Claude. Goodbye!', 'success')}")
                 break
+        self.input.close()
 
 
 async def main():
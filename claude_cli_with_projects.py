@@ -6,28 +6,55 @@ Features:
 - Temporary projects for single sessions
 - Convert temp projects to full projects
 - Save/load session history
+
+projects.json holds each project with a small index of its sessions; the
+messages of every saved session live in their own append-only JSONL file
+under sessions/ and are read only when the session is loaded. The live
+session of a named project is autosaved through a write-ahead log
+(session_autosave.py) and recovered after a crash.
 """
 
 import asyncio
 import json
+import re
 import sys
 import os
+import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
-from claude_code_sdk import query, ClaudeCodeOptions, ResultMessage, AssistantMessage, SystemMessage
+from lazy_sdk import PendingOptions, load_sdk, query
 from ui_theme import Colors, Icons, Theme
+from stream_renderer import StreamRenderer
+from async_input import InputReader, Spinner
+from session_autosave import SessionAutosave, recover
+from json_store import append_jsonl, atomic_write_json, locked_file, read_json, read_jsonl
+from build_telemetry import instrument, new_build_id
+
+
+def session_file_name(project_name: str) -> str:
+    """Unique file name for a new session's messages"""
+    safe_name = re.sub(r'[^\w.-]', '_', project_name)
+    return f"{safe_name}_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}.jsonl"
 
 
 class Project:
     """Represents a project with sessions"""
-    def __init__(self, name: str, path: Path, is_temp: bool = False):
+    def __init__(self, name: str, path: Path, is_temp: bool = False, sessions_dir: Optional[Path] = None):
         self.name = name
         self.path = path
         self.is_temp = is_temp
         self.created_at = datetime.now().isoformat()
+        # Session index entries; 'messages' is only inline until the session is written out
         self.sessions: List[Dict] = []
+        self.sessions_dir = sessions_dir
         self.current_session = None
+        # Version of the on-disk record this object was loaded from, and how
+        # many of its sessions are already persisted there
+        self.version = 0
+        self.synced_sessions = 0
+        # Files of persisted sessions whose index entry changed since the last sync
+        self.changed_files = set()
         
     def to_dict(self) -> Dict:
         return {
@@ -35,31 +62,82 @@ class Project:
             'path': str(self.path),
             'is_temp': self.is_temp,
             'created_at': self.created_at,
-            'sessions': self.sessions
+            'sessions': self.sessions,
+            'version': self.version
         }
     
     @classmethod
-    def from_dict(cls, data: Dict) -> 'Project':
-        project = cls(data['name'], Path(data['path']), data.get('is_temp', False))
+    def from_dict(cls, data: Dict, sessions_dir: Optional[Path] = None) -> 'Project':
+        project = cls(data['name'], Path(data['path']), data.get('is_temp', False), sessions_dir)
         project.created_at = data.get('created_at', datetime.now().isoformat())
         project.sessions = data.get('sessions', [])
+        project.version = data.get('version', 0)
+        project.synced_sessions = len(project.sessions)
         return project
     
+    def has_unsaved_changes(self) -> bool:
+        return len(self.sessions) > self.synced_sessions or bool(self.changed_files)
+    
+    def rebase(self, disk_data: Dict):
+        """Adopt a newer on-disk record, keeping sessions added or updated since our last sync"""
+        unsaved = self.sessions[self.synced_sessions:]
+        updated = {s['file']: s for s in self.sessions[:self.synced_sessions] if s.get('file') in self.changed_files}
+        disk_sessions = [updated.pop(s.get('file'), s) for s in disk_data.get('sessions', [])]
+        self.sessions = disk_sessions + list(updated.values()) + unsaved
+        self.synced_sessions = len(disk_sessions)
+        self.version = disk_data.get('version', 0)
+    
     def add_session(self, session_data: Dict):
         """Add a session to the project"""
+        messages = session_data.get('messages', [])
         self.sessions.append({
             'timestamp': datetime.now().isoformat(),
-            'messages': session_data.get('messages', []),
+            'messages': list(messages),
+            'message_count': len(messages),
             'session_id': session_data.get('session_id'),
             'cost': session_data.get('cost', 0)
         })
     
+    def update_session_entry(self, entry: Dict):
+        """Add or update the index entry of a session stored in its own file (autosave)"""
+        for i, session in enumerate(self.sessions):
+            if session.get('file') == entry['file']:
+                session.update(entry)
+                if i < self.synced_sessions:
+                    self.changed_files.add(entry['file'])
+                return
+        self.sessions.append(dict(entry))
+    
+    def write_sessions(self):
+        """Move inline messages (new or legacy sessions) into their own files
+        
+        Sessions already written out are not touched again.
+        """
+        if self.sessions_dir is None:
+            return
+        for session in self.sessions:
+            if 'messages' not in session:
+                continue
+            self.sessions_dir.mkdir(parents=True, exist_ok=True)
+            file_name = session_file_name(self.name)
+            append_jsonl(self.sessions_dir / file_name, session['messages'])
+            session['message_count'] = len(session.pop('messages'))
+            session['file'] = file_name
+    
+    def load_session(self, index: int) -> List[Dict]:
+        """Messages of a session, read from its file on demand"""
+        session = self.sessions[index]
+        if 'messages' in session:
+            return session['messages']
+        return read_jsonl(self.sessions_dir / session['file'])
+    
     def save(self):
         """Save project to disk (only for non-temp projects)"""
         if not self.is_temp:
             project_file = self.path / f".claude_project_{self.name}.json"
-            with open(project_file, 'w') as f:
-                json.dump(self.to_dict(), f, indent=2)
+            with locked_file(project_file):
+                self.write_sessions()
+                atomic_write_json(project_file, self.to_dict(), separators=(',', ':'))
 
 
 class ProjectManager:
@@ -68,9 +146,17 @@ class ProjectManager:
         self.config_dir = config_dir or Path.home() / '.claude_cli'
         self.config_dir.mkdir(exist_ok=True)
         self.projects_file = self.config_dir / 'projects.json'
-        self.projects: Dict[str, Project] = {}
+        self.sessions_dir = self.config_dir / 'sessions'
+        self._projects: Optional[Dict[str, Project]] = None
         self.current_project: Optional[Project] = None
-        self.load_projects()
+    
+    @property
+    def projects(self) -> Dict[str, Project]:
+        """All projects, read from disk on first use"""
+        if self._projects is None:
+            self._projects = {}
+            self.load_projects()
+        return self._projects
     
     def load_projects(self):
         """Load projects from disk"""
@@ -80,19 +166,43 @@ class ProjectManager:
                     data = json.load(f)
                     for name, project_data in data.items():
                         if not project_data.get('is_temp', False):
-                            self.projects[name] = Project.from_dict(project_data)
+                            self.projects[name] = Project.from_dict(project_data, self.sessions_dir)
             except Exception as e:
                 print(Theme.status(f"Error loading projects: {e}", 'error'))
     
     def save_projects(self):
-        """Save all non-temp projects to disk"""
-        data = {}
-        for name, project in self.projects.items():
-            if not project.is_temp:
+        """Save all non-temp projects to disk
+        
+        Other CLI processes may have saved since we loaded, so the file is
+        re-read under the lock. A project whose on-disk version moved on is
+        rebased (their sessions plus our unsaved ones) instead of overwritten.
+        Only new sessions are written to session files; the file itself
+        holds just the compact session index.
+        """
+        with locked_file(self.projects_file):
+            data = read_json(self.projects_file, {})
+            
+            for name, project in self.projects.items():
+                if project.is_temp:
+                    continue
+                
+                on_disk = data.get(name)
+                if on_disk is not None and on_disk.get('version', 0) != project.version:
+                    project.rebase(on_disk)
+                
+                project.write_sessions()
+                if on_disk is None or project.has_unsaved_changes():
+                    project.version += 1
+                    project.synced_sessions = len(project.sessions)
+                    project.changed_files.clear()
                 data[name] = project.to_dict()
+            
+            atomic_write_json(self.projects_file, data, separators=(',', ':'))
         
-        with open(self.projects_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Pick up projects created by other processes
+        for name, project_data in data.items():
+            if name not in self.projects and not project_data.get('is_temp', False):
+                self.projects[name] = Project.from_dict(project_data, self.sessions_dir)
     
     def create_project(self, name: str, path: str = None, is_temp: bool = False) -> Project:
         """Create a new project"""
@@ -100,7 +210,7 @@ class ProjectManager:
             raise ValueError(f"Project '{name}' already exists")
         
         project_path = Path(path) if path else Path.cwd()
-        project = Project(name, project_path, is_temp)
+        project = Project(name, project_path, is_temp, self.sessions_dir)
         self.projects[name] = project
         
         if not is_temp:
@@ -156,7 +266,16 @@ class EnhancedClaudeInterface:
         self.session_messages = []
         self.session_cost = 0
         self.session_id = None
-        self.options = ClaudeCodeOptions(
+        # Write-ahead log of session_messages for non-temp projects
+        self.autosave: Optional[SessionAutosave] = None
+        # (project, index entry) of a saved session loaded with /session load
+        self.loaded_session = None
+        self.build_id = new_build_id('projects_cli')
+        self.renderer = StreamRenderer()
+        self.spinner = Spinner(f"{Colors.PRIMARY}Claude{Colors.RESET} {Colors.MUTED}is thinking...{Colors.RESET}")
+        self.input = InputReader(on_idle_interrupt=lambda: print(
+            f"\n\n{Theme.status('Interrupted. Type exit to quit or continue chatting.', 'warning')}"))
+        self.options = PendingOptions(
             permission_mode='default',
             cwd=os.getcwd(),
             continue_conversation=True
@@ -166,19 +285,19 @@ class EnhancedClaudeInterface:
         """Display welcome message with project info"""
         print(Theme.header("Claude AI Assistant - Project Mode", 60))
         
-        # Show current project or prompt to select
+        # Projects are loaded after the first prompt; show the current one once known
         if self.project_manager.current_project:
-            project = self.project_manager.current_project
-            status = f"Current Project: {project.name}"
-            if project.is_temp:
-                status += " (Temporary)"
-            print(Theme.status(status, 'info'))
-        else:
-            print(Theme.status("No project selected", 'warning'))
-            self.list_projects()
+            self.show_current_project()
         
         print(f"\n{Colors.MUTED}Type 'exit' to end • '/help' for commands{Colors.RESET}\n")
     
+    def show_current_project(self):
+        project = self.project_manager.current_project
+        status = f"Current Project: {project.name}"
+        if project.is_temp:
+            status += " (Temporary)"
+        print(Theme.status(status, 'info'))
+    
     def list_projects(self):
         """List all available projects"""
         projects = self.project_manager.list_projects()
@@ -284,13 +403,52 @@ class EnhancedClaudeInterface:
             print(f"\n{Colors.PRIMARY}Sessions for {project.name}:{Colors.RESET}")
             for i, session in enumerate(project.sessions):
                 timestamp = session.get('timestamp', 'Unknown')
-                messages = len(session.get('messages', []))
+                messages = session.get('message_count', len(session.get('messages', [])))
                 cost = session.get('cost', 0)
                 print(f"  [{i}] {timestamp} - {messages} messages - ${cost:.4f}")
                 
         else:
             print(Theme.status(f"Unknown project command: {args[0]}", 'error'))
     
+    def sync_autosave(self):
+        """Log the session messages not yet in the current project's autosave log"""
+        project = self.project_manager.current_project
+        if self.autosave is not None and self.autosave.project is not project:
+            self.close_autosave()
+        if project is None or project.is_temp or not self.session_messages:
+            return
+        if self.autosave is None:
+            loaded_project, entry = self.loaded_session or (None, None)
+            if loaded_project is project and entry.get('file'):
+                # Continue the loaded session in its own file instead of copying it
+                self.autosave = SessionAutosave(self.project_manager, project, entry['file'], resume=entry)
+            else:
+                self.autosave = SessionAutosave(self.project_manager, project, session_file_name(project.name))
+            self.loaded_session = None
+        for message in self.session_messages[self.autosave.count:]:
+            self.autosave.record(message)
+    
+    def close_autosave(self):
+        """Compact the live session into the project and remove its log"""
+        if self.autosave is not None:
+            self.autosave.close()
+            self.autosave = None
+    
+    def discard_autosave(self):
+        """Throw away the live session's unsaved messages and its log"""
+        if self.autosave is not None:
+            self.autosave.discard()
+            self.autosave = None
+    
+    def recover_sessions(self):
+        """Restore sessions of any project left unsaved by a crashed CLI"""
+        self.report_recovered(recover(self.project_manager))
+    
+    def report_recovered(self, recovered):
+        for project, entry in recovered:
+            print(Theme.status(f"Recovered an interrupted session of '{project.name}' from {entry['timestamp']} "
+                               f"({entry['message_count']} messages)", 'warning'))
+    
     def handle_session_command(self, args: List[str]):
         """Handle session-related commands"""
         if not self.project_manager.current_project:
@@ -299,14 +457,19 @@ class EnhancedClaudeInterface:
         
         if not args or args[0] == 'save':
             # Save current session
-            if self.session_messages:
+            if self.session_messages and not self.project_manager.current_project.is_temp:
+                # Already autosaved; compact the log into the project now
+                self.sync_autosave()
+                self.autosave.checkpoint()
+                print(Theme.status("Session saved", 'success'))
+            elif self.session_messages:
                 session_data = {
                     'messages': self.session_messages,
                     'session_id': self.session_id,
                     'cost': self.session_cost
                 }
                 self.project_manager.current_project.add_session(session_data)
-                self.project_manager.current_project.save()
+                self.project_manager.save_projects()
                 print(Theme.status("Session saved", 'success'))
             else:
                 print(Theme.status("No messages to save", 'warning'))
@@ -319,9 +482,17 @@ class EnhancedClaudeInterface:
             try:
                 index = int(args[1])
                 project = self.project_manager.current_project
+                # Finish the live session and pick up any left by a crash first
+                self.close_autosave()
+                self.recover_sessions()
                 if 0 <= index < len(project.sessions):
-                    session = project.sessions[index]
-                    self.session_messages = session.get('messages', [])
+                    if 'file' not in project.sessions[index] and not project.is_temp:
+                        self.project_manager.save_projects()  # give a legacy inline session its own file
+                    entry = project.sessions[index]
+                    self.session_messages = project.load_session(index)
+                    self.session_id = entry.get('session_id')
+                    self.session_cost = entry.get('cost', 0)
+                    self.loaded_session = (project, entry)
                     print(Theme.status(f"Loaded session {index} with {len(self.session_messages)} messages", 'success'))
                 else:
                     print(Theme.status(f"Invalid session index: {index}", 'error'))
@@ -339,74 +510,106 @@ class EnhancedClaudeInterface:
         
         # Add to session messages
         self.session_messages.append({'role': 'user', 'content': prompt})
+        self.sync_autosave()
         
-        assistant_response = ""
         tool_uses = []
         
         try:
-            print(f"\n{Colors.PRIMARY}Claude{Colors.RESET} {Colors.MUTED}is thinking...{Colors.RESET}", end='\r')
+            print()
+            self.spinner.start()
             
-            async for message in query(prompt=prompt, options=self.options):
-                if isinstance(message, AssistantMessage):
-                    print(f"\r{' ' * 50}\r", end='')
+            sdk = load_sdk()
+            async for message in instrument(query(prompt=prompt, options=self.options), self.build_id, 'projects_cli'):
+                if isinstance(message, sdk.AssistantMessage):
+                    self.renderer.flush()
+                    self.spinner.stop()
                     print(f"{Colors.PRIMARY}Claude{Colors.RESET}: ", end="")
                     
+                    # Consecutive tool uses are drawn as one batch
+                    tools = []
                     for block in message.content:
                         if hasattr(block, 'text'):
-                            print(block.text, end="", flush=True)
-                            assistant_response += block.text
+                            if tools:
+                                self.renderer.flush()
+                                print(Theme.tool_uses(tools))
+                                tools = []
+                            self.renderer.feed(block.text)
                         elif hasattr(block, 'name'):
                             tool_uses.append(block.name)
-                            print(Theme.tool_use(block.name, block.input if hasattr(block, 'input') else {}))
+                            tools.append((block.name, block.input if hasattr(block, 'input') else {}))
+                    if tools:
+                        self.renderer.flush()
+                        print(Theme.tool_uses(tools))
                 
-                elif isinstance(message, ResultMessage):
+                elif isinstance(message, sdk.ResultMessage):
+                    self.renderer.flush()
                     self.session_id = message.session_id
                     if message.total_cost_usd:
                         self.session_cost += message.total_cost_usd
                         print(f" {Colors.MUTED}[${message.total_cost_usd:.4f}]{Colors.RESET}")
+                    if self.autosave is not None:
+                        self.autosave.update(self.session_id, self.session_cost)
             
             # Add assistant response to session
-            self.session_messages.append({'role': 'assistant', 'content': assistant_response})
+            self.spinner.stop()
+            self.session_messages.append({'role': 'assistant', 'content': self.renderer.finish()})
+            self.sync_autosave()
             
+        except asyncio.CancelledError:
+            # Interrupted: keep what was received so far
+            self.spinner.stop()
+            self.session_messages.append({'role': 'assistant', 'content': self.renderer.finish()})
+            self.sync_autosave()
+            raise
         except Exception as e:
-            print(f"\r{' ' * 50}\r", end='')
+            self.renderer.finish()
+            self.spinner.stop()
             print(Theme.status(f"Error: {e}", 'error'))
     
-    async def run(self):
-        """Main interaction loop"""
-        # Auto-select or create temp project if none exists
+    def open_startup_project(self):
+        """Select the first named project, or a new temp one; returns recovered sessions"""
         if not self.project_manager.current_project:
             projects = self.project_manager.list_projects()
-            if projects:
-                # Auto-select first non-temp project or create temp
-                non_temp = [p for p in projects if not p.is_temp]
-                if non_temp:
-                    self.project_manager.select_project(non_temp[0].name)
-                else:
-                    # Create temp project
-                    temp_name = f"temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    self.project_manager.create_project(temp_name, is_temp=True)
-                    self.project_manager.select_project(temp_name)
+            # Auto-select first non-temp project or create temp
+            non_temp = [p for p in projects if not p.is_temp]
+            if non_temp:
+                self.project_manager.select_project(non_temp[0].name)
             else:
-                # Create temp project
                 temp_name = f"temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 self.project_manager.create_project(temp_name, is_temp=True)
                 self.project_manager.select_project(temp_name)
-        
+        return recover(self.project_manager)
+    
+    async def run(self):
+        """Main interaction loop"""
         self.show_welcome()
+        # Reading projects and recovering crashed sessions happens in a worker
+        # thread while the first prompt waits, and is finished before any input
+        # (including /project commands) is handled
+        startup = asyncio.ensure_future(asyncio.to_thread(self.open_startup_project))
         
         while True:
             try:
                 # Show project in prompt
-                project_name = self.project_manager.current_project.name if self.project_manager.current_project else "no-project"
-                prompt_str = input(f"\n{Theme.prompt(project_name, self.options.permission_mode)}").strip()
+                project_name = self.project_manager.current_project.name if self.project_manager.current_project else "…"
+                # Lines typed while Claude responds are queued as the next prompts
+                prompt_str = (await self.input.read(f"\n{Theme.prompt(project_name, self.options.permission_mode)}")).strip()
+                
+                if startup is not None:
+                    recovered = await startup
+                    startup = None
+                    self.show_current_project()
+                    self.report_recovered(recovered)
                 
                 if prompt_str.lower() in ['exit', 'quit']:
-                    # Ask to save session if there are messages
-                    if self.session_messages and self.project_manager.current_project and not self.project_manager.current_project.is_temp:
-                        save = input(f"{Colors.WARNING}Save current session? (y/n): {Colors.RESET}").lower()
+                    # Ask to save session if there are unsaved messages; the log only guards against crashes
+                    if self.autosave is not None and self.autosave.count > self.autosave.saved:
+                        save = (await self.input.read(f"{Colors.WARNING}Save current session? (y/n): {Colors.RESET}")).lower()
                         if save == 'y':
-                            self.handle_session_command(['save'])
+                            self.close_autosave()
+                            print(Theme.status("Session saved", 'success'))
+                        else:
+                            self.discard_autosave()
                     
                     print(Theme.status("Goodbye!", 'success'))
                     break
@@ -432,14 +635,17 @@ class EnhancedClaudeInterface:
                         print(Theme.status(f"Unknown command: {command}", 'error'))
                     continue
                 
-                # Run conversation
-                await self.run_conversation(prompt_str)
+                # Run conversation; Ctrl-C cancels just this query
+                if not await self.input.run(self.run_conversation(prompt_str)):
+                    print(f"\n\n{Theme.status('Query interrupted.', 'warning')}")
                 
             except KeyboardInterrupt:
                 print(f"\n\n{Theme.status('Interrupted. Type exit to quit or continue chatting.', 'warning')}")
             except EOFError:
                 print(f"\n{Theme.status('Goodbye!', 'success')}")
                 break
+        self.close_autosave()
+        self.input.close()
 
 
 async def main():
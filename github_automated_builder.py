@@ -4,49 +4,160 @@ Automated builder that monitors GitHub for specification updates
 and builds projects automatically using claude-code-sdk
 """
 
+import argparse
 import asyncio
+import functools
 import os
-import subprocess
 import json
 from pathlib import Path
 from datetime import datetime
-from claude_code_sdk import query, ClaudeCodeOptions
+from claude_code_sdk import ClaudeCodeOptions
+from query_scheduler import QueryScheduler, get_scheduler
+from query_cache import QueryCache, cache_from_env
+from json_store import atomic_write_json, read_json
+from webhook_listener import WebhookListener, DEFAULT_PORT
+from spec_ingest import SpecIngestor, chunk_text
+import build_telemetry
+from build_telemetry import instrument, new_build_id
+from retry_policy import PERMANENT, CircuitBreaker, PermanentError, RetryPolicy, classify
+import async_git
+
+# Tools whose file_path marks a file as output of the current component
+OUTPUT_TOOLS = {'Write', 'Edit', 'MultiEdit', 'NotebookEdit'}
+
+COMPONENT_ACTIONS = {"A": "Building", "M": "Updating", "D": "Removing"}
+
+# builder_state.json layout; components maps spec path -> {"spec_hash", "outputs"},
+# failures maps specs hash -> permanent failure count and last error
+DEFAULT_STATE = {"last_build_hash": None, "components": dict, "in_flight": None, "failures": dict}
+
+BUILD_REQUIREMENTS = """Requirements:
+        1. Create all necessary files and directories
+        2. Implement all specified features
+        3. Add comprehensive error handling
+        4. Include unit tests with >80% coverage
+        5. Add integration tests for key workflows
+        6. Create documentation (README.md, API docs)
+        7. Include CI/CD configuration files
+        8. Add docker support if applicable
+        9. Ensure the code is production-ready"""
 
 
 class GitHubAutomatedBuilder:
-    def __init__(self, config_file="builder_config.json"):
-        with open(config_file) as f:
-            self.config = json.load(f)
+    def __init__(self, config_file="builder_config.json", config=None, scheduler=None):
+        if config is None:
+            with open(config_file) as f:
+                config = json.load(f)
+        self.config = config
         
         self.specs_repo = self.config["specs_repo"]
         self.output_repo = self.config["output_repo"]
+        self.name = self.config.get("name") or Path(self.output_repo.rstrip("/")).stem
+        self.priority = self.config.get("priority", 0)
         self.work_dir = Path(self.config["work_directory"])
         self.specs_dir = self.work_dir / "specs"
         self.output_dir = self.work_dir / "output"
+        self.state_file = self.work_dir / "builder_state.json"
+        self.state = self.load_state()
+        self.ingestor = SpecIngestor(self.specs_dir, self.config.get("prompt_token_budget"))
+        self.scheduler = scheduler or get_scheduler()
+        self.build_id = new_build_id(self.name)
+        self.git_timeout = self.config.get("git_timeout_seconds", async_git.DEFAULT_TIMEOUT)
+        # Shallow/partial clone of the specs repo, e.g. {"depth": 1} or {"filter": "blob:none"}
+        self.specs_clone = self.config.get("specs_clone", {})
+        self.push_task = None
+        # Set by a failed background push so the build loop retries it without waiting
+        self.push_failed = asyncio.Event()
+        # Bare mirrors that clones borrow objects from (set by BuildFarm)
+        self.git_cache_dir = self.config.get("git_cache_dir")
+        self.retry = RetryPolicy(base_delay=self.config.get("retry_base_seconds", 5),
+                                 max_delay=self.config.get("retry_max_seconds", 900))
+        # Stop rebuilding a specs hash after this many permanent failures
+        self.breaker = CircuitBreaker(self.state["failures"], self.config.get("max_spec_failures", 3))
+        self.status = {"phase": "starting", "builds": 0, "total_cost": 0.0, "last_check": None,
+                       "last_success": None, "last_error": None, "last_changes": None}
+        
+        # Opt-in result cache: "response_cache": true in the config or CLAUDE_QUERY_CACHE=1
+        if self.config.get("response_cache"):
+            self.cache = QueryCache(self.work_dir / "query_cache")
+        else:
+            self.cache = cache_from_env()
         
         # Ensure API key is available
         if not os.environ.get("ANTHROPIC_API_KEY"):
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
     
-    def git_pull(self, repo_path):
+    async def git_pull(self, repo_path):
         """Pull latest changes from git repo"""
-        subprocess.run(["git", "pull"], cwd=repo_path, check=True)
+        await async_git.pull(repo_path, depth=self.specs_clone.get("depth"), timeout=self.git_timeout)
     
-    def git_push(self, repo_path, message):
-        """Commit and push changes"""
-        subprocess.run(["git", "add", "."], cwd=repo_path, check=True)
-        subprocess.run(["git", "commit", "-m", message], cwd=repo_path, check=True)
-        subprocess.run(["git", "push"], cwd=repo_path, check=True)
+    async def remote_changed(self, repo_path):
+        """Cheap check whether the upstream branch moved past the local HEAD
+        
+        Uses git ls-remote, which transfers only refs; errs on the side of
+        pulling when the upstream can't be determined.
+        """
+        try:
+            remote_hash = await async_git.remote_head(repo_path)
+        except async_git.GitError:
+            return True
+        return remote_hash != await async_git.rev_parse(repo_path)
+    
+    async def head_commit(self, repo_path):
+        """Current commit of a repo, or None before its first commit"""
+        try:
+            return await async_git.rev_parse(repo_path)
+        except (async_git.GitError, OSError):
+            return None
     
-    def clone_if_needed(self, repo_url, target_path):
+    async def git_push(self, repo_path, message, base=None):
+        """Commit and push a build's changes; returns their diff stats, or None when nothing changed
+        
+        base is the commit the build started from. Commits the agent made on
+        its own since then are squashed into the one build commit unless
+        "squash_agent_commits" is false in the config.
+        """
+        timeout = self.git_timeout
+        head = await self.head_commit(repo_path)
+        agent_commits = base is not None and head is not None and head != base
+        if not agent_commits and not await async_git.tree_changed(repo_path, timeout=timeout):
+            return None
+        if agent_commits and self.config.get("squash_agent_commits", True):
+            await async_git.git(repo_path, "reset", "--soft", base, timeout=timeout)
+        committed = await async_git.commit_all(repo_path, message, timeout=timeout)
+        if not committed and not agent_commits:
+            return None
+        stats = await async_git.diff_stats(repo_path, base or head, timeout=timeout)
+        if stats["files"] == 0:
+            # The agent's commits cancel out; drop them rather than push a no-op
+            if agent_commits:
+                await async_git.git(repo_path, "reset", "--soft", base, timeout=timeout)
+            return None
+        await async_git.push(repo_path, timeout=timeout)
+        return stats
+    
+    async def clone_if_needed(self, repo_url, target_path, **clone_options):
         """Clone repository if it doesn't exist"""
-        if not target_path.exists():
-            target_path.parent.mkdir(parents=True, exist_ok=True)
-            subprocess.run(["git", "clone", repo_url, str(target_path)], check=True)
+        if target_path.exists():
+            return
+        if self.git_cache_dir:
+            clone_options["reference"] = await async_git.mirror(repo_url, self.git_cache_dir, timeout=self.git_timeout)
+        await async_git.clone(repo_url, target_path, timeout=self.git_timeout, **clone_options)
+    
+    def run_query(self, prompt, options):
+        """Scheduled, optionally cached query, recorded in the telemetry ledger"""
+        def scheduled(prompt, options):
+            return self.scheduler.query(prompt, options, project=self.output_repo, priority=self.priority)
+        
+        if self.cache:
+            messages = self.cache.query(prompt, options, query_fn=scheduled)
+        else:
+            messages = scheduled(prompt, options)
+        return instrument(messages, self.build_id, "builder")
     
-    async def build_project_from_specs(self):
-        """Build project based on specifications"""
-        options = ClaudeCodeOptions(
+    def build_options(self):
+        """SDK options shared by every build query"""
+        return ClaudeCodeOptions(
             permission_mode='bypassPermissions',
             cwd=str(self.output_dir),
             max_turns=100,
@@ -54,142 +165,573 @@ class GitHubAutomatedBuilder:
             Follow all specifications exactly. Implement comprehensive error handling and testing.
             Create professional, maintainable code following best practices."""
         )
+    
+    def spec_files(self):
+        """Relative paths of all specification documents"""
+        return self.ingestor.spec_files()
+    
+    async def run_build_query(self, prompt, options, outputs=None):
+        """Run one build query, logging tool use; returns its cost
         
-        # Load all specification files
-        specs_content = []
-        for spec_file in self.specs_dir.glob("**/*.md"):
-            content = spec_file.read_text()
-            specs_content.append(f"=== {spec_file.name} ===\n{content}")
-        
-        for spec_file in self.specs_dir.glob("**/*.json"):
-            with open(spec_file) as f:
-                content = json.dumps(json.load(f), indent=2)
-                specs_content.append(f"=== {spec_file.name} ===\n{content}")
-        
-        # Build the project
-        build_prompt = f"""
-        Build a complete project based on these specifications:
-        
-        {chr(10).join(specs_content)}
-        
-        Requirements:
-        1. Create all necessary files and directories
-        2. Implement all specified features
-        3. Add comprehensive error handling
-        4. Include unit tests with >80% coverage
-        5. Add integration tests for key workflows
-        6. Create documentation (README.md, API docs)
-        7. Include CI/CD configuration files
-        8. Add docker support if applicable
-        9. Ensure the code is production-ready
+        Files written or edited by the agent are added to outputs.
         """
-        
         total_cost = 0.0
-        print(f"\n[{datetime.now()}] Starting automated build...")
-        
-        async for message in query(prompt=build_prompt, options=options):
+        async for message in self.run_query(prompt, options):
             if hasattr(message, 'content'):
                 for block in message.content:
                     if hasattr(block, 'name') and hasattr(block, 'input'):
                         # Log tool usage
                         tool_name = block.name
-                        if tool_name in ['Write', 'Edit']:
-                            file_path = block.input.get('file_path', 'unknown')
+                        if tool_name in OUTPUT_TOOLS:
+                            file_path = block.input.get('file_path') or block.input.get('notebook_path', 'unknown')
                             print(f"  📝 {tool_name}: {file_path}")
+                            if outputs is not None:
+                                outputs.add(self.output_relative(file_path))
                         elif tool_name == 'Bash':
                             command = block.input.get('command', 'unknown')
                             print(f"  💻 Running: {command[:50]}...")
             elif hasattr(message, 'total_cost_usd'):
-                total_cost = message.total_cost_usd
+                total_cost = message.total_cost_usd or 0.0
+                if getattr(message, 'is_error', False):
+                    raise PermanentError(f"Build query failed ({getattr(message, 'subtype', 'error')}, "
+                                       f"cost ${total_cost:.4f})")
+        return total_cost
+    
+    def output_relative(self, file_path):
+        """Path of a generated file relative to the output repo"""
+        path = Path(file_path)
+        if not path.is_absolute():
+            return path.as_posix()
+        try:
+            return path.resolve().relative_to(self.output_dir.resolve()).as_posix()
+        except ValueError:
+            return path.as_posix()
+    
+    async def build_project_from_specs(self, current_hash=None):
+        """Build project based on specifications
+        
+        In incremental mode only the specs that changed since the last build
+        are rebuilt; otherwise every spec is sent in one prompt.
+        """
+        if self.config.get("incremental"):
+            return await self.build_incremental(current_hash)
+        
+        options = self.build_options()
+        
+        # Specification chunks, packed under the prompt token budget
+        specs_content = self.ingestor.assemble(self.spec_files())
+        
+        # Build the project
+        build_prompt = f"""
+        Build a complete project based on these specifications:
+        
+        {specs_content}
+        
+        {BUILD_REQUIREMENTS}
+        """
+        
+        print(f"\n[{datetime.now()}] Starting automated build...")
+        total_cost = await self.run_build_query(build_prompt, options)
         
         print(f"✅ Build complete! Total cost: ${total_cost:.4f}")
+        print(f"   Queue wait p95: {self.scheduler.stats()['queue_wait_p95_s']}s")
+        if self.cache:
+            report = self.cache.report()
+            print(f"   Cache: {report['hits']} hits, {report['misses']} misses, ${report['cost_saved_usd']:.4f} saved")
         return total_cost
     
+    # Builder state
+    
+    def load_state(self):
+        """Last built specs hash, per-component spec hashes and in-flight build"""
+        state = read_json(self.state_file, {})
+        for key, default in DEFAULT_STATE.items():
+            state.setdefault(key, default() if callable(default) else default)
+        return state
+    
+    def save_state(self):
+        atomic_write_json(self.state_file, self.state, indent=2)
+    
+    # Incremental builds
+    
+    async def spec_hashes(self, commit):
+        """Map of spec path -> git blob hash at commit"""
+        output = await async_git.git(self.specs_dir, "ls-tree", "-r", commit)
+        hashes = {}
+        for line in output.splitlines():
+            meta, _, rel_path = line.partition("\t")
+            if Path(rel_path).suffix in (".md", ".json"):
+                hashes[rel_path] = meta.split()[2]
+        return hashes
+    
+    @staticmethod
+    def changed_specs(components, hashes):
+        """Map of spec path -> status letter (A, M, D) against the built components"""
+        changes = {}
+        for rel_path, spec_hash in hashes.items():
+            if rel_path not in components:
+                changes[rel_path] = "A"
+            elif components[rel_path].get("spec_hash") != spec_hash:
+                changes[rel_path] = "M"
+        for rel_path in components:
+            if rel_path not in hashes:
+                changes[rel_path] = "D"
+        return changes
+    
+    async def spec_diff(self, old_blob, new_blob):
+        # Partial clones may fetch the old blob here, so this is async too
+        return await async_git.git(self.specs_dir, "diff", old_blob, new_blob, timeout=self.git_timeout)
+    
+    async def unchanged_chunks(self, rel_path, old_blob):
+        """Digests of the spec's chunks that were already built from"""
+        old_text = await async_git.git(self.specs_dir, "cat-file", "blob", old_blob,
+                                       timeout=self.git_timeout, strip=False)
+        return {chunk.digest for chunk in chunk_text(old_text, str(self.specs_dir / rel_path))}
+    
+    async def component_prompt(self, rel_path, status, entry, spec_hash=None):
+        """Prompt for building, updating or removing one spec's component"""
+        component = Path(rel_path).stem
+        outputs = "\n".join(f"- {p}" for p in sorted(entry.get("outputs", []))) or "- (none recorded)"
+        
+        if status == "D":
+            return f"""
+        The specification {rel_path} was removed. Remove the {component} component
+        or update it so the rest of the project no longer depends on it.
+        
+        Files previously generated for this component:
+        {outputs}
+        """
+        
+        if status == "M":
+            # Sections that did not change are only referenced by path
+            spec_text = self.ingestor.assemble([rel_path], known=await self.unchanged_chunks(rel_path, entry["spec_hash"]))
+            return f"""
+        The specification {rel_path} changed. Update the {component} component to match it.
+        
+        Current specification:
+        {spec_text}
+        
+        Specification changes:
+        {await self.spec_diff(entry["spec_hash"], spec_hash)}
+        
+        Files previously generated for this component:
+        {outputs}
+        
+        Only change what the specification change requires and keep the rest of
+        the project working. Update the affected tests and documentation.
+        """
+        
+        spec_text = self.ingestor.assemble([rel_path])
+        return f"""
+        Build the {component} component of the project based on this specification ({rel_path}):
+        
+        {spec_text}
+        
+        The output repository may already contain other components; integrate with them.
+        
+        {BUILD_REQUIREMENTS}
+        """
+    
+    async def build_component(self, rel_path, status, spec_hash=None):
+        """Build one spec's component and record the files it produced"""
+        components = self.state["components"]
+        entry = components.get(rel_path, {})
+        print(f"\n🔨 {COMPONENT_ACTIONS[status]} component: {rel_path}")
+        
+        outputs = set()
+        prompt = await self.component_prompt(rel_path, status, entry, spec_hash)
+        cost = await self.run_build_query(prompt, self.build_options(), outputs)
+        
+        if status == "D":
+            components.pop(rel_path, None)
+        else:
+            # Keep earlier outputs: an update usually touches only part of them
+            if status == "M":
+                outputs |= set(entry.get("outputs", []))
+            components[rel_path] = {"spec_hash": spec_hash, "outputs": sorted(outputs)}
+        return cost
+    
+    async def build_incremental(self, current_hash):
+        """Rebuild only the components whose specs changed
+        
+        Each finished component is saved to the builder state straight away,
+        so an interrupted build resumes with the components it had not done.
+        """
+        hashes = await self.spec_hashes(current_hash or "HEAD")
+        changes = self.changed_specs(self.state["components"], hashes)
+        if self.state["components"]:
+            print(f"\n[{datetime.now()}] Incremental build: {len(changes)} of "
+                  f"{len(hashes)} specifications changed")
+        else:
+            print(f"\n[{datetime.now()}] No components built yet, building all {len(changes)}...")
+        
+        in_flight = self.state.get("in_flight") or {}
+        total_cost = 0.0
+        for rel_path, status in sorted(changes.items()):
+            cost = await self.build_component(rel_path, status, hashes.get(rel_path))
+            total_cost += cost
+            if in_flight:
+                in_flight["done"].append(rel_path)
+                in_flight["cost"] += cost
+            self.save_state()
+        
+        print(f"✅ Build complete! {len(changes)} components, total cost: ${total_cost:.4f}")
+        return total_cost
+    
+    async def build_if_needed(self, current_hash, background_push=False):
+        """Build and push current_hash unless it was already built
+        
+        Returns the build cost, or None when there was nothing to do. An
+        in-flight marker in the builder state lets a restarted builder pick up
+        an interrupted build (or a build whose push failed) where it stopped.
+        With background_push the push runs as a task while the caller goes on
+        to the next poll; it is awaited before the next build starts.
+        """
+        await self.finish_push()
+        if current_hash == self.state["last_build_hash"]:
+            return None
+        if self.breaker.is_open(current_hash):
+            print(f"  [{self.name}] Specs {current_hash[:8]} failed {self.breaker.threshold} times, "
+                  f"waiting for a new specs commit")
+            return None
+        
+        in_flight = self.state.get("in_flight")
+        if in_flight and in_flight["target_hash"] == current_hash:
+            print(f"📋 Resuming interrupted build of {current_hash[:8]} "
+                  f"({len(in_flight['done'])} components already done)")
+        else:
+            print(f"📋 New specifications detected: {current_hash[:8]}")
+            in_flight = {
+                "target_hash": current_hash,
+                "started_at": datetime.now().isoformat(),
+                "done": [],
+                "cost": 0.0,
+                "built": False,
+                "build_id": new_build_id(f"builder-{current_hash[:8]}"),
+                "base_commit": await self.head_commit(self.output_dir),
+            }
+            self.state["in_flight"] = in_flight
+            self.save_state()
+        # A resumed build keeps reporting under the same build id
+        self.build_id = in_flight.get("build_id", self.build_id)
+        
+        if not in_flight["built"]:
+            self.status["phase"] = "building"
+            cost = await self.build_project_from_specs(current_hash)
+            if not self.config.get("incremental"):
+                in_flight["cost"] += cost
+            in_flight["built"] = True
+            self.save_state()
+        
+        self.push_task = asyncio.ensure_future(self.push_build(in_flight))
+        self.push_task.add_done_callback(functools.partial(self.push_done, current_hash))
+        if not background_push:
+            await self.finish_push()
+        return in_flight["cost"]
+    
+    async def push_build(self, in_flight):
+        """Commit and push a finished build, then mark its specs as built"""
+        current_hash = in_flight["target_hash"]
+        self.status["phase"] = "pushing"
+        changes = await self.git_push(
+            self.output_dir,
+            f"Automated build from specs {current_hash[:8]} (Cost: ${in_flight['cost']:.4f})",
+            base=in_flight.get("base_commit"),
+        )
+        if changes:
+            print(f"  Pushed {changes['files']} files (+{changes['insertions']} -{changes['deletions']})")
+        else:
+            print("  Build produced no changes, nothing to push")
+        
+        self.state["last_build_hash"] = current_hash
+        self.state["in_flight"] = None
+        self.breaker.reset()
+        self.save_state()
+        self.status.update(phase="idle", last_success=datetime.now().isoformat(), last_changes=changes)
+        self.status["builds"] += 1
+        self.status["total_cost"] += in_flight["cost"]
+        self.log_build({"specs_hash": current_hash, "cost": in_flight["cost"],
+                        "status": "success" if changes else "unchanged", "changes": changes})
+    
+    def push_done(self, specs_hash, task):
+        """Report a failed push as soon as it fails, not at the next trigger"""
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        self.record_failure(error, specs_hash)
+        # finish_push re-raises it for the retry policy; don't report it twice
+        error.reported = True
+        self.push_failed.set()
+    
+    async def finish_push(self):
+        """Wait for a background push; its errors surface here"""
+        task, self.push_task = self.push_task, None
+        self.push_failed.clear()
+        if task:
+            await task
+    
+    def record_failure(self, error, specs_hash):
+        """Log a failed build or push and show it in the status"""
+        failure = classify(error)
+        print(f"❌ [{self.name}] Error during build ({failure.kind}): {error}")
+        self.status.update(phase="error", last_error=f"{datetime.now().isoformat()} {error}")
+        self.log_build({"error": str(error), "status": "failed", "failure": failure.kind,
+                        "specs_hash": specs_hash})
+        return failure
+    
+    def log_build(self, entry):
+        build_telemetry.emit(dict(entry, event="build", build_id=self.build_id, source="builder"))
+        with open(self.work_dir / "build_log.json", "a") as f:
+            json.dump(dict(timestamp=datetime.now().isoformat(), **entry), f)
+            f.write("\n")
+    
+    def status_summary(self):
+        """Current phase and build history of this pipeline"""
+        in_flight = self.state.get("in_flight")
+        return dict(
+            self.status,
+            name=self.name,
+            specs_repo=self.specs_repo,
+            output_repo=self.output_repo,
+            priority=self.priority,
+            last_build_hash=self.state["last_build_hash"],
+            in_flight=in_flight["target_hash"] if in_flight else None,
+        )
+    
     async def run_continuous_build(self):
         """Continuously monitor and build when specs change"""
         print(f"🤖 GitHub Automated Builder Started")
         print(f"   Specs repo: {self.specs_repo}")
         print(f"   Output repo: {self.output_repo}")
+        print(f"   Trigger: {self.config.get('trigger', 'poll')}")
         print(f"   Check interval: {self.config.get('check_interval_minutes', 30)} minutes")
+        if self.state["last_build_hash"]:
+            print(f"   Last build: {self.state['last_build_hash'][:8]}")
         
         # Initial setup
-        self.clone_if_needed(self.specs_repo, self.specs_dir)
-        self.clone_if_needed(self.output_repo, self.output_dir)
+        await asyncio.gather(
+            self.clone_if_needed(self.specs_repo, self.specs_dir, **self.specs_clone),
+            self.clone_if_needed(self.output_repo, self.output_dir),
+        )
         
-        last_build_hash = None
+        listener = await self.start_webhook_listener()
+        try:
+            await self.build_loop(listener)
+        finally:
+            if listener:
+                await listener.stop()
+            await self.finish_push()
+    
+    async def start_webhook_listener(self):
+        """Start the push webhook listener when "trigger": "webhook" is configured"""
+        if self.config.get("trigger", "poll") != "webhook":
+            return None
+        webhook = self.config.get("webhook", {})
+        listener = WebhookListener(
+            secret=webhook.get("secret") or os.environ.get("GITHUB_WEBHOOK_SECRET"),
+            host=webhook.get("host", "127.0.0.1"),
+            port=webhook.get("port", DEFAULT_PORT),
+            path=webhook.get("path", "/"),
+            branch=webhook.get("branch"),
+            debounce=webhook.get("debounce_seconds", 10),
+        )
+        await listener.start()
+        print(f"   Webhook: listening on {listener.host}:{listener.port}{listener.path}")
+        return listener
+    
+    async def build_loop(self, listener=None):
+        """Build on every trigger: a webhook push, or the poll interval passing
+        
+        Failures are retried with jittered exponential backoff by kind (see
+        retry_policy); a specs hash that keeps failing permanently is left
+        alone until the specs change.
+        """
+        interval = self.config.get('check_interval_minutes', 30) * 60
+        attempt = 0
         
         while True:
+            current_hash = None
             try:
-                # Pull latest specs
-                print(f"\n[{datetime.now()}] Checking for updates...")
-                self.git_pull(self.specs_dir)
+                # Pull latest specs, but only when the remote actually moved
+                print(f"\n[{datetime.now()}] [{self.name}] Checking for updates...")
+                self.status.update(phase="checking", last_check=datetime.now().isoformat())
+                if await self.remote_changed(self.specs_dir):
+                    await self.git_pull(self.specs_dir)
                 
                 # Check if specs have changed
-                current_hash = subprocess.check_output(
-                    ["git", "rev-parse", "HEAD"], 
-                    cwd=self.specs_dir
-                ).decode().strip()
+                current_hash = await async_git.rev_parse(self.specs_dir)
                 
-                if current_hash != last_build_hash:
-                    print(f"📋 New specifications detected: {current_hash[:8]}")
-                    
-                    # Build the project
-                    cost = await self.build_project_from_specs()
-                    
-                    # Commit and push results
-                    self.git_push(
-                        self.output_dir,
-                        f"Automated build from specs {current_hash[:8]} (Cost: ${cost:.4f})"
-                    )
-                    
-                    last_build_hash = current_hash
-                    
-                    # Log build
-                    with open(self.work_dir / "build_log.json", "a") as f:
-                        json.dump({
-                            "timestamp": datetime.now().isoformat(),
-                            "specs_hash": current_hash,
-                            "cost": cost,
-                            "status": "success"
-                        }, f)
-                        f.write("\n")
-                else:
-                    print("  No changes detected")
+                # The push runs in the background while we wait for the next trigger
+                cost = await self.build_if_needed(current_hash, background_push=True)
+                if cost is None:
+                    print(f"  [{self.name}] No changes detected")
+                if self.push_task is None:
+                    self.status["phase"] = "idle"
+                attempt = 0
                 
-                # Wait before next check
-                await asyncio.sleep(self.config.get('check_interval_minutes', 30) * 60)
+                await self.wait_for_trigger(listener, interval)
                 
             except Exception as e:
-                print(f"❌ Error during build: {e}")
-                # Log error
-                with open(self.work_dir / "build_log.json", "a") as f:
-                    json.dump({
-                        "timestamp": datetime.now().isoformat(),
-                        "error": str(e),
-                        "status": "failed"
-                    }, f)
-                    f.write("\n")
+                if getattr(e, "reported", False):
+                    failure = classify(e)  # a background push, reported when it failed
+                else:
+                    failure = self.record_failure(e, current_hash)
+                
+                if failure.kind == PERMANENT and current_hash:
+                    if self.breaker.record(current_hash, e):
+                        print(f"  [{self.name}] Giving up on specs {current_hash[:8]} until they change")
+                    self.save_state()
+                    if self.breaker.is_open(current_hash):
+                        attempt = 0
+                        await self.wait_for_trigger(listener, interval)
+                        continue
                 
-                # Wait before retry
-                await asyncio.sleep(300)  # 5 minutes
+                delay = self.retry.delay(failure, attempt)
+                attempt += 1
+                print(f"  [{self.name}] Retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+    
+    async def wait_for_trigger(self, listener, interval):
+        """Wait for the next push; polling stays as the fallback
+        
+        A failed background push ends the wait early, so it is retried with
+        backoff instead of at the next trigger.
+        """
+        trigger = asyncio.ensure_future(listener.wait(timeout=interval) if listener else asyncio.sleep(interval))
+        failed = asyncio.ensure_future(self.push_failed.wait())
+        try:
+            await asyncio.wait({trigger, failed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (trigger, failed):
+                task.cancel()
+            await asyncio.gather(trigger, failed, return_exceptions=True)
+
+
+class BuildFarm:
+    """Many specs/output pipelines served by one process
+    
+    Every pipeline runs its own GitHubAutomatedBuilder loop. They share one
+    query scheduler (global cap on concurrent Claude runs, per-pipeline
+    priority) and a cache of bare mirrors that clones borrow objects from.
+    Top-level config keys are defaults for every pipeline.
+    """
+    
+    # Keys that configure the farm itself, and per-pipeline keys that are never inherited
+    FARM_KEYS = {"pipelines", "max_concurrent_queries", "max_queue_depth", "status_interval_seconds"}
+    PIPELINE_ONLY_KEYS = {"name", "specs_repo", "output_repo", "trigger", "webhook", "priority"}
+    
+    def __init__(self, config):
+        self.config = config
+        self.work_dir = Path(config["work_directory"])
+        self.status_file = self.work_dir / "farm_status.json"
+        pipelines = config["pipelines"]
+        self.scheduler = QueryScheduler(
+            max_concurrent=config.get("max_concurrent_queries", 4),
+            max_queue_depth=max(config.get("max_queue_depth", 32), 2 * len(pipelines)),
+        )
+        
+        defaults = {k: v for k, v in config.items() if k not in self.FARM_KEYS | self.PIPELINE_ONLY_KEYS}
+        defaults["git_cache_dir"] = str(self.work_dir / ".git-cache")
+        self.builders = []
+        names = set()
+        for pipeline in pipelines:
+            pipeline_config = dict(defaults, **pipeline)
+            name = pipeline_config.get("name") or Path(pipeline["output_repo"].rstrip("/")).stem
+            if name in names:
+                raise ValueError(f"Duplicate pipeline name: {name}")
+            names.add(name)
+            pipeline_config["name"] = name
+            if "work_directory" not in pipeline:
+                pipeline_config["work_directory"] = str(self.work_dir / name)
+            self.builders.append(GitHubAutomatedBuilder(config=pipeline_config, scheduler=self.scheduler))
+    
+    def status(self):
+        return {
+            "updated_at": datetime.now().isoformat(),
+            "scheduler": self.scheduler.stats(),
+            "pipelines": [builder.status_summary() for builder in self.builders],
+        }
+    
+    def write_status(self):
+        status = self.status()
+        atomic_write_json(self.status_file, status, indent=2)
+        return status
+    
+    async def report_status(self):
+        interval = self.config.get("status_interval_seconds", 60)
+        while True:
+            await asyncio.sleep(interval)
+            print_status(self.write_status())
+    
+    async def run_pipeline(self, builder, delay):
+        # Stagger start-up so dozens of pipelines don't fetch at the same moment
+        await asyncio.sleep(delay)
+        await builder.run_continuous_build()
+    
+    async def run(self):
+        print(f"🏭 Build farm: {len(self.builders)} pipelines, "
+              f"{self.scheduler.max_concurrent} concurrent Claude runs")
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        stagger = min(5.0, self.config.get("check_interval_minutes", 30) * 60 / max(len(self.builders), 1))
+        await asyncio.gather(
+            self.report_status(),
+            *(self.run_pipeline(builder, i * stagger) for i, builder in enumerate(self.builders)),
+        )
+
+
+def print_status(status):
+    """Table of pipelines from a farm status snapshot"""
+    scheduler = status["scheduler"]
+    print(f"\n📊 Farm status at {status['updated_at']}: {scheduler['running']} running, "
+          f"{scheduler['queued']} queued, queue wait p95 {scheduler['queue_wait_p95_s']}s")
+    print(f"   {'pipeline':<28} {'phase':<10} {'built':<10} {'builds':>6} {'cost $':>9}  last error")
+    for p in status["pipelines"]:
+        built = (p["last_build_hash"] or "-")[:8]
+        error = (p["last_error"] or "")[:60]
+        print(f"   {p['name'][:28]:<28} {p['phase']:<10} {built:<10} {p['builds']:>6} {p['total_cost']:>9.4f}  {error}")
 
 
 async def main():
+    parser = argparse.ArgumentParser(description='Build projects from specification repos')
+    parser.add_argument('--config', default='builder_config.json')
+    parser.add_argument('--status', action='store_true', help='Show the build farm status and exit')
+    args = parser.parse_args()
+    
     # Create example config if it doesn't exist
-    config_path = Path("builder_config.json")
+    config_path = Path(args.config)
     if not config_path.exists():
         example_config = {
             "specs_repo": "https://github.com/yourusername/project-specs.git",
             "output_repo": "https://github.com/yourusername/generated-project.git",
             "work_directory": "/opt/code/automated_builds",
-            "check_interval_minutes": 30
+            "check_interval_minutes": 30,
+            "incremental": True,
+            "trigger": "poll",
+            "webhook": {"port": DEFAULT_PORT, "branch": "main", "debounce_seconds": 10},
+            "specs_clone": {"filter": "blob:none"},
+            "squash_agent_commits": True,
+            "git_timeout_seconds": 600
         }
         config_path.write_text(json.dumps(example_config, indent=2))
         print("Created example config at builder_config.json")
         print("Please update it with your repository URLs and run again.")
         return
     
-    builder = GitHubAutomatedBuilder()
+    config = json.loads(config_path.read_text())
+    if args.status:
+        status_file = Path(config["work_directory"]) / "farm_status.json"
+        if not status_file.exists():
+            print(f"No farm status at {status_file}")
+            return
+        print_status(json.loads(status_file.read_text()))
+        return
+    
+    # A "pipelines" list serves many repo pairs from this one process
+    if "pipelines" in config:
+        await BuildFarm(config).run()
+        return
+    
+    builder = GitHubAutomatedBuilder(config=config)
     await builder.run_continuous_build()
 
 
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Crash- and concurrency-safe JSON file helpers for the CLI tools.
+
+Writers take an exclusive fcntl lock on a sidecar '<file>.lock', write to a
+temp file in the same directory, fsync it and rename it over the target, so
+readers only ever see a complete file.
+
+Append-only JSONL files (one record per line) are never rewritten: new
+records are appended and fsynced, and a line torn by a crash is skipped
+when reading.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, List
+
+
+@contextmanager
+def locked_file(path: Path):
+    """Hold an exclusive cross-process lock on path + '.lock'"""
+    lock_path = Path(str(path) + '.lock')
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """Load JSON from path, returning default if it does not exist"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def atomic_write_json(path: Path, data: Any, **dump_kwargs):
+    """Write JSON to a temp file, fsync it and rename it over path"""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def append_jsonl(path: Path, records: Iterable[Any]):
+    """Append one compact JSON line per record and fsync"""
+    lines = ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records).encode()
+    with open(path, 'ab+') as f:
+        # Start on a fresh line if a crash left the last one torn
+        end = f.seek(0, os.SEEK_END)
+        if end > 0:
+            f.seek(end - 1)
+            if f.read(1) != b'\n':
+                lines = b'\n' + lines
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_jsonl(path: Path) -> List[Any]:
+    """Records of a JSONL file ([] if it does not exist), skipping torn lines"""
+    records = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Deferred claude_code_sdk import for the interactive CLIs.
+
+Importing the SDK pulls in its MCP and anyio dependencies, which takes
+longer than everything else a CLI does before its first prompt. The CLIs
+keep their settings in PendingOptions and import the SDK only when the
+first query runs.
+"""
+
+from typing import Any, AsyncIterator
+
+
+def load_sdk():
+    """The claude_code_sdk module, imported on first use"""
+    import claude_code_sdk
+    return claude_code_sdk
+
+
+class PendingOptions:
+    """ClaudeCodeOptions fields, held as plain attributes until the SDK is loaded"""
+
+    def __init__(self, **fields: Any):
+        self.__dict__.update(fields)
+
+    def build(self):
+        return load_sdk().ClaudeCodeOptions(**vars(self))
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{k}={v!r}" for k, v in vars(self).items())
+        return f"PendingOptions({fields})"
+
+
+def query(prompt: str, options=None) -> AsyncIterator:
+    """claude_code_sdk.query, importing the SDK on first use"""
+    if isinstance(options, PendingOptions):
+        options = options.build()
+    return load_sdk().query(prompt=prompt, options=options)
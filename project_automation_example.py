@@ -5,15 +5,95 @@ Reads project specs and builds entire applications automatically
 """
 
 import asyncio
+import dataclasses
+import itertools
 import json
+import os
+import re
+import shutil
 from pathlib import Path
-from claude_code_sdk import query, ClaudeCodeOptions
+from claude_code_sdk import ClaudeCodeOptions
+from query_scheduler import get_scheduler
+from query_cache import cache_from_env
+from spec_ingest import chunk_lines, compact_json, pack, token_budget_from_env
+from build_telemetry import instrument, new_build_id, telemetry_enabled
+import async_git
+
+
+FRONT_MATTER = re.compile(r"\A---\s*\n(.*?)\n---\s*\n", re.DOTALL)
+
+
+def parse_front_matter(text):
+    """Split simple YAML front-matter (key: value and lists) from a markdown spec"""
+    match = FRONT_MATTER.match(text)
+    if not match:
+        return {}, text
+    
+    meta = {}
+    key = None
+    for line in match.group(1).splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if line.lstrip().startswith("- ") and key:
+            meta.setdefault(key, [])
+            meta[key].append(line.strip()[2:].strip().strip("'\""))
+            continue
+        key, _, value = line.partition(":")
+        key, value = key.strip(), value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            meta[key] = [v.strip().strip("'\"") for v in value[1:-1].split(",") if v.strip()]
+        elif value:
+            meta[key] = value.strip("'\"")
+    return meta, text[match.end():]
+
+
+def read_front_matter(lines):
+    """Front-matter of a markdown spec streamed as lines
+
+    Only the front-matter block is read. Returns (meta, body_lines,
+    first_line), where body_lines iterates the rest of the spec lazily.
+    """
+    lines = iter(lines)
+    head = []
+    for line in lines:
+        head.append(line)
+        if head[0].strip() != "---" or (len(head) > 1 and line.strip() == "---"):
+            break  # no front-matter, or its closing line
+    meta, body = parse_front_matter("".join(head))
+    body_lines = body.splitlines(keepends=True)
+    return meta, itertools.chain(body_lines, lines), len(head) - len(body_lines) + 1
+
+
+def dependency_order(dependencies):
+    """Topological order of {component: [dependencies]}; raises on cycles"""
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    order = []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle between components: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+            for deps in remaining.values():
+                deps.discard(name)
+        order.extend(ready)
+    return order
 
 
 class ProjectAutomator:
-    def __init__(self, project_dir, specs_dir):
+    def __init__(self, project_dir, specs_dir, cache=None, max_parallel=None, token_budget=None):
         self.project_dir = Path(project_dir)
         self.specs_dir = Path(specs_dir)
+        # Per-component spec prompt budget; sections over it are referenced by path
+        self.token_budget = token_budget or token_budget_from_env()
+        # Components built at once, each in its own git worktree
+        self.max_parallel = max_parallel or int(os.environ.get("CLAUDE_AUTOMATOR_PARALLEL", 4))
+        self.worktree_root = self.project_dir.parent / f".{self.project_dir.name}-worktrees"
+        self.merge_lock = asyncio.Lock()
+        self.scheduler = get_scheduler()
+        self.build_id = new_build_id(self.project_dir.name)
+        # Opt-in result cache (or set CLAUDE_QUERY_CACHE=1)
+        self.cache = cache or cache_from_env()
         self.options = ClaudeCodeOptions(
             permission_mode='bypassPermissions',  # Auto-accept all operations
             cwd=str(self.project_dir),
@@ -22,19 +102,144 @@ class ProjectAutomator:
             Follow specifications exactly and implement best practices."""
         )
         
+    def run_query(self, prompt, options=None):
+        """Scheduled, optionally cached query (in the project directory by default)"""
+        options = options or self.options
+        
+        def scheduled(prompt, options):
+            return self.scheduler.query(prompt, options, project=self.project_dir.name)
+        
+        if self.cache:
+            messages = self.cache.query(prompt, options, query_fn=scheduled)
+        else:
+            messages = scheduled(prompt, options)
+        return instrument(messages, self.build_id, "automator")
+    
     async def load_specifications(self):
-        """Load all project specification documents"""
+        """Load all project specification documents
+        
+        Returns (specs, dependencies). Specs are prompt-ready text: markdown is
+        chunked by heading and packed under the token budget, JSON is compacted.
+        Dependencies come from a depends_on list in markdown front-matter or a
+        "depends_on" key in JSON specs.
+        """
         specs = {}
+        dependencies = {}
         for spec_file in self.specs_dir.glob("*.md"):
-            specs[spec_file.stem] = spec_file.read_text()
+            # Streamed: only the packed prompt is held in memory, not the spec
+            with open(spec_file) as f:
+                meta, body, first_line = read_front_matter(f)
+                chunks = chunk_lines(body, str(spec_file.resolve()), first_line)
+                specs[spec_file.stem] = pack(chunks, self.token_budget)
+            dependencies[spec_file.stem] = meta.get("depends_on", [])
         
         for spec_file in self.specs_dir.glob("*.json"):
-            with open(spec_file) as f:
-                specs[spec_file.stem] = json.load(f)
+            text = spec_file.read_text()
+            spec = json.loads(text)
+            specs[spec_file.stem] = compact_json(text)
+            dependencies[spec_file.stem] = spec.get("depends_on", []) if isinstance(spec, dict) else []
+        
+        for name, deps in dependencies.items():
+            if isinstance(deps, str):
+                deps = [deps]
+            unknown = [d for d in deps if d not in specs]
+            if unknown:
+                print(f"   ⚠️  {name} depends on unknown components: {', '.join(unknown)}")
+            dependencies[name] = [d for d in deps if d in specs and d != name]
+        
+        return specs, dependencies
+    
+    # Git worktrees
+    
+    async def ensure_repository(self):
+        """Make the project directory a git repo with the scaffold committed"""
+        if not (self.project_dir / ".git").exists():
+            await async_git.git(self.project_dir, "init", "-q")
+        await async_git.commit_all(self.project_dir, "Initial project structure")
+        self.worktree_root.mkdir(parents=True, exist_ok=True)
+    
+    async def build_in_worktree(self, component_name, spec_content):
+        """Build a component on its own branch and worktree, then merge it back"""
+        branch = f"component/{component_name}"
+        worktree = self.worktree_root / component_name
+        
+        # Branch from the current HEAD, which already has the dependencies merged
+        async with self.merge_lock:
+            if worktree.exists():
+                # Left over from an interrupted run
+                shutil.rmtree(worktree, ignore_errors=True)
+            await async_git.git(self.project_dir, "worktree", "prune")
+            await async_git.git(self.project_dir, "worktree", "add", "-q", "-B", branch, str(worktree), "HEAD")
+        try:
+            options = dataclasses.replace(self.options, cwd=str(worktree))
+            await self.build_component(component_name, spec_content, options)
+            if not await async_git.commit_all(worktree, f"Build {component_name} component"):
+                return
+            # Merges are deliberately serialized: they, and any conflict resolution
+            # query, run in the shared project tree, which holds one merge at a time
+            async with self.merge_lock:
+                await self.merge_component(component_name, branch)
+        finally:
+            await async_git.returncode(self.project_dir, "worktree", "remove", "--force", str(worktree))
+            await async_git.returncode(self.project_dir, "branch", "-D", branch)
+    
+    async def merge_component(self, component_name, branch):
+        """Merge a component branch into the project, resolving conflicts with Claude"""
+        returncode = await async_git.returncode(
+            self.project_dir, "merge", "-q", "--no-ff", "-m", f"Merge {component_name} component", branch
+        )
+        if returncode == 0:
+            return
+        
+        conflicted = (await async_git.git(self.project_dir, "diff", "--name-only", "--diff-filter=U")).splitlines()
+        if not conflicted:
+            await async_git.returncode(self.project_dir, "merge", "--abort")
+            raise RuntimeError(f"Merging the {component_name} component failed without conflicts")
+        
+        print(f"   ⚠️  Merge conflict for {component_name}, resolving...")
+        resolve_prompt = f"""
+        Merging the {component_name} component produced git merge conflicts.
+        Resolve every conflict so that both sides' functionality is kept,
+        then stage the resolved files. Do not commit.
+        """
+        async for message in self.run_query(resolve_prompt):
+            pass
+        await async_git.git(self.project_dir, "add", "--all")
+        
+        # Never commit a half-resolved merge
+        unmerged = await async_git.git(self.project_dir, "diff", "--name-only", "--diff-filter=U")
+        markers = await async_git.returncode(self.project_dir, "grep", "--cached", "-q", "-E",
+                                             "^(<<<<<<<|>>>>>>>)( |$)", "--", *conflicted) == 0
+        if unmerged or markers:
+            await async_git.returncode(self.project_dir, "merge", "--abort")
+            raise RuntimeError(f"Conflicts merging the {component_name} component were left unresolved "
+                               f"({', '.join(unmerged.splitlines() or conflicted)})")
+        await async_git.git(self.project_dir, "commit", "-q", "--no-edit")
+    
+    async def build_components(self, specs, dependencies):
+        """Build components concurrently, each after the components it depends on"""
+        order = dependency_order(dependencies)
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        tasks = {}
+        
+        async def build(name):
+            if dependencies[name]:
+                await asyncio.gather(*(tasks[dep] for dep in dependencies[name]))
+            async with semaphore:
+                await self.build_in_worktree(name, specs[name])
         
-        return specs
+        # Dependencies come first in order, so their tasks exist when awaited
+        for name in order:
+            tasks[name] = asyncio.ensure_future(build(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
     
-    async def build_component(self, component_name, spec_content):
+    async def build_component(self, component_name, spec_content, options=None):
         """Build a single component based on specifications"""
         prompt = f"""
         Build the {component_name} component based on these specifications:
@@ -47,14 +252,14 @@ class ProjectAutomator:
         
         print(f"\n🔨 Building component: {component_name}")
         
-        async for message in query(prompt=prompt, options=self.options):
+        async for message in self.run_query(prompt, options):
             # Log progress
             if hasattr(message, 'content'):
                 for block in message.content:
                     if hasattr(block, 'name'):
-                        print(f"   • Executing: {block.name}")
+                        print(f"   • {component_name}: {block.name}")
             elif hasattr(message, 'result'):
-                print(f"   ✅ Component built (Cost: ${message.total_cost_usd:.4f})")
+                print(f"   ✅ {component_name} built (Cost: ${message.total_cost_usd:.4f})")
     
     async def build_project(self):
         """Build entire project from specifications"""
@@ -66,7 +271,7 @@ class ProjectAutomator:
         self.project_dir.mkdir(parents=True, exist_ok=True)
         
         # Load all specifications
-        specs = await self.load_specifications()
+        specs, dependencies = await self.load_specifications()
         print(f"\n📋 Found {len(specs)} specification documents")
         
         # Build initial project structure
@@ -79,14 +284,15 @@ class ProjectAutomator:
         """
         
         print("\n🏗️  Setting up project structure...")
-        async for message in query(prompt=structure_prompt, options=self.options):
+        async for message in self.run_query(structure_prompt):
             pass
         
-        # Build each component
-        for component, spec in specs.items():
-            await self.build_component(component, spec)
+        # Build components in dependency order, independent ones in parallel
+        await self.ensure_repository()
+        print(f"\n🔀 Building components ({self.max_parallel} at a time)...")
+        await self.build_components(specs, dependencies)
         
-        # Final integration and testing
+        # Final integration and testing, once every component is merged
         print("\n🧪 Running final integration and tests...")
         test_prompt = """
         Now that all components are built:
@@ -96,10 +302,17 @@ class ProjectAutomator:
         4. Create a README.md with usage instructions
         """
         
-        async for message in query(prompt=test_prompt, options=self.options):
+        async for message in self.run_query(test_prompt):
             pass
         
         print("\n✨ Project build complete!")
+        stats = self.scheduler.stats()
+        print(f"   Queue wait p50/p95: {stats['queue_wait_p50_s']}s / {stats['queue_wait_p95_s']}s")
+        if self.cache:
+            report = self.cache.report()
+            print(f"   Cache: {report['hits']} hits, {report['misses']} misses, ${report['cost_saved_usd']:.4f} saved")
+        if telemetry_enabled():
+            print(f"   Telemetry: python build_telemetry.py report --build {self.build_id}")
 
 
 async def main():
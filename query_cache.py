@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Opt-in content-addressed cache for claude_code_sdk.query runs.
+
+The key covers the prompt, system_prompt, model, max_turns and a hash of the
+working directory tree as it was before the run. A successful run stores the
+recorded message stream plus the file diff it produced; a later identical run
+in an identical tree replays the messages and re-applies the diff instead of
+calling the API again. Because the replayed diff leaves the tree exactly as
+the original run did, a re-run of a multi-step build hits for every step.
+Replayed messages carry cached=True and a replayed result reports a
+total_cost_usd of 0, since no API call was made; the recorded cost is kept
+as cached_cost_usd. Tree hashing and diffing run in a worker thread so a
+large checkout does not stall the event loop.
+
+Entries are evicted least-recently-used once the cache exceeds max_bytes or
+max_entries.
+
+Usage:
+    python query_cache.py report [--cache-dir DIR]
+    python query_cache.py clear  [--cache-dir DIR]
+"""
+
+import argparse
+import asyncio
+import base64
+import dataclasses
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from json_store import atomic_write_json, locked_file, read_json
+
+
+IGNORED_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', '.pytest_cache'}
+DEFAULT_CACHE_DIR = Path.home() / '.claude_query_cache'
+
+
+def _encode(value):
+    """Serialize SDK message dataclasses, keeping their type names"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        encoded = {f.name: _encode(getattr(value, f.name)) for f in dataclasses.fields(value)}
+        encoded['__type__'] = type(value).__name__
+        return encoded
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+
+def _decode(value):
+    """Rebuild SDK message dataclasses encoded by _encode"""
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        if '__type__' in value:
+            from claude_code_sdk import types as sdk_types
+            cls = getattr(sdk_types, value['__type__'])
+            return cls(**{k: _decode(v) for k, v in value.items() if k != '__type__'})
+        return {k: _decode(v) for k, v in value.items()}
+    return value
+
+
+def _replayed(message):
+    """Mark a message decoded from the cache; its run cost nothing this time"""
+    message.cached = True
+    if hasattr(message, 'total_cost_usd'):
+        message.cached_cost_usd = message.total_cost_usd
+        message.total_cost_usd = 0.0
+    return message
+
+
+class QueryCache:
+    """LRU, size-bounded store of recorded query runs"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = 512 * 1024 * 1024,
+                 max_entries: int = 1000):
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.entries_dir = self.cache_dir / 'entries'
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / 'index.json'
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # (path, size, mtime_ns) -> content hash, so unchanged files are hashed once
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+    # Keys
+
+    def _scan_tree(self, cwd: Path) -> Dict[str, str]:
+        """Map relative path -> content hash for every file under cwd"""
+        files = {}
+        for root, dirs, names in os.walk(cwd):
+            dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+            for name in sorted(names):
+                path = Path(root) / name
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                cache_key = (str(path), st.st_size, st.st_mtime_ns)
+                digest = self._file_hashes.get(cache_key)
+                if digest is None:
+                    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                    self._file_hashes[cache_key] = digest
+                files[str(path.relative_to(cwd))] = digest
+        return files
+
+    def key_for(self, prompt: str, options, tree: Dict[str, str]) -> str:
+        tree_hash = hashlib.sha256(json.dumps(sorted(tree.items())).encode()).hexdigest()
+        material = {
+            'prompt': prompt,
+            'system_prompt': getattr(options, 'system_prompt', None),
+            'model': getattr(options, 'model', None),
+            'max_turns': getattr(options, 'max_turns', None),
+            'tree': tree_hash,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    # Index
+
+    def _update_index(self, mutate):
+        with locked_file(self.index_file):
+            index = read_json(self.index_file, {'entries': {}, 'stats': {}})
+            mutate(index)
+            self._evict(index)
+            atomic_write_json(self.index_file, index)
+        return index
+
+    def _evict(self, index: Dict):
+        entries = index['entries']
+        total = sum(e['size'] for e in entries.values())
+        by_age = sorted(entries.items(), key=lambda item: item[1]['last_used'])
+        while by_age and (total > self.max_bytes or len(entries) > self.max_entries):
+            key, entry = by_age.pop(0)
+            del entries[key]
+            total -= entry['size']
+            try:
+                (self.entries_dir / f"{key}.json").unlink()
+            except FileNotFoundError:
+                pass
+            index['stats']['evictions'] = index['stats'].get('evictions', 0) + 1
+
+    def _record_stat(self, name: str, amount: float = 1):
+        def mutate(index):
+            index['stats'][name] = index['stats'].get(name, 0) + amount
+        self._update_index(mutate)
+
+    # Diffs
+
+    @staticmethod
+    def _diff(cwd: Path, before: Dict[str, str], after: Dict[str, str]) -> Dict:
+        changed = {}
+        for rel, digest in after.items():
+            if before.get(rel) != digest:
+                changed[rel] = base64.b64encode((cwd / rel).read_bytes()).decode()
+        deleted = [rel for rel in before if rel not in after]
+        return {'changed': changed, 'deleted': deleted}
+
+    @staticmethod
+    def _apply_diff(cwd: Path, diff: Dict):
+        for rel, content in diff['changed'].items():
+            path = cwd / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(base64.b64decode(content))
+        for rel in diff['deleted']:
+            try:
+                (cwd / rel).unlink()
+            except FileNotFoundError:
+                pass
+
+    # Query
+
+    async def query(self, prompt: str, options, query_fn=None) -> AsyncIterator:
+        """Cached drop-in for query_fn(prompt=..., options=...)"""
+        if query_fn is None:
+            from claude_code_sdk import query as query_fn
+
+        cwd = Path(getattr(options, 'cwd', None) or os.getcwd())
+        before = await asyncio.to_thread(self._scan_tree, cwd)
+        key = self.key_for(prompt, options, before)
+        entry_file = self.entries_dir / f"{key}.json"
+
+        entry = read_json(entry_file)
+        if entry is not None:
+            await asyncio.to_thread(self._apply_diff, cwd, entry['diff'])
+
+            def record_hit(index):
+                index['stats']['hits'] = index['stats'].get('hits', 0) + 1
+                index['stats']['cost_saved_usd'] = index['stats'].get('cost_saved_usd', 0) + (entry.get('cost') or 0)
+                if key in index['entries']:
+                    index['entries'][key]['last_used'] = time.time()
+            self._update_index(record_hit)
+            for message in entry['messages']:
+                yield _replayed(_decode(message))
+            return
+
+        self._record_stat('misses')
+        recorded = []
+        cost = 0.0
+        succeeded = False
+        async for message in query_fn(prompt=prompt, options=options):
+            recorded.append(_encode(message))
+            if hasattr(message, 'total_cost_usd'):
+                cost = message.total_cost_usd or 0.0
+                succeeded = not getattr(message, 'is_error', False)
+            yield message
+
+        if not succeeded:
+            return
+
+        after = await asyncio.to_thread(self._scan_tree, cwd)
+        entry = {
+            'prompt': prompt[:200],
+            'created_at': time.time(),
+            'cost': cost,
+            'messages': recorded,
+            'diff': await asyncio.to_thread(self._diff, cwd, before, after),
+        }
+        atomic_write_json(entry_file, entry)
+        size = entry_file.stat().st_size
+
+        def mutate(index):
+            index['entries'][key] = {'size': size, 'last_used': time.time(), 'cost': cost}
+        self._update_index(mutate)
+
+    # Reporting
+
+    def report(self) -> Dict:
+        index = read_json(self.index_file, {'entries': {}, 'stats': {}})
+        stats = index['stats']
+        hits = stats.get('hits', 0)
+        misses = stats.get('misses', 0)
+        return {
+            'entries': len(index['entries']),
+            'size_bytes': sum(e['size'] for e in index['entries'].values()),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'cost_saved_usd': round(stats.get('cost_saved_usd', 0.0), 4),
+            'evictions': stats.get('evictions', 0),
+        }
+
+    def clear(self):
+        with locked_file(self.index_file):
+            for entry_file in self.entries_dir.glob('*.json'):
+                entry_file.unlink()
+            atomic_write_json(self.index_file, {'entries': {}, 'stats': {}})
+
+
+def cache_from_env() -> Optional[QueryCache]:
+    """QueryCache if CLAUDE_QUERY_CACHE is set (1 or a directory), else None"""
+    setting = os.environ.get('CLAUDE_QUERY_CACHE')
+    if not setting or setting == '0':
+        return None
+    cache_dir = None if setting == '1' else Path(setting)
+    max_mb = int(os.environ.get('CLAUDE_QUERY_CACHE_MAX_MB', 512))
+    return QueryCache(cache_dir, max_bytes=max_mb * 1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect the Claude query result cache')
+    parser.add_argument('command', choices=['report', 'clear'])
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    cache = QueryCache(args.cache_dir)
+    if args.command == 'clear':
+        cache.clear()
+        print(f"Cleared {args.cache_dir}")
+        return
+
+    report = cache.report()
+    print(f"Entries:    {report['entries']} ({report['size_bytes'] / 1024 / 1024:.1f} MB)")
+    print(f"Hits:       {report['hits']}")
+    print(f"Misses:     {report['misses']}")
+    print(f"Hit rate:   {report['hit_rate'] * 100:.1f}%")
+    print(f"Cost saved: ${report['cost_saved_usd']:.4f}")
+    print(f"Evictions:  {report['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Shared scheduler for claude_code_sdk.query runs.
+
+Every query spawns a Claude CLI subprocess, so the web backend and the
+automation scripts route their runs through a QueryScheduler:
+
+- at most max_concurrent runs execute at once per process, and optionally
+  at most host_slots across all processes on the machine (fcntl lock files
+  in slot_dir)
+- waiting runs are queued per project and served round-robin, so one busy
+  project cannot starve the others; projects given a higher priority are
+  served first
+- once max_queue_depth runs are waiting, new runs are rejected with
+  QueueFullError carrying a Retry-After estimate
+- a waiting or running query that is cancelled (e.g. the HTTP client went
+  away) leaves the queue / frees its slot immediately
+- queue wait times are recorded and exposed through stats()
+"""
+
+import asyncio
+import fcntl
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Deque, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue is at max_queue_depth"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Query queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class QueryScheduler:
+    """Bounded, fair queue in front of claude_code_sdk.query"""
+
+    def __init__(self, max_concurrent: int = 4, max_queue_depth: int = 32,
+                 slot_dir: Optional[Path] = None, host_slots: Optional[int] = None,
+                 history_size: int = 500):
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self.slot_dir = Path(slot_dir) if slot_dir else None
+        self.host_slots = host_slots or max_concurrent
+
+        self.running = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        self._priorities: Dict[str, int] = {}
+
+        self._wait_times: Deque[float] = deque(maxlen=history_size)
+        self._run_times: Deque[float] = deque(maxlen=history_size)
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    # Admission
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> int:
+        """Rough seconds until a new run would get a slot"""
+        average_run = (sum(self._run_times) / len(self._run_times)) if self._run_times else 30.0
+        waves = (self._queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(waves * average_run))
+
+    def check_admission(self):
+        """Raise QueueFullError if a new run would be rejected right now"""
+        if self.running >= self.max_concurrent and self._queued >= self.max_queue_depth:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+    # Slots
+
+    def set_priority(self, project: str, priority: int):
+        """Serve project's waiters before those of lower-priority projects"""
+        self._priorities[project] = priority
+
+    def _wake_next(self):
+        """Hand a free slot to the next waiter, rotating across projects"""
+        while self.running < self.max_concurrent and self._queues:
+            # max() keeps the first of equal priorities, so ties stay round-robin
+            project = max(self._queues, key=lambda p: self._priorities.get(p, 0))
+            waiters = self._queues[project]
+            waiter = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                self._queues.move_to_end(project)
+            else:
+                del self._queues[project]
+            if waiter.done():
+                continue
+            self.running += 1
+            waiter.set_result(None)
+
+    def _release(self):
+        self.running -= 1
+        self._wake_next()
+
+    async def _acquire_local(self, project: str):
+        if self.running < self.max_concurrent and not self._queues:
+            self.running += 1
+            return
+
+        self.check_admission()
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(project, deque()).append(waiter)
+        self._queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # We were handed a slot just as we were cancelled
+                self._release()
+            else:
+                waiters = self._queues.get(project)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                    self._queued -= 1
+                    if not waiters:
+                        del self._queues[project]
+            self.cancelled += 1
+            raise
+
+    async def _acquire_host_slot(self):
+        """Take one of host_slots lock files shared by every process on the machine"""
+        if self.slot_dir is None:
+            return None
+        self.slot_dir.mkdir(parents=True, exist_ok=True)
+        delay = 0.05
+        while True:
+            for index in range(self.host_slots):
+                handle = open(self.slot_dir / f"slot-{index}.lock", 'a')
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return handle
+                except BlockingIOError:
+                    handle.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    @asynccontextmanager
+    async def slot(self, project: str = 'default', priority: Optional[int] = None):
+        """Hold a run slot for project for the duration of the block"""
+        if priority is not None:
+            self.set_priority(project, priority)
+        enqueued_at = time.monotonic()
+        await self._acquire_local(project)
+        host_slot = None
+        try:
+            host_slot = await self._acquire_host_slot()
+            started_at = time.monotonic()
+            self._wait_times.append(started_at - enqueued_at)
+            yield
+            self.completed += 1
+            self._run_times.append(time.monotonic() - started_at)
+        finally:
+            if host_slot is not None:
+                fcntl.flock(host_slot, fcntl.LOCK_UN)
+                host_slot.close()
+            self._release()
+
+    async def query(self, prompt: str, options=None, project: str = 'default', query_fn=None,
+                    priority: Optional[int] = None) -> AsyncIterator:
+        """Scheduled drop-in for claude_code_sdk.query(prompt=..., options=...)"""
+        if query_fn is None:
+            from claude_code_sdk import query as query_fn
+
+        async with self.slot(project, priority):
+            async for message in query_fn(prompt=prompt, options=options):
+                yield message
+
+    # Metrics
+
+    def stats(self) -> Dict:
+        waits = sorted(self._wait_times)
+
+        def pct(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(round(p / 100 * (len(waits) - 1))))], 3)
+
+        return {
+            'running': self.running,
+            'queued': self._queued,
+            'queued_by_project': {project: len(w) for project, w in self._queues.items()},
+            'max_concurrent': self.max_concurrent,
+            'max_queue_depth': self.max_queue_depth,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'cancelled': self.cancelled,
+            'queue_wait_p50_s': pct(50),
+            'queue_wait_p95_s': pct(95),
+            'queue_wait_max_s': round(waits[-1], 3) if waits else 0.0,
+        }
+
+
+_default_scheduler: Optional[QueryScheduler] = None
+
+
+def get_scheduler() -> QueryScheduler:
+    """Process-wide scheduler configured from the environment
+
+    CLAUDE_MAX_CONCURRENT_QUERIES  runs per process (default 4)
+    CLAUDE_MAX_QUEUE_DEPTH         waiting runs before rejecting (default 32)
+    CLAUDE_QUERY_SLOT_DIR          enables the machine-wide cap via lock files
+    CLAUDE_HOST_QUERY_SLOTS        machine-wide cap (default: per-process cap)
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        host_slots = os.environ.get('CLAUDE_HOST_QUERY_SLOTS')
+        _default_scheduler = QueryScheduler(
+            max_concurrent=int(os.environ.get('CLAUDE_MAX_CONCURRENT_QUERIES', 4)),
+            max_queue_depth=int(os.environ.get('CLAUDE_MAX_QUEUE_DEPTH', 32)),
+            slot_dir=os.environ.get('CLAUDE_QUERY_SLOT_DIR') or None,
+            host_slots=int(host_slots) if host_slots else None,
+        )
+    return _default_scheduler
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Failure classification and retry timing for long-running build loops.
+
+Errors are sorted into three kinds:
+
+- transient: network blips, timeouts, a git fetch/push that could not reach
+  the remote, a Claude CLI connection failure; retried quickly with
+  exponential backoff and full jitter
+- rate_limited: API rate limits and overload, a full query queue; retried
+  after the server's Retry-After hint when there is one, otherwise with a
+  slower backoff
+- permanent: only failures known to repeat for the same specs, raised as
+  PermanentError (a build query that ends in an error result) or a
+  ValueError (an invalid spec); counted per spec hash by a CircuitBreaker,
+  which stops rebuilding that hash after a few failures until the specs
+  change
+
+Anything unrecognised, such as a git push or fetch that failed or a
+subprocess that exited non-zero, is treated as transient: wrongly retrying
+costs a backoff, but wrongly giving up would leave a built hash unpushed.
+"""
+
+import asyncio
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+TRANSIENT = "transient"
+RATE_LIMITED = "rate_limited"
+PERMANENT = "permanent"
+
+RATE_LIMIT_PATTERN = re.compile(r"rate.?limit|too many requests|overloaded|\b(429|529)\b", re.IGNORECASE)
+TRANSIENT_PATTERN = re.compile(
+    r"could not resolve host|connection (reset|refused|timed out)|timed out|unable to access|"
+    r"early eof|remote end hung up|temporary failure|network is unreachable|bad gateway|"
+    r"service unavailable|\b(502|503|504)\b", re.IGNORECASE)
+TRANSIENT_TYPES = ("CLIConnectionError", "CLINotFoundError")
+
+RETRY_AFTER = re.compile(r"retry[- _]after\D{0,5}(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+class PermanentError(Exception):
+    """A failure that will repeat for the same specs, e.g. a build the agent can't finish"""
+
+
+@dataclass
+class Failure:
+    kind: str
+    retry_after: Optional[float] = None
+
+
+def retry_after_hint(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from a retry_after attribute or the message"""
+    hint = getattr(error, "retry_after", None)
+    if hint is not None:
+        return float(hint)
+    match = RETRY_AFTER.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def classify(error: BaseException) -> Failure:
+    """Kind of failure and any Retry-After hint it carries"""
+    message = f"{error} {getattr(error, 'stderr', '') or ''}"
+    hint = retry_after_hint(error)
+    if type(error).__name__ == "QueueFullError" or RATE_LIMIT_PATTERN.search(message):
+        return Failure(RATE_LIMITED, hint)
+    if (isinstance(error, (asyncio.TimeoutError, ConnectionError))
+            or type(error).__name__ in TRANSIENT_TYPES
+            or TRANSIENT_PATTERN.search(message)):
+        return Failure(TRANSIENT, hint)
+    if isinstance(error, (PermanentError, ValueError)):
+        return Failure(PERMANENT)
+    return Failure(TRANSIENT, hint)
+
+
+class RetryPolicy:
+    """Delay before the next attempt, by failure kind and consecutive attempt number"""
+
+    def __init__(self, base_delay: float = 5.0, max_delay: float = 900.0,
+                 rate_limit_delay: float = 60.0, rng: Callable[[], float] = random.random):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limit_delay = rate_limit_delay
+        self.rng = rng
+
+    def backoff(self, base: float, attempt: int) -> float:
+        """Full jitter: uniform between 0 and base * 2**attempt, capped at max_delay"""
+        return self.rng() * min(self.max_delay, base * 2 ** attempt)
+
+    def delay(self, failure: Failure, attempt: int) -> float:
+        if failure.retry_after is not None:
+            # Honour the hint; a little jitter keeps many waiters from retrying in lockstep
+            return min(self.max_delay, failure.retry_after * (1 + 0.1 * self.rng()))
+        if failure.kind == RATE_LIMITED:
+            return max(self.rate_limit_delay, self.backoff(self.rate_limit_delay, attempt))
+        return max(1.0, self.backoff(self.base_delay, attempt))
+
+
+class CircuitBreaker:
+    """Permanent-failure counts per spec hash, kept in a caller-owned dict
+
+    The dict is meant to live in persisted state, so a restarted builder
+    still knows which spec hashes are broken.
+    """
+
+    def __init__(self, failures: Dict[str, Dict], threshold: int = 3):
+        self.failures = failures
+        self.threshold = threshold
+
+    def record(self, spec_hash: str, error: BaseException) -> bool:
+        """Count a permanent failure; True when it opened the breaker"""
+        entry = self.failures.setdefault(spec_hash, {"count": 0})
+        entry.update(count=entry["count"] + 1, last_error=str(error),
+                     last_failure=datetime.now().isoformat())
+        return entry["count"] == self.threshold
+
+    def is_open(self, spec_hash: str) -> bool:
+        return self.failures.get(spec_hash, {}).get("count", 0) >= self.threshold
+
+    def reset(self, spec_hash: Optional[str] = None):
+        """Forget spec_hash's failures, or all of them"""
+        if spec_hash is None:
+            self.failures.clear()
+        else:
+            self.failures.pop(spec_hash, None)
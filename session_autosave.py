@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Crash-safe autosave of the live CLI session.
+
+Each message is appended to a write-ahead log (sessions/<file>.wal) as it
+arrives, one JSON line per record, so saving a message is an O(1) append
+instead of a rewrite. The log is fsynced in batches: once fsync_batch
+records are pending, or by a timer fsync_interval seconds after the first
+unsynced record, whichever comes first. Appends never wait for the disk.
+
+Every compact_every messages the log is compacted: the new messages are
+appended to the session's JSONL file and the log is truncated. Only
+checkpoint() (on /session save, and on exit if the user agrees) adds the
+session to the projects.json index; discard() instead rolls the session
+file back to what was last saved. A log left behind by a CLI that crashed is replayed
+into the store by recover(), whichever project it belongs to: the log
+header names the project and its path. Message records are numbered, so
+messages that already reached the session file before the crash are not
+added twice. A saved session that is loaded again continues in its own file
+(resume) instead of being copied into a new one.
+
+A live log is held under an exclusive flock, so recover() never touches the
+session of another running CLI.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from json_store import append_jsonl, read_jsonl
+
+
+WAL_SUFFIX = '.wal'
+
+
+def session_entry(file_name: str, timestamp: str, message_count: int,
+                  session_id: Optional[str], cost: float) -> Dict[str, Any]:
+    """Index entry of a session stored in its own file"""
+    return {
+        'timestamp': timestamp,
+        'file': file_name,
+        'message_count': message_count,
+        'session_id': session_id,
+        'cost': cost
+    }
+
+
+class SessionAutosave:
+    """Write-ahead log of one live session, compacted into the project's session store"""
+
+    def __init__(self, manager, project, file_name: str, fsync_interval: float = 1.0,
+                 fsync_batch: int = 16, compact_every: int = 50, resume: Optional[Dict] = None):
+        """resume is the index entry of a saved session to continue, if any"""
+        self.manager = manager
+        self.project = project
+        self.file_name = file_name
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.compact_every = compact_every
+        self.session_file = manager.sessions_dir / file_name
+        self.wal_path = manager.sessions_dir / (file_name + WAL_SUFFIX)
+        self.timestamp = datetime.now().isoformat()
+        self.session_id: Optional[str] = None
+        self.cost = 0.0
+        self.count = 0              # messages logged
+        self.compacted = 0          # messages already in the session file
+        self.saved = 0              # messages in the project index
+        self._uncompacted: List[Dict] = []
+        self._unsynced = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        if resume is not None:
+            # Continue after the messages already in the session file
+            self.timestamp = resume.get('timestamp', self.timestamp)
+            self.session_id = resume.get('session_id')
+            self.cost = resume.get('cost', 0.0)
+            self.count = self.compacted = self.saved = resume.get('message_count', 0)
+
+        manager.sessions_dir.mkdir(parents=True, exist_ok=True)
+        self._wal = open(self.wal_path, 'ab')
+        fcntl.flock(self._wal, fcntl.LOCK_EX)
+        self._write_header()
+
+    def _write_header(self):
+        self._append({'type': 'session', 'project': self.project.name, 'path': str(self.project.path),
+                      'file': self.file_name, 'timestamp': self.timestamp,
+                      'session_id': self.session_id, 'cost': self.cost})
+
+    def _append(self, record: Dict):
+        self._wal.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+        self._unsynced += 1
+        self._schedule_sync()
+
+    def record(self, message: Dict):
+        """Log one message; compacts every compact_every messages"""
+        self._append({'type': 'message', 'seq': self.count, 'message': message})
+        self._uncompacted.append(message)
+        self.count += 1
+        if self.count - self.compacted >= self.compact_every:
+            self.compact()
+
+    def update(self, session_id: Optional[str] = None, cost: Optional[float] = None):
+        """Log the SDK session id and running cost"""
+        if session_id is not None:
+            self.session_id = session_id
+        if cost is not None:
+            self.cost = cost
+        self._append({'type': 'meta', 'session_id': self.session_id, 'cost': self.cost})
+
+    def _schedule_sync(self):
+        """fsync now if the batch is full, otherwise once the interval has passed"""
+        if self._unsynced >= self.fsync_batch:
+            self.sync()
+            return
+        if self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.sync()  # no loop to run the timer on
+                return
+            self._timer = loop.call_later(self.fsync_interval, self.sync)
+
+    def sync(self):
+        """Make every logged record durable"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._unsynced and not self._wal.closed:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._unsynced = 0
+
+    def compact(self):
+        """Move logged messages into the session file and start the log over"""
+        self.sync()
+        if self._uncompacted:
+            append_jsonl(self.session_file, self._uncompacted)
+            self._uncompacted = []
+        self.compacted = self.count
+        self._wal.seek(0)
+        self._wal.truncate()
+        self._write_header()
+        self.sync()
+
+    def checkpoint(self):
+        """Compact the log and save the session in the project index"""
+        self.compact()
+        if not self.count:
+            return  # no empty sessions in the index
+        self.project.update_session_entry(session_entry(self.file_name, self.timestamp, self.count,
+                                                        self.session_id, self.cost))
+        self.manager.save_projects()
+        self.saved = self.count
+
+    def close(self):
+        """Save the session, then remove the log"""
+        self.checkpoint()
+        self.wal_path.unlink(missing_ok=True)
+        self._wal.close()
+
+    def discard(self):
+        """Drop everything since the last save, then remove the log"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.compacted > self.saved:
+            if self.saved:
+                kept = read_jsonl(self.session_file)[:self.saved]
+                tmp_path = self.session_file.with_name(self.session_file.name + '.tmp')
+                append_jsonl(tmp_path, kept)
+                os.replace(tmp_path, self.session_file)
+            else:
+                self.session_file.unlink(missing_ok=True)
+        self.wal_path.unlink(missing_ok=True)
+        self._wal.close()
+
+
+def _project_for(manager, header: Dict):
+    """The project a log belongs to: by name, or by path if it was renamed since"""
+    project = manager.projects.get(header.get('project'))
+    if project is not None and header.get('path') in (None, str(project.path)):
+        return project
+    matches = [p for p in manager.projects.values() if str(p.path) == header.get('path')]
+    return matches[0] if len(matches) == 1 else None
+
+
+def recover(manager) -> List[Tuple[Any, Dict]]:
+    """Replay logs left by crashed CLIs into the session store of their projects
+
+    Returns (project, index entry) for each recovered session. Logs of
+    projects that no longer exist are left alone.
+    """
+    recovered = []
+    if not manager.sessions_dir.exists():
+        return recovered
+    for wal_path in sorted(manager.sessions_dir.glob('*' + WAL_SUFFIX)):
+        with open(wal_path, 'rb') as wal:
+            try:
+                fcntl.flock(wal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # a running CLI is still writing it
+            records = read_jsonl(wal_path)
+            if not records or records[0].get('type') != 'session':
+                wal_path.unlink(missing_ok=True)  # torn before its header; holds nothing
+                continue
+            header = records[0]
+            project = _project_for(manager, header)
+            if project is None or project.is_temp:
+                continue
+
+            session_id, cost = header.get('session_id'), header.get('cost', 0)
+            messages = []
+            for record in records[1:]:
+                if record.get('type') == 'meta':
+                    session_id, cost = record.get('session_id'), record.get('cost', 0)
+                elif record.get('type') == 'message':
+                    messages.append(record)
+
+            session_file = manager.sessions_dir / header['file']
+            stored = len(read_jsonl(session_file)) if session_file.exists() else 0
+            missing = [record['message'] for record in messages if record['seq'] >= stored]
+            if missing:
+                append_jsonl(session_file, missing)
+            count = stored + len(missing)
+            if count:
+                entry = session_entry(header['file'], header['timestamp'], count, session_id, cost)
+                project.update_session_entry(entry)
+                manager.save_projects()
+                recovered.append((project, entry))
+            wal_path.unlink(missing_ok=True)
+    return recovered
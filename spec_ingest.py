@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Spec ingestion for build prompts.
+
+Spec files are streamed line by line and split into chunks at markdown
+headings; JSON specs are re-serialized compactly. Chunks are then packed into
+a prompt under a token budget. Chunks that don't fit, or that the agent has
+already seen (same content hash as in the previous build), are listed by
+path and line range instead, so the agent can read them on demand.
+
+Usage:
+    python spec_ingest.py SPECS_DIR [--budget TOKENS]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set
+
+
+DEFAULT_TOKEN_BUDGET = 50000
+SPEC_SUFFIXES = (".md", ".json")
+# ATX heading: one to six #s followed by a space (or nothing), e.g. "## Storage"
+HEADING = re.compile(r"#{1,6}(?:[ \t]+(.*?))?[ \t#]*$")
+FENCE = re.compile(r"\s{0,3}(`{3,}|~{3,})")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def token_budget_from_env(default: int = DEFAULT_TOKEN_BUDGET) -> int:
+    return int(os.environ.get("CLAUDE_SPEC_TOKEN_BUDGET", default))
+
+
+@dataclass
+class Chunk:
+    path: str
+    heading: str
+    text: str
+    start_line: int
+    end_line: int
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.text.encode()).hexdigest()
+
+
+def references(chunks: List[Chunk]) -> List[str]:
+    """One line per run of adjacent chunks from the same file"""
+    lines = []
+    run: List[Chunk] = []
+    for chunk in chunks + [None]:
+        if run and (chunk is None or chunk.path != run[-1].path or chunk.start_line != run[-1].end_line + 1):
+            headings = [c.heading for c in run[:3]]
+            if len(run) > 3:
+                headings.append(f"+{len(run) - 3} more sections")
+            lines.append(f"- {run[0].path} lines {run[0].start_line}-{run[-1].end_line}: {', '.join(headings)}")
+            run = []
+        if chunk is not None:
+            run.append(chunk)
+    return lines
+
+
+def compact_json(text: str) -> str:
+    return json.dumps(json.loads(text), separators=(",", ":"), ensure_ascii=False)
+
+
+def chunk_lines(lines: Iterable[str], path: str, first_line: int = 1) -> Iterator[Chunk]:
+    """Split markdown lines into chunks, one per heading section
+
+    Lines inside fenced code blocks are never headings.
+    """
+    heading = Path(path).name
+    buffer: List[str] = []
+    start = first_line
+    fence = None
+    line_no = first_line - 1
+    for line_no, line in enumerate(lines, first_line):
+        match = None
+        if fence is not None:
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                fence = None
+        else:
+            opened = FENCE.match(line)
+            if opened:
+                fence = opened.group(1)
+            else:
+                match = HEADING.match(line.rstrip("\r\n"))
+        if match:
+            if buffer and any(l.strip() for l in buffer):
+                yield Chunk(path, heading, "".join(buffer), start, line_no - 1)
+                buffer, start = [], line_no
+            heading = match.group(1) or heading
+        buffer.append(line)
+    if any(l.strip() for l in buffer):
+        yield Chunk(path, heading, "".join(buffer), start, line_no)
+
+
+def chunk_file(path: Path, display_path: Optional[str] = None) -> Iterator[Chunk]:
+    """Chunks of one spec file; JSON specs are a single compact chunk"""
+    display_path = display_path or str(path)
+    if path.suffix == ".json":
+        with open(path) as f:
+            raw = f.read()
+        yield Chunk(display_path, path.name, compact_json(raw), 1, raw.count("\n") + 1)
+        return
+    with open(path) as f:
+        yield from chunk_lines(f, display_path)
+
+
+def chunk_text(text: str, path: str, first_line: int = 1) -> List[Chunk]:
+    """Chunks of spec content already in memory (e.g. an older git blob)"""
+    if path.endswith(".json"):
+        try:
+            text = compact_json(text)
+        except ValueError:
+            pass
+        return [Chunk(path, Path(path).name, text, 1, 1)]
+    return list(chunk_lines(text.splitlines(keepends=True), path, first_line))
+
+
+def pack(chunks: Iterable[Chunk], budget: int, known: Optional[Set[str]] = None) -> str:
+    """Inline chunks in order until the budget is spent; reference the rest
+
+    Chunks whose digest is in known are always referenced, never inlined.
+    """
+    known = known or set()
+    inlined, referenced = [], []
+    used = 0
+    current_path = None
+    for chunk in chunks:
+        if chunk.digest in known or used + chunk.tokens > budget:
+            referenced.append(chunk)
+            continue
+        if chunk.path != current_path:
+            inlined.append(f"=== {chunk.path} ===")
+            current_path = chunk.path
+        inlined.append(chunk.text.rstrip("\n"))
+        used += chunk.tokens
+
+    parts = ["\n".join(inlined)] if inlined else []
+    if referenced:
+        parts.append("Further specification sections (unchanged or over the prompt budget); "
+                     "read them from disk when needed:\n" + "\n".join(references(referenced)))
+    return "\n\n".join(parts)
+
+
+class SpecIngestor:
+    """Token-budgeted prompt assembly for a directory of spec files"""
+
+    def __init__(self, specs_dir: Path, budget: Optional[int] = None):
+        self.specs_dir = Path(specs_dir)
+        self.budget = budget or token_budget_from_env()
+
+    def spec_files(self) -> List[str]:
+        files = set()
+        for suffix in SPEC_SUFFIXES:
+            for spec_file in self.specs_dir.rglob(f"*{suffix}"):
+                rel = spec_file.relative_to(self.specs_dir)
+                if rel.parts[0] != ".git":
+                    files.add(rel.as_posix())
+        return sorted(files)
+
+    def chunks(self, rel_paths: Iterable[str]) -> Iterator[Chunk]:
+        # Absolute paths, so the agent can open referenced sections from any cwd
+        for rel in rel_paths:
+            spec_file = self.specs_dir / rel
+            yield from chunk_file(spec_file, str(spec_file))
+
+    def assemble(self, rel_paths: Optional[Iterable[str]] = None, known: Optional[Set[str]] = None,
+                 budget: Optional[int] = None) -> str:
+        """Prompt text for rel_paths (all specs by default)"""
+        if rel_paths is None:
+            rel_paths = self.spec_files()
+        return pack(self.chunks(rel_paths), budget or self.budget, known)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show how spec files are chunked and packed into a prompt')
+    parser.add_argument('specs_dir', type=Path)
+    parser.add_argument('--budget', type=int, default=None, help='Prompt token budget')
+    args = parser.parse_args()
+
+    ingestor = SpecIngestor(args.specs_dir, args.budget)
+    chunks = list(ingestor.chunks(ingestor.spec_files()))
+    prompt = pack(chunks, ingestor.budget)
+    total = sum(c.tokens for c in chunks)
+    print(f"{len(chunks)} chunks, ~{total} tokens of specs; packed prompt ~{estimate_tokens(prompt)} tokens "
+          f"(budget {ingestor.budget})")
+
+
+if __name__ == "__main__":
+    main()
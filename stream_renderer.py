@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Incremental terminal renderer for streamed assistant text.
+
+Text is fed in as it arrives. Complete lines are styled as markdown (code
+fences and their contents, headings, bullet and numbered lists, quotes,
+inline `code` and **bold**) and buffered; the buffer is written in one
+write at most fps times per second instead of flushing every block. A
+trailing partial line is shown at the next frame and continued in the same
+style when the rest of it arrives. The raw text is accumulated in a
+StringIO, so long responses don't build strings by repeated concatenation.
+"""
+
+import asyncio
+import io
+import re
+import sys
+import time
+from typing import List, Optional, TextIO, Tuple
+
+from ui_theme import Colors, Icons
+
+
+FENCE = re.compile(r'^\s*(```|~~~)')
+HEADING = re.compile(r'^#{1,6}\s')
+BULLET = re.compile(r'^(\s*)[-*+](\s+)')
+NUMBERED = re.compile(r'^(\s*)(\d+[.)])(\s+)')
+QUOTE = re.compile(r'^\s*>')
+INLINE = re.compile(r'`[^`\n]+`|\*\*[^*\n]+\*\*')
+# A partial line that could still turn out to be a fence, heading or list item
+MARKER_PREFIX = re.compile(r'\s*(`{1,3}|~{1,3}|#{1,6}|[-*+>]|\d+[.)]?)?')
+
+
+class StreamRenderer:
+    """Buffered, frame-rate limited markdown rendering of a streamed response"""
+
+    def __init__(self, stream: Optional[TextIO] = None, fps: float = 30.0):
+        self.stream = stream or sys.stdout
+        self.frame_interval = 1.0 / fps
+        self.writes = 0
+        self._text = io.StringIO()
+        self._pending = ''                 # partial line, not rendered yet
+        self._out: List[str] = []          # rendered output not written yet
+        self._in_code = False
+        self._line_style: Optional[str] = None  # style of a line whose start is already out
+        self._last_write = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far, unstyled"""
+        return self._text.getvalue()
+
+    def feed(self, text: str):
+        self._text.write(text)
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._out.append(self._render(line)[1] + '\n')
+        self._schedule()
+
+    def flush(self):
+        """Write everything buffered now, including a partial line"""
+        self._write(hold_markers=False)
+
+    def _write(self, hold_markers: bool = True):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending and not (hold_markers and MARKER_PREFIX.fullmatch(self._pending)):
+            style, rendered = self._render(self._pending)
+            self._out.append(rendered)
+            self._line_style = style
+            self._pending = ''
+        if self._out:
+            self.stream.write(''.join(self._out))
+            self.stream.flush()
+            self._out.clear()
+            self.writes += 1
+        self._last_write = time.monotonic()
+
+    def finish(self) -> str:
+        """Flush and reset the markdown state for the next response; returns the full text"""
+        self.flush()
+        self._in_code = False
+        self._line_style = None
+        text = self.text
+        self._text = io.StringIO()
+        return text
+
+    def _schedule(self):
+        """Flush now if a frame is due, otherwise once at the next frame"""
+        if not (self._out or self._pending):
+            return
+        now = time.monotonic()
+        due = self._last_write + self.frame_interval
+        if now >= due:
+            self._write()
+            return
+        if self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._write()
+                return
+            self._timer = loop.call_later(due - now, self._write)
+
+    # Markdown
+
+    @staticmethod
+    def _inline(text: str, base: str = '') -> str:
+        def style(match):
+            code = match.group(0).startswith('`')
+            return f"{Colors.ACCENT if code else Colors.BOLD}{match.group(0)}{Colors.RESET}{base}"
+        return INLINE.sub(style, text)
+
+    def _styled(self, style: str, text: str) -> str:
+        if style in ('fence', 'quote'):
+            return f"{Colors.MUTED}{text}{Colors.RESET}"
+        if style == 'code':
+            return f"{Colors.ACCENT}{text}{Colors.RESET}"
+        if style == 'heading':
+            base = f"{Colors.PRIMARY}{Colors.BOLD}"
+            return f"{base}{self._inline(text, base)}{Colors.RESET}"
+        return self._inline(text)
+
+    def _render(self, line: str) -> Tuple[str, str]:
+        """(style, rendered text) of a line, or of the rest of a line already started"""
+        if self._line_style is not None:
+            style, self._line_style = self._line_style, None
+            return style, self._styled(style, line)
+
+        if FENCE.match(line):
+            self._in_code = not self._in_code
+            return 'fence', self._styled('fence', line)
+        if self._in_code:
+            return 'code', self._styled('code', line)
+        if HEADING.match(line):
+            return 'heading', self._styled('heading', line)
+        if QUOTE.match(line):
+            return 'quote', self._styled('quote', line)
+
+        bullet = BULLET.match(line)
+        if bullet:
+            marker = f"{bullet.group(1)}{Colors.PRIMARY}{Icons.BULLET}{Colors.RESET}{bullet.group(2)}"
+            return 'plain', marker + self._inline(line[bullet.end():])
+        numbered = NUMBERED.match(line)
+        if numbered:
+            marker = f"{numbered.group(1)}{Colors.PRIMARY}{numbered.group(2)}{Colors.RESET}{numbered.group(3)}"
+            return 'plain', marker + self._inline(line[numbered.end():])
+        return 'plain', self._inline(line)
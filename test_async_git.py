@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Test the asyncio git layer: shallow clones, batched commits, timeouts"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import async_git
+
+for var, value in (("GIT_AUTHOR_NAME", "test"), ("GIT_AUTHOR_EMAIL", "test@example.com"),
+                   ("GIT_COMMITTER_NAME", "test"), ("GIT_COMMITTER_EMAIL", "test@example.com")):
+    os.environ.setdefault(var, value)
+
+
+def make_origin(tmp, commits=3):
+    work = tmp / "work"
+    subprocess.run(["git", "init", "-q", "-b", "main", str(work)], check=True)
+    for i in range(commits):
+        (work / "spec.md").write_text(f"# Spec v{i}")
+        subprocess.run(["git", "add", "."], cwd=work, check=True)
+        subprocess.run(["git", "commit", "-q", "-m", f"v{i}"], cwd=work, check=True)
+    return work
+
+
+def test_shallow_clone_commit_and_push():
+    """Shallow clone, commit only when something changed, push, ls-remote sees it"""
+    async def scenario(tmp):
+        origin = make_origin(tmp)
+        bare = tmp / "origin.git"
+        await async_git.git(None, "clone", "-q", "--bare", str(origin), str(bare))
+
+        clone = tmp / "clone"
+        await async_git.clone(f"file://{bare}", clone, depth=1)
+        history = await async_git.git(clone, "rev-list", "--count", "HEAD")
+
+        nothing = await async_git.commit_all(clone, "empty")
+        (clone / "generated.py").write_text("print('hi')")
+        (clone / "spec.md").write_text("# Spec edited")
+        committed = await async_git.commit_all(clone, "build")
+        await async_git.push(clone)
+        return history, nothing, committed, await async_git.remote_head(clone), await async_git.rev_parse(clone)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history, nothing, committed, remote, local = asyncio.run(scenario(Path(tmp)))
+    print(f"✓ Shallow clone has {history} commit(s)")
+    assert history == "1"
+    assert nothing is False and committed is True
+    assert remote == local
+    print("✓ Empty commit skipped; new files and edits committed in one batch and pushed")
+
+
+def test_shallow_clone_pulls_new_upstream_commits():
+    """A depth-limited pull follows upstream without fast-forwarding across missing history"""
+    async def scenario(tmp):
+        origin = make_origin(tmp)
+        clone = tmp / "clone"
+        await async_git.clone(f"file://{origin}", clone, depth=1)
+        for i in (3, 4):
+            (origin / "spec.md").write_text(f"# Spec v{i}")
+            await async_git.git(origin, "commit", "-q", "-am", f"v{i}")
+            await async_git.pull(clone, depth=1)
+        history = await async_git.git(clone, "rev-list", "--count", "HEAD")
+        return (await async_git.rev_parse(clone), await async_git.rev_parse(origin),
+                (clone / "spec.md").read_text(), history)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        local, upstream, spec, history = asyncio.run(scenario(Path(tmp)))
+    assert local == upstream and spec == "# Spec v4" and history == "1"
+    print("✓ Shallow clone pulled two new upstream commits and stayed shallow")
+
+
+def test_timeout_kills_command_without_blocking_loop():
+    """A hung command is killed at the timeout while other tasks keep running"""
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        # A shell alias stands in for a fetch from an unresponsive remote
+        hung = async_git.git(".", "-c", "alias.hang=!sleep 5", "hang", timeout=0.3)
+        results = await asyncio.gather(hung, ticker(), return_exceptions=True)
+        return results[0], time.perf_counter() - started, ticks
+
+    error, elapsed, ticks = asyncio.run(scenario())
+    print(f"✓ Timed out after {elapsed:.2f}s with {len(ticks)} loop ticks meanwhile")
+    assert isinstance(error, asyncio.TimeoutError)
+    assert elapsed < 2 and len(ticks) == 5
+
+
+if __name__ == "__main__":
+    test_shallow_clone_commit_and_push()
+    test_shallow_clone_pulls_new_upstream_commits()
+    test_timeout_kills_command_without_blocking_loop()
+    print("\n✅ All tests passed!")
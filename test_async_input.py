@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Test the asyncio input reader: type-ahead, Ctrl-C cancellation and the spinner"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import io
+import signal
+
+from async_input import InputReader, Spinner
+
+
+def test_type_ahead_and_eof():
+    """Lines typed before the prompt are queued in order; EOF ends input"""
+    async def scenario():
+        read_fd, write_fd = os.pipe()
+        output = io.StringIO()
+        reader = InputReader(os.fdopen(read_fd), output)
+        os.write(write_fd, b"first\n")
+        assert await reader.read("> ") == "first"
+
+        os.write(write_fd, b"second\nthird\n")
+        await asyncio.sleep(0.1)  # typed while a query was running
+        assert reader.pending == 2
+        assert await reader.read("> ") == "second"
+        assert await reader.read("> ") == "third"
+
+        os.close(write_fd)
+        for _ in range(2):
+            try:
+                await reader.read("> ")
+                raise AssertionError("expected EOFError")
+            except EOFError:
+                pass
+        reader.close()
+        return output.getvalue()
+
+    output = asyncio.run(scenario())
+    assert "> second (queued)\n" in output and "> third (queued)\n" in output
+    print("✓ Typed-ahead prompts queued and echoed; EOF repeated")
+
+
+def test_ctrl_c_cancels_only_the_query():
+    """SIGINT cancels the running query, the loop and reader keep going"""
+    async def scenario():
+        read_fd, write_fd = os.pipe()
+        output = io.StringIO()
+        hints = []
+        reader = InputReader(os.fdopen(read_fd), output, on_idle_interrupt=lambda: hints.append('hint'))
+        reader.start()
+        loop = asyncio.get_running_loop()
+
+        cancelled = []
+        async def long_query():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        loop.call_later(0.05, os.kill, os.getpid(), signal.SIGINT)
+        assert await reader.run(long_query()) is False
+        assert cancelled == [True]
+
+        async def quick_query():
+            await asyncio.sleep(0)
+            return 'done'
+        assert await reader.run(quick_query()) is True
+
+        # At the prompt Ctrl-C only hints and shows the prompt again
+        os.kill(os.getpid(), signal.SIGINT)
+        loop.call_later(0.05, os.write, write_fd, b"next\n")
+        assert await reader.read("> ") == "next"
+        assert hints == ['hint'] and output.getvalue() == "> > "
+
+        # Cancelling the caller is not mistaken for Ctrl-C
+        outer = asyncio.ensure_future(reader.run(long_query()))
+        await asyncio.sleep(0.01)
+        outer.cancel()
+        try:
+            await outer
+            raise AssertionError("expected CancelledError")
+        except asyncio.CancelledError:
+            pass
+        reader.close()
+        os.close(write_fd)
+
+    asyncio.run(scenario())
+    print("✓ Ctrl-C cancelled the in-flight query and left the session running")
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_spinner_animates_until_stopped():
+    """Frames are drawn while waiting and the line is cleared on stop"""
+    async def scenario():
+        terminal = FakeTerminal()
+        spinner = Spinner("thinking...", terminal, interval=0.01)
+        spinner.start()
+        await asyncio.sleep(0.1)
+        spinner.stop()
+        spinner.stop()
+        frames = terminal.getvalue().count("thinking...")
+        await asyncio.sleep(0.05)
+        assert terminal.getvalue().count("thinking...") == frames
+        return frames, terminal.getvalue()
+
+    frames, output = asyncio.run(scenario())
+    assert frames >= 3 and output.endswith(f"\r{' ' * 50}\r")
+
+    piped = io.StringIO()
+    async def not_a_tty():
+        spinner = Spinner("thinking...", piped)
+        spinner.start()
+        await asyncio.sleep(0.02)
+        spinner.stop()
+    asyncio.run(not_a_tty())
+    assert piped.getvalue() == ""
+    print(f"✓ Spinner drew {frames} frames, nothing when piped")
+
+
+if __name__ == "__main__":
+    test_type_ahead_and_eof()
+    test_ctrl_c_cancels_only_the_query()
+    test_spinner_animates_until_stopped()
+    print("\n✅ All tests passed!")
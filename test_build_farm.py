@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Test the multi-pipeline build farm: shared scheduler, git object cache, status"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+from github_automated_builder import BuildFarm
+
+for var, value in (("GIT_AUTHOR_NAME", "test"), ("GIT_AUTHOR_EMAIL", "test@example.com"),
+                   ("GIT_COMMITTER_NAME", "test"), ("GIT_COMMITTER_EMAIL", "test@example.com")):
+    os.environ.setdefault(var, value)
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+
+
+def make_bare_repo(tmp, name, files):
+    work = tmp / f"{name}-src"
+    subprocess.run(["git", "init", "-q", "-b", "main", str(work)], check=True)
+    for path, content in files.items():
+        (work / path).write_text(content)
+    subprocess.run(["git", "add", "."], cwd=work, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", "init"], cwd=work, check=True)
+    bare = tmp / f"{name}.git"
+    subprocess.run(["git", "clone", "-q", "--bare", str(work), str(bare)], check=True)
+    return f"file://{bare}"
+
+
+def test_farm_shares_scheduler_and_git_cache():
+    """Pipelines inherit defaults, share one scheduler and borrow objects from mirrors"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        specs = make_bare_repo(tmp, "specs", {"api.md": "# API"})
+        outputs = [make_bare_repo(tmp, f"out{i}", {"README.md": f"out{i}"}) for i in range(3)]
+        config = {
+            "work_directory": str(tmp / "farm"),
+            "check_interval_minutes": 5,
+            "incremental": True,
+            "max_concurrent_queries": 2,
+            "webhook": {"port": 9999},
+            "pipelines": [
+                {"name": "alpha", "specs_repo": specs, "output_repo": outputs[0], "priority": 10},
+                {"name": "beta", "specs_repo": specs, "output_repo": outputs[1]},
+                {"specs_repo": specs, "output_repo": outputs[2], "incremental": False},
+            ],
+        }
+        farm = BuildFarm(config)
+        alpha, beta, out2 = farm.builders
+
+        assert [b.name for b in farm.builders] == ["alpha", "beta", "out2"]
+        assert alpha.scheduler is beta.scheduler is farm.scheduler
+        assert farm.scheduler.max_concurrent == 2
+        assert alpha.priority == 10 and beta.priority == 0
+        assert alpha.config["incremental"] and not out2.config["incremental"]
+        assert "webhook" not in alpha.config
+        assert alpha.work_dir == tmp / "farm" / "alpha"
+        print("✓ Pipelines inherit defaults and share the scheduler")
+
+        async def clone_all():
+            await asyncio.gather(*(b.clone_if_needed(b.specs_repo, b.specs_dir) for b in farm.builders))
+        asyncio.run(clone_all())
+
+        mirrors = list((tmp / "farm" / ".git-cache").iterdir())
+        assert len(mirrors) == 1
+        for builder in farm.builders:
+            alternates = (builder.specs_dir / ".git" / "objects" / "info" / "alternates").read_text()
+            assert str(mirrors[0]) in alternates
+            assert (builder.specs_dir / "api.md").exists()
+        print("✓ Three specs clones borrow objects from one shared mirror")
+
+        status = farm.write_status()
+        assert [p["name"] for p in status["pipelines"]] == ["alpha", "beta", "out2"]
+        assert json.loads(farm.status_file.read_text())["scheduler"]["max_concurrent"] == 2
+        print("✓ Status summary written for all pipelines")
+
+
+if __name__ == "__main__":
+    test_farm_shares_scheduler_and_git_cache()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Test query telemetry events, ledger rotation and the per-build report"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from claude_code_sdk.types import (AssistantMessage, ResultMessage, TextBlock, ToolResultBlock,
+                                   ToolUseBlock, UserMessage)
+import build_telemetry
+from build_telemetry import TelemetryLedger, get_ledger, instrument, read_events, summarize
+
+
+async def fake_query():
+    await asyncio.sleep(0.02)
+    yield AssistantMessage(content=[TextBlock("Creating the file"),
+                                    ToolUseBlock("t1", "Write", {"file_path": "a.py"})], model="m")
+    await asyncio.sleep(0.03)
+    yield UserMessage(content=[ToolResultBlock("t1", "ok")])
+    await asyncio.sleep(0.01)
+    yield AssistantMessage(content=[TextBlock("Done")], model="m")
+    yield ResultMessage("success", 60, 50, False, 2, "s1", total_cost_usd=0.02,
+                        usage={"input_tokens": 100, "output_tokens": 20})
+
+
+def test_events_and_report():
+    """Turns, tool durations, TTFT and cost are recorded and aggregated per build"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = TelemetryLedger(Path(tmp) / "ledger.jsonl")
+
+        async def run():
+            for _ in range(2):
+                messages = [m async for m in instrument(fake_query(), "build-1", "test", ledger)]
+                assert len(messages) == 4
+        asyncio.run(run())
+        ledger.close()
+
+        events = read_events(ledger.path)
+        kinds = [e["event"] for e in events]
+        assert kinds.count("turn") == 4 and kinds.count("tool") == 2 and kinds.count("query") == 2
+        query = [e for e in events if e["event"] == "query"][0]
+        assert query["status"] == "ok" and query["tool_counts"] == {"Write": 1}
+        assert query["ttft_s"] >= 0.02 and query["tool_seconds"]["Write"] >= 0.03
+        print(f"✓ Query summary: ttft {query['ttft_s']}s, Write {query['tool_seconds']['Write']}s")
+
+        [build] = summarize(events)
+        assert build["queries"] == 2 and build["cost_usd"] == 0.04 and build["tokens"] == 240
+        assert build["turn_p95_s"] >= build["turn_p50_s"] > 0
+        print(f"✓ Build report: p50 {build['turn_p50_s']}s, p95 {build['turn_p95_s']}s, ${build['cost_usd']}")
+
+
+def test_ledger_rotation():
+    """The ledger rotates by size and the report still reads the backups"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = TelemetryLedger(Path(tmp) / "ledger.jsonl", max_bytes=2000, backups=3)
+        for i in range(300):
+            ledger.emit({"event": "turn", "build_id": "b", "latency_s": 0.1, "i": i})
+            if i % 50 == 0:
+                ledger.close()
+                ledger = TelemetryLedger(ledger.path, max_bytes=2000, backups=3)
+        ledger.close()
+
+        files = sorted(p.name for p in Path(tmp).iterdir())
+        print(f"✓ Ledger files: {files}")
+        assert "ledger.jsonl.1" in files and "ledger.jsonl.4" not in files
+        events = read_events(ledger.path)
+        assert events[-1]["i"] == 299
+        assert [e["i"] for e in events] == sorted(e["i"] for e in events)
+
+
+def test_ledger_is_opt_in():
+    """Nothing is recorded unless CLAUDE_TELEMETRY is set"""
+    saved = {k: os.environ.pop(k, None) for k in ("CLAUDE_TELEMETRY", "CLAUDE_TELEMETRY_LEDGER")}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["CLAUDE_TELEMETRY_LEDGER"] = str(Path(tmp) / "ledger.jsonl")
+            assert get_ledger() is None
+            os.environ["CLAUDE_TELEMETRY"] = "0"
+            assert get_ledger() is None
+            os.environ["CLAUDE_TELEMETRY"] = "1"
+            ledger = get_ledger()
+            assert ledger is not None and ledger.path == Path(tmp) / "ledger.jsonl"
+            ledger.close()
+            build_telemetry._ledger = None
+            print("✓ Ledger only written with CLAUDE_TELEMETRY=1")
+    finally:
+        for k, v in saved.items():
+            os.environ.pop(k, None)
+            if v is not None:
+                os.environ[k] = v
+
+
+if __name__ == "__main__":
+    test_events_and_report()
+    test_ledger_rotation()
+    test_ledger_is_opt_in()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Test incremental and resumable builds with a local specs repo (no API calls)"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+from github_automated_builder import GitHubAutomatedBuilder
+
+
+
+def git(cwd, *args):
+    return subprocess.check_output(["git", *args], cwd=cwd).decode().strip()
+
+
+def commit_specs(specs_dir, files, message):
+    for name, content in files.items():
+        path = specs_dir / name
+        if content is None:
+            path.unlink()
+        else:
+            path.write_text(content)
+    git(specs_dir, "add", "-A")
+    git(specs_dir, "-c", "user.name=test", "-c", "user.email=test@example.com",
+        "commit", "-q", "-m", message)
+    return git(specs_dir, "rev-parse", "HEAD")
+
+
+def make_builder(work_dir, fail_on=None):
+    config_file = work_dir / "builder_config.json"
+    config_file.write_text(json.dumps({
+        "specs_repo": "unused",
+        "output_repo": "unused",
+        "work_directory": str(work_dir),
+        "incremental": True,
+    }))
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+    builder = GitHubAutomatedBuilder(str(config_file))
+    builder.cache = None
+    builder.prompts = []
+    builder.pushes = []
+
+    async def fake_push(repo_path, message, base=None):
+        builder.pushes.append(message)
+        return {"files": 1, "insertions": 1, "deletions": 0, "binary": 0}
+    builder.git_push = fake_push
+
+    def fake_query(prompt, options):
+        async def messages():
+            builder.prompts.append(prompt)
+            component = prompt.split(" component")[0].split()[-1]
+            if component == fail_on:
+                raise RuntimeError("builder killed")
+            block = SimpleNamespace(name="Write", input={"file_path": str(builder.output_dir / f"{component}.py")})
+            yield SimpleNamespace(content=[block])
+            yield SimpleNamespace(total_cost_usd=0.01)
+        return messages()
+
+    builder.run_query = fake_query
+    return builder
+
+
+def test_only_changed_specs_are_rebuilt():
+    """First build covers every spec; later builds send only the spec diff"""
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        builder = make_builder(work_dir)
+        builder.specs_dir.mkdir()
+        builder.output_dir.mkdir()
+        git(builder.specs_dir, "init", "-q")
+
+        first = commit_specs(builder.specs_dir, {
+            "api.md": "# API\nGET /items",
+            "cli.md": "# CLI\nlist command",
+            "config.json": '{"port": 8080}',
+        }, "initial specs")
+        asyncio.run(builder.build_project_from_specs(first))
+        assert len(builder.prompts) == 3
+        state = json.loads(builder.state_file.read_text())
+        assert state["components"]["api.md"]["outputs"] == ["api.py"]
+        print("✓ Initial build recorded outputs for 3 components")
+
+        builder.prompts.clear()
+        second = commit_specs(builder.specs_dir, {
+            "api.md": "# API\nGET /items\nPOST /items",
+            "cli.md": None,
+        }, "change api, drop cli")
+        asyncio.run(builder.build_project_from_specs(second))
+
+        assert len(builder.prompts) == 2
+        api_prompt, cli_prompt = builder.prompts
+        assert "+POST /items" in api_prompt and "api.py" in api_prompt
+        assert "cli.md was removed" in cli_prompt and "cli.py" in cli_prompt
+        state = json.loads(builder.state_file.read_text())
+        assert sorted(state["components"]) == ["api.md", "config.json"]
+        print("✓ Second build only updated api.md and removed cli.md")
+
+
+def test_restart_resumes_interrupted_build():
+    """A restarted builder finishes only the missing components, then skips the hash"""
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        builder = make_builder(work_dir, fail_on="cli")
+        builder.specs_dir.mkdir()
+        builder.output_dir.mkdir()
+        git(builder.specs_dir, "init", "-q")
+        head = commit_specs(builder.specs_dir, {
+            "api.md": "# API",
+            "cli.md": "# CLI",
+            "db.md": "# DB",
+        }, "initial specs")
+
+        try:
+            asyncio.run(builder.build_if_needed(head))
+        except RuntimeError:
+            pass
+        assert builder.pushes == []
+        print("✓ Build interrupted after api.md")
+
+        restarted = make_builder(work_dir)
+        assert restarted.state["in_flight"]["done"] == ["api.md"]
+        cost = asyncio.run(restarted.build_if_needed(head))
+        assert [p.split(" component")[0].split()[-1] for p in restarted.prompts] == ["cli", "db"]
+        assert len(restarted.pushes) == 1 and round(cost, 2) == 0.03
+        assert restarted.state["last_build_hash"] == head and restarted.state["in_flight"] is None
+        print("✓ Restart resumed with cli.md and db.md")
+
+        again = make_builder(work_dir)
+        assert asyncio.run(again.build_if_needed(head)) is None
+        assert again.prompts == [] and again.pushes == []
+        print("✓ Already built specs are skipped after restart")
+
+
+def test_background_push_overlaps_next_poll():
+    """build_if_needed returns before the push finishes; the next build waits for it"""
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        builder = make_builder(work_dir)
+        builder.specs_dir.mkdir()
+        builder.output_dir.mkdir()
+        git(builder.specs_dir, "init", "-q")
+        head = commit_specs(builder.specs_dir, {"api.md": "# API"}, "initial specs")
+
+        async def slow_push(repo_path, message, base=None):
+            await asyncio.sleep(0.2)
+            builder.pushes.append(message)
+            return {"files": 1, "insertions": 1, "deletions": 0, "binary": 0}
+        builder.git_push = slow_push
+
+        async def scenario():
+            await builder.build_if_needed(head, background_push=True)
+            pending = builder.push_task is not None and not builder.push_task.done()
+            before = builder.state["last_build_hash"]
+            again = await builder.build_if_needed(head, background_push=True)
+            return pending, before, again
+
+        pending, before, again = asyncio.run(scenario())
+        assert pending and before is None
+        assert again is None and builder.state["last_build_hash"] == head and len(builder.pushes) == 1
+        print("✓ Push ran in the background and was awaited before the next check")
+
+
+def test_failed_background_push_reported_immediately():
+    """A failed push is logged and shown in the status while the loop is still waiting"""
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        builder = make_builder(work_dir)
+        builder.specs_dir.mkdir()
+        builder.output_dir.mkdir()
+        git(builder.specs_dir, "init", "-q")
+        head = commit_specs(builder.specs_dir, {"api.md": "# API"}, "initial specs")
+
+        async def failing_push(repo_path, message, base=None):
+            raise RuntimeError("remote rejected")
+        builder.git_push = failing_push
+
+        async def scenario():
+            await builder.build_if_needed(head, background_push=True)
+            # The loop would now wait for the next trigger; the failure cuts it short
+            await asyncio.wait_for(builder.wait_for_trigger(None, 60), 5)
+            status = dict(builder.status)
+            try:
+                await builder.finish_push()
+                raise AssertionError("expected the push error")
+            except RuntimeError as e:
+                assert e.reported
+            return status
+
+        status = asyncio.run(scenario())
+        assert status["phase"] == "error" and "remote rejected" in status["last_error"]
+        log = [json.loads(line) for line in (work_dir / "build_log.json").read_text().splitlines()]
+        assert [e["status"] for e in log] == ["failed"] and log[0]["specs_hash"] == head
+        assert builder.state["in_flight"]["built"] and builder.state["last_build_hash"] is None
+        print("✓ Failed background push logged and reported without waiting for the next trigger")
+
+
+def test_push_skips_unchanged_tree_and_squashes_agent_commits():
+    """No commit or push for an unchanged tree; agent commits become one build commit"""
+    for var, value in (("GIT_AUTHOR_NAME", "test"), ("GIT_AUTHOR_EMAIL", "test@example.com"),
+                       ("GIT_COMMITTER_NAME", "test"), ("GIT_COMMITTER_EMAIL", "test@example.com")):
+        os.environ.setdefault(var, value)
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        builder = make_builder(work_dir)
+        del builder.git_push
+        remote = work_dir / "output.git"
+        git(tmp, "init", "-q", "--bare", str(remote))
+        out = builder.output_dir
+        git(tmp, "init", "-q", str(out))
+        git(out, "remote", "add", "origin", str(remote))
+        (out / "README.md").write_text("generated\n")
+        git(out, "add", "-A")
+        git(out, "commit", "-q", "-m", "scaffold")
+        git(out, "push", "-q", "-u", "origin", "HEAD")
+        base = git(out, "rev-parse", "HEAD")
+
+        # Touching a file without changing it only dirties the stat cache
+        os.utime(out / "README.md", (0, 0))
+        unchanged = asyncio.run(builder.git_push(out, "build 1", base=base))
+        assert unchanged is None and git(out, "rev-parse", "HEAD") == base
+        print("✓ Unchanged tree: no commit, no push")
+
+        # The agent commits twice on its own and leaves one more edit uncommitted
+        for i, name in enumerate(["a.py", "b.py"]):
+            (out / name).write_text(f"x = {i}\n")
+            git(out, "add", name)
+            git(out, "commit", "-q", "-m", f"agent edit {i}")
+        (out / "README.md").write_text("generated\nmore\n")
+        stats = asyncio.run(builder.git_push(out, "build 2", base=base))
+        assert stats == {"files": 3, "insertions": 3, "deletions": 0, "binary": 0}
+        assert git(out, "rev-list", "--count", f"{base}..HEAD") == "1"
+        assert git(out, "log", "-1", "--format=%s") == "build 2"
+        assert git(remote, "rev-parse", "HEAD") == git(out, "rev-parse", "HEAD")
+        print("✓ Agent commits squashed into one pushed build commit with diff stats")
+
+        # Agent commits that cancel out are a no-op, squashed or not
+        for squash in (True, False):
+            builder.config["squash_agent_commits"] = squash
+            base = git(out, "rev-parse", "HEAD")
+            (out / "tmp.py").write_text("x = 1\n")
+            git(out, "add", "tmp.py")
+            git(out, "commit", "-q", "-m", "agent adds tmp.py")
+            git(out, "rm", "-q", "tmp.py")
+            git(out, "commit", "-q", "-m", "agent removes tmp.py")
+            assert asyncio.run(builder.git_push(out, "build 3", base=base)) is None
+            assert git(out, "rev-parse", "HEAD") == base == git(remote, "rev-parse", "HEAD")
+        print("✓ Agent commits with no net change: nothing pushed")
+
+
+if __name__ == "__main__":
+    test_only_changed_specs_are_rebuilt()
+    test_restart_resumes_interrupted_build()
+    test_background_push_overlaps_next_poll()
+    test_failed_background_push_reported_immediately()
+    test_push_skips_unchanged_tree_and_squashes_agent_commits()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Test that the CLIs start without importing the SDK or reading projects"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from lazy_sdk import PendingOptions
+
+CLI_MODULES = ['claude_cli_interface', 'claude_cli_interface_modern',
+               'advanced_claude_cli', 'claude_cli_with_projects']
+
+
+def test_cli_imports_do_not_load_sdk():
+    """claude_code_sdk is imported by the first query, not at startup"""
+    for module in CLI_MODULES:
+        check = f"import sys, {module}; print('claude_code_sdk' in sys.modules)"
+        output = subprocess.check_output([sys.executable, '-c', check],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert output.decode().strip() == 'False', module
+    print(f"✓ {len(CLI_MODULES)} CLIs import without the SDK")
+
+    options = PendingOptions(permission_mode='default', cwd='/tmp', model=None)
+    options.permission_mode = 'acceptEdits'
+    built = options.build()
+    assert type(built).__name__ == 'ClaudeCodeOptions'
+    assert built.permission_mode == 'acceptEdits' and built.cwd == '/tmp'
+    print("✓ PendingOptions edits carry over to the SDK options")
+
+
+def test_project_manager_loads_on_first_use():
+    """Constructing a ProjectManager does not read projects.json"""
+    from claude_cli_with_projects import ProjectManager
+
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_lazy_"))
+    try:
+        ProjectManager(config_dir=test_dir).create_project("app", "/tmp")
+        pm = ProjectManager(config_dir=test_dir)
+        assert pm._projects is None
+        assert [p.name for p in pm.list_projects()] == ["app"]
+        assert json.loads(pm.projects_file.read_text())["app"]["name"] == "app"
+        print("✓ Projects read on first use")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_projects_opened_after_first_prompt():
+    """The first prompt is shown before projects are read; input waits for them"""
+    import asyncio
+    import io
+    import threading
+    from async_input import InputReader
+    from ui_theme import Icons
+    from claude_cli_with_projects import EnhancedClaudeInterface
+
+    class Terminal(io.StringIO):
+        prompted = threading.Event()
+
+        def write(self, text):
+            if Icons.PROMPT in text:
+                self.prompted.set()
+            return super().write(text)
+
+    home = tempfile.mkdtemp(prefix="claude_cli_lazy_")
+    saved_home = os.environ.get('HOME')
+    os.environ['HOME'] = home
+    try:
+        cli = EnhancedClaudeInterface()
+        output = Terminal()
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"exit\n")
+        os.close(write_fd)
+        cli.input = InputReader(os.fdopen(read_fd), output)
+
+        seen = {}
+        open_startup_project = cli.open_startup_project
+
+        def opened_late():
+            seen['prompt_first'] = output.prompted.wait(5)
+            seen['loaded_before'] = cli.project_manager._projects is not None
+            return open_startup_project()
+        cli.open_startup_project = opened_late
+
+        asyncio.run(cli.run())
+        assert seen == {'prompt_first': True, 'loaded_before': False}
+        assert cli.project_manager.current_project is not None
+        print("✓ First prompt shown before projects were read")
+    finally:
+        if saved_home is None:
+            os.environ.pop('HOME', None)
+        else:
+            os.environ['HOME'] = saved_home
+        shutil.rmtree(home)
+
+
+if __name__ == "__main__":
+    test_cli_imports_do_not_load_sdk()
+    test_project_manager_loads_on_first_use()
+    test_projects_opened_after_first_prompt()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Test dependency-ordered parallel component builds in git worktrees (no API calls)"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import subprocess
+import tempfile
+from pathlib import Path
+
+from project_automation_example import ProjectAutomator, dependency_order, parse_front_matter, read_front_matter
+
+for var, value in (("GIT_AUTHOR_NAME", "test"), ("GIT_AUTHOR_EMAIL", "test@example.com"),
+                   ("GIT_COMMITTER_NAME", "test"), ("GIT_COMMITTER_EMAIL", "test@example.com")):
+    os.environ.setdefault(var, value)
+
+
+def test_front_matter_and_order():
+    """depends_on is read from front-matter; cycles are rejected"""
+    meta, body = parse_front_matter("---\ntitle: API\ndepends_on: [models, auth]\n---\n# API\n")
+    assert meta == {"title": "API", "depends_on": ["models", "auth"]} and body == "# API\n"
+    meta, _ = parse_front_matter("---\ndepends_on:\n  - models\n---\n# UI\n")
+    assert meta["depends_on"] == ["models"]
+    meta, body, first_line = read_front_matter(iter(["---\n", "depends_on: [models]\n", "---\n", "# API\n", "text\n"]))
+    assert meta == {"depends_on": ["models"]} and list(body) == ["# API\n", "text\n"] and first_line == 4
+    meta, body, first_line = read_front_matter(iter(["# UI\n", "text\n"]))
+    assert meta == {} and list(body) == ["# UI\n", "text\n"] and first_line == 1
+    print("✓ Front-matter parsed")
+
+    assert dependency_order({"api": ["models"], "models": [], "ui": ["api"]}) == ["models", "api", "ui"]
+    try:
+        dependency_order({"a": ["b"], "b": ["a"]})
+        assert False, "cycle not detected"
+    except ValueError:
+        print("✓ Dependency cycle rejected")
+
+
+def test_parallel_builds_respect_dependencies():
+    """Independent components overlap; dependents see their dependencies' files"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        specs_dir = tmp / "specs"
+        specs_dir.mkdir()
+        (specs_dir / "models.md").write_text("# Models")
+        (specs_dir / "auth.md").write_text("# Auth")
+        (specs_dir / "billing.md").write_text("# Billing")
+        (specs_dir / "api.md").write_text("---\ndepends_on: [models, auth]\n---\n# API")
+
+        automator = ProjectAutomator(tmp / "project", specs_dir, max_parallel=2)
+        running = []
+        peak = []
+        seen_by_api = []
+
+        def fake_query(prompt, options=None):
+            async def messages():
+                cwd = Path((options or automator.options).cwd)
+                if "Initialize a new project" in prompt:
+                    (cwd / "README.md").write_text("scaffold")
+                elif "component based on" in prompt:
+                    name = prompt.split("Build the ")[1].split(" component")[0]
+                    if name == "api":
+                        seen_by_api.extend(sorted(p.name for p in cwd.glob("*.py")))
+                    running.append(name)
+                    peak.append(len(running))
+                    await asyncio.sleep(0.1)
+                    (cwd / f"{name}.py").write_text(f"# {name}")
+                    running.remove(name)
+                return
+                yield
+            return messages()
+
+        automator.run_query = fake_query
+        asyncio.run(automator.build_project())
+
+        project_files = sorted(p.name for p in (tmp / "project").iterdir() if p.name != ".git")
+        print(f"✓ Project files after merge: {project_files}")
+        assert project_files == ["README.md", "api.py", "auth.py", "billing.py", "models.py"]
+        assert {"auth.py", "models.py"} <= set(seen_by_api)
+        assert max(peak) == 2
+        worktrees = subprocess.check_output(["git", "worktree", "list"], cwd=tmp / "project").decode()
+        assert len(worktrees.splitlines()) == 1
+        print("✓ At most 2 components ran at once and api saw models and auth")
+
+
+def test_unresolved_merge_conflicts_are_not_committed():
+    """A resolve query that leaves conflict markers aborts the merge; a real fix is committed"""
+    def git(cwd, *args):
+        return subprocess.check_output(["git", *args], cwd=cwd).decode().strip()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        automator = ProjectAutomator(tmp / "project", tmp / "specs")
+        project = automator.project_dir
+        project.mkdir()
+        git(project, "init", "-q")
+        (project / "app.py").write_text("base\n")
+        git(project, "add", ".")
+        git(project, "commit", "-q", "-m", "base")
+        git(project, "checkout", "-q", "-b", "component/api")
+        (project / "app.py").write_text("api\n")
+        git(project, "commit", "-q", "-am", "api")
+        git(project, "checkout", "-q", "-")
+        (project / "app.py").write_text("main\n")
+        git(project, "commit", "-q", "-am", "main")
+        head = git(project, "rev-parse", "HEAD")
+
+        def resolving_query(fix):
+            def query(prompt, options=None):
+                async def messages():
+                    if fix:
+                        (project / "app.py").write_text("main\napi\n")
+                    return
+                    yield
+                return messages()
+            return query
+
+        automator.run_query = resolving_query(fix=False)
+        try:
+            asyncio.run(automator.merge_component("api", "component/api"))
+            raise AssertionError("expected unresolved conflicts to fail the merge")
+        except RuntimeError as e:
+            assert "app.py" in str(e)
+        assert git(project, "rev-parse", "HEAD") == head and not (project / ".git" / "MERGE_HEAD").exists()
+        assert (project / "app.py").read_text() == "main\n"
+        print("✓ Conflict markers left by the resolver: merge aborted, nothing committed")
+
+        automator.run_query = resolving_query(fix=True)
+        asyncio.run(automator.merge_component("api", "component/api"))
+        assert git(project, "rev-parse", "HEAD^2") == git(project, "rev-parse", "component/api")
+        assert (project / "app.py").read_text() == "main\napi\n"
+        print("✓ Resolved conflict committed as the merge")
+
+
+if __name__ == "__main__":
+    test_front_matter_and_order()
+    test_parallel_builds_respect_dependencies()
+    test_unresolved_merge_conflicts_are_not_committed()
+    print("\n✅ All tests passed!")
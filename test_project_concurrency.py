@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Stress test: several CLI processes saving sessions to the same project"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import multiprocessing
+import shutil
+import tempfile
+from pathlib import Path
+
+WORKERS = 4
+SAVES_PER_WORKER = 15
+
+
+def _worker(config_dir, start):
+    from claude_cli_with_projects import ProjectManager
+
+    pm = ProjectManager(config_dir=Path(config_dir))
+    project = pm.select_project("shared")
+    start.wait()
+    for i in range(SAVES_PER_WORKER):
+        project.add_session({
+            'messages': [{'role': 'user', 'content': f'{os.getpid()}-{i}'}],
+            'session_id': f'{os.getpid()}-{i}',
+            'cost': 0
+        })
+        pm.save_projects()
+
+
+def test_concurrent_cli_saves():
+    """No session is lost when CLI processes save concurrently"""
+    from claude_cli_with_projects import ProjectManager
+
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_stress_"))
+    pm = ProjectManager(config_dir=test_dir)
+    pm.create_project("shared", "/tmp")
+
+    ctx = multiprocessing.get_context('spawn')
+    start = ctx.Event()
+    processes = [ctx.Process(target=_worker, args=(str(test_dir), start)) for _ in range(WORKERS)]
+    for p in processes:
+        p.start()
+    start.set()
+    for p in processes:
+        p.join(timeout=120)
+        assert p.exitcode == 0
+
+    reloaded = ProjectManager(config_dir=test_dir).select_project("shared")
+    session_ids = {s['session_id'] for s in reloaded.sessions}
+    assert len(reloaded.sessions) == WORKERS * SAVES_PER_WORKER
+    assert len(session_ids) == WORKERS * SAVES_PER_WORKER
+    print(f"✓ {len(session_ids)} sessions saved by {WORKERS} processes, none lost")
+
+    shutil.rmtree(test_dir)
+
+
+if __name__ == "__main__":
+    test_concurrent_cli_saves()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test session files and the compact session index of CLI projects"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from claude_cli_with_projects import ProjectManager
+
+
+def test_sessions_saved_to_own_files_and_loaded_lazily():
+    """projects.json keeps an index; each save writes only the new session's file"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_sessions_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.create_project("app", "/tmp")
+        for i in range(3):
+            project.add_session({
+                'messages': [{'role': 'user', 'content': f'question {i}'},
+                             {'role': 'assistant', 'content': f'answer {i}'}],
+                'session_id': f's{i}',
+                'cost': 0.01
+            })
+            before = {f: f.stat().st_mtime_ns for f in pm.sessions_dir.glob('*.jsonl')}
+            pm.save_projects()
+            after = {f: f.stat().st_mtime_ns for f in pm.sessions_dir.glob('*.jsonl')}
+            assert len(after) == i + 1 and all(after[f] == mtime for f, mtime in before.items())
+        print("✓ Each save wrote only the new session file")
+
+        index = json.loads(pm.projects_file.read_text())["app"]["sessions"]
+        assert all('messages' not in s and s['message_count'] == 2 for s in index)
+        assert '\n' not in pm.projects_file.read_text()
+        print("✓ projects.json holds a compact index without messages")
+
+        reloaded = ProjectManager(config_dir=test_dir).select_project("app")
+        assert all('messages' not in s for s in reloaded.sessions)
+        assert reloaded.load_session(1)[0] == {'role': 'user', 'content': 'question 1'}
+        print("✓ Messages read from disk only when a session is loaded")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_legacy_inline_sessions_are_migrated():
+    """Sessions stored inline by older versions still load and move to files on save"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_sessions_"))
+    try:
+        legacy = {"old": {"name": "old", "path": "/tmp", "is_temp": False, "created_at": "2024-01-01T00:00:00",
+                          "version": 1, "sessions": [{"timestamp": "2024-01-01T00:00:00", "session_id": "legacy",
+                                                      "cost": 0, "messages": [{"role": "user", "content": "hi"}]}]}}
+        (test_dir / "projects.json").write_text(json.dumps(legacy, indent=2))
+
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.select_project("old")
+        assert project.load_session(0) == [{"role": "user", "content": "hi"}]
+        pm.save_projects()
+
+        index = json.loads(pm.projects_file.read_text())["old"]["sessions"]
+        assert 'messages' not in index[0] and index[0]['message_count'] == 1
+        again = ProjectManager(config_dir=test_dir).select_project("old")
+        assert again.load_session(0) == [{"role": "user", "content": "hi"}]
+        print("✓ Legacy inline session loaded, then migrated to its own file")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+if __name__ == "__main__":
+    test_sessions_saved_to_own_files_and_loaded_lazily()
+    test_legacy_inline_sessions_are_migrated()
+    print("\n✅ All tests passed!")
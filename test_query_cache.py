@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test the query result cache with a fake query function (no API calls)"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from claude_code_sdk import ClaudeCodeOptions, AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+from query_cache import QueryCache
+
+
+def make_fake_query(calls):
+    async def fake_query(prompt, options):
+        calls.append(prompt)
+        Path(options.cwd, 'app.py').write_text(f"# built from: {prompt}\n")
+        yield AssistantMessage(
+            content=[TextBlock(text='Writing app.py'), ToolUseBlock(id='t1', name='Write', input={'file_path': 'app.py'})],
+            model='test'
+        )
+        yield ResultMessage(subtype='success', duration_ms=10, duration_api_ms=10, is_error=False,
+                            num_turns=1, session_id='s1', total_cost_usd=0.25)
+    return fake_query
+
+
+def fresh_workspace():
+    workspace = Path(tempfile.mkdtemp(prefix="claude_cache_ws_"))
+    (workspace / 'spec.md').write_text("# Spec\n")
+    return workspace
+
+
+def test_cache_replays_messages_and_diff():
+    """A second identical run in an identical tree is served from the cache"""
+    async def scenario():
+        cache = QueryCache(tempfile.mkdtemp(prefix="claude_cache_"))
+        calls = []
+        results = []
+        for _ in range(2):
+            workspace = fresh_workspace()
+            options = ClaudeCodeOptions(cwd=str(workspace), max_turns=5)
+            messages = [m async for m in cache.query("build it", options, query_fn=make_fake_query(calls))]
+            results.append((messages, (workspace / 'app.py').read_text()))
+        return calls, results, cache.report()
+
+    calls, results, report = asyncio.run(scenario())
+    (first_messages, first_file), (replayed_messages, replayed_file) = results
+    assert calls == ["build it"]
+    assert replayed_file == first_file
+    assert isinstance(replayed_messages[0], AssistantMessage)
+    assert replayed_messages[0].content[1].name == 'Write'
+    assert not getattr(first_messages[-1], 'cached', False) and first_messages[-1].total_cost_usd == 0.25
+    assert all(m.cached for m in replayed_messages)
+    assert replayed_messages[-1].total_cost_usd == 0 and replayed_messages[-1].cached_cost_usd == 0.25
+    assert report['hits'] == 1 and report['misses'] == 1 and report['cost_saved_usd'] == 0.25
+    print(f"✓ Replayed from cache: {report}")
+
+
+def test_cache_key_and_eviction():
+    """Different options miss; the least recently used entry is evicted"""
+    async def scenario():
+        cache = QueryCache(tempfile.mkdtemp(prefix="claude_cache_"), max_entries=1)
+        calls = []
+        for max_turns in (5, 6):
+            options = ClaudeCodeOptions(cwd=str(fresh_workspace()), max_turns=max_turns)
+            [m async for m in cache.query("build it", options, query_fn=make_fake_query(calls))]
+        return calls, cache.report()
+
+    calls, report = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert report['entries'] == 1 and report['evictions'] == 1
+    print(f"✓ Keyed on options, LRU eviction: {report}")
+
+
+if __name__ == "__main__":
+    test_cache_replays_messages_and_diff()
+    test_cache_key_and_eviction()
+    print("\n✅ All tests passed!")
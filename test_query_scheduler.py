@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Test the shared query scheduler with a fake query function (no API calls)"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+from query_scheduler import QueryScheduler, QueueFullError
+
+
+def fake_query(order, delay=0.05):
+    async def query_fn(prompt, options=None):
+        order.append(prompt)
+        await asyncio.sleep(delay)
+        yield f"done {prompt}"
+    return query_fn
+
+
+async def drain(scheduler, prompt, project, query_fn, priority=None):
+    return [m async for m in scheduler.query(prompt, project=project, query_fn=query_fn, priority=priority)]
+
+
+def test_concurrency_cap_and_fairness():
+    """At most max_concurrent runs at once; projects are served round-robin"""
+    async def scenario():
+        scheduler = QueryScheduler(max_concurrent=1, max_queue_depth=10)
+        order = []
+        query_fn = fake_query(order)
+        tasks = [asyncio.ensure_future(drain(scheduler, f"a{i}", 'a', query_fn)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.ensure_future(drain(scheduler, f"b{i}", 'b', query_fn)) for i in range(2)]
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    print(f"✓ Execution order: {order}")
+    assert order == ['a0', 'a1', 'b0', 'a2', 'b1']
+    assert stats['completed'] == 5 and stats['running'] == 0 and stats['queued'] == 0
+
+
+def test_queue_full_and_cancellation():
+    """Overflow is rejected with Retry-After; cancelled waiters leave the queue"""
+    async def scenario():
+        scheduler = QueryScheduler(max_concurrent=1, max_queue_depth=1)
+        query_fn = fake_query([], delay=0.2)
+        running = asyncio.ensure_future(drain(scheduler, 'r', 'p', query_fn))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.ensure_future(drain(scheduler, 'w', 'p', query_fn))
+        await asyncio.sleep(0.01)
+
+        try:
+            await drain(scheduler, 'x', 'p', query_fn)
+            rejected = None
+        except QueueFullError as e:
+            rejected = e
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        queued_after_cancel = scheduler.queued
+        await running
+        return rejected, queued_after_cancel, scheduler.stats()
+
+    rejected, queued_after_cancel, stats = asyncio.run(scenario())
+    print(f"✓ Rejected with Retry-After {rejected.retry_after}s")
+    assert rejected is not None and rejected.retry_after >= 1
+    assert queued_after_cancel == 0
+    assert stats['rejected'] == 1 and stats['cancelled'] == 1 and stats['running'] == 0
+
+
+def test_priority_before_round_robin():
+    """Higher-priority projects get freed slots first; equal ones still rotate"""
+    async def scenario():
+        scheduler = QueryScheduler(max_concurrent=1, max_queue_depth=10)
+        order = []
+        query_fn = fake_query(order, delay=0.02)
+        tasks = [asyncio.ensure_future(drain(scheduler, 'first', 'low', query_fn))]
+        await asyncio.sleep(0)
+        for project, priority in (('low', 0), ('other', 0), ('urgent', 5)):
+            for i in range(2):
+                tasks.append(asyncio.ensure_future(drain(scheduler, f"{project}{i}", project, query_fn, priority)))
+        await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    print(f"✓ Priority order: {order}")
+    assert order[:3] == ['first', 'urgent0', 'urgent1']
+    assert order[3:] == ['low0', 'other0', 'low1', 'other1']
+
+
+if __name__ == "__main__":
+    test_concurrency_cap_and_fairness()
+    test_queue_full_and_cancellation()
+    test_priority_before_round_robin()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Test failure classification, backoff and the per-spec circuit breaker (no API calls)"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+import async_git
+from github_automated_builder import GitHubAutomatedBuilder
+from query_scheduler import QueueFullError
+from retry_policy import PERMANENT, RATE_LIMITED, TRANSIENT, PermanentError, RetryPolicy, classify
+
+
+
+def test_classification_and_backoff():
+    """Errors are sorted by kind; Retry-After hints win over backoff"""
+    network = async_git.GitError(("fetch",), 128, "fatal: unable to access 'https://github.com/x/': Could not resolve host")
+    assert classify(network).kind == TRANSIENT
+    assert classify(asyncio.TimeoutError()).kind == TRANSIENT
+    assert classify(ConnectionResetError()).kind == TRANSIENT
+    limited = classify(RuntimeError("API Error: 429 rate_limit_error, retry-after: 42"))
+    assert limited.kind == RATE_LIMITED and limited.retry_after == 42
+    assert classify(QueueFullError(17)).retry_after == 17
+    assert classify(PermanentError("Build query failed (error_max_turns, cost $1.2000)")).kind == PERMANENT
+    # Digits inside a commit hash are not a status code
+    assert classify(ValueError("bad spec at a4292fe")).kind == PERMANENT
+    # Unrecognised failures, e.g. a rejected push, are retried rather than given up on
+    rejected = async_git.GitError(("push",), 1, "! [remote rejected] main -> main (pre-receive hook declined)")
+    assert classify(rejected).kind == TRANSIENT
+    assert classify(subprocess.CalledProcessError(1, ["git", "push"])).kind == TRANSIENT
+    assert classify(RuntimeError("something unexpected")).kind == TRANSIENT
+    print("✓ Transient, rate-limited and permanent failures classified")
+
+    policy = RetryPolicy(base_delay=5, max_delay=300, rate_limit_delay=60, rng=lambda: 1.0)
+    assert [policy.delay(classify(network), a) for a in range(8)] == [5, 10, 20, 40, 80, 160, 300, 300]
+    assert policy.delay(limited, 0) == 42 * 1.1
+    assert policy.delay(classify(RuntimeError("overloaded")), 2) == 240
+    jittered = RetryPolicy(base_delay=5, rng=lambda: 0.5)
+    assert jittered.delay(classify(network), 3) == 20
+    print("✓ Exponential backoff with full jitter, capped; Retry-After honoured")
+
+
+def test_breaker_stops_rebuilding_broken_specs():
+    """A specs hash that keeps failing is not rebuilt again, even after a restart"""
+    for var, value in (("GIT_AUTHOR_NAME", "test"), ("GIT_AUTHOR_EMAIL", "test@example.com"),
+                       ("GIT_COMMITTER_NAME", "test"), ("GIT_COMMITTER_EMAIL", "test@example.com")):
+        os.environ.setdefault(var, value)
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        specs_dir = work_dir / "specs"
+        specs_dir.mkdir()
+        (work_dir / "output").mkdir()
+        subprocess.run(["git", "init", "-q", str(specs_dir)], check=True)
+        (specs_dir / "api.md").write_text("# API\nContradictory requirements")
+        subprocess.run(["git", "add", "."], cwd=specs_dir, check=True)
+        subprocess.run(["git", "commit", "-q", "-m", "specs"], cwd=specs_dir, check=True)
+        config = {"specs_repo": "unused", "output_repo": "unused", "work_directory": tmp}
+
+        def make_builder():
+            builder = GitHubAutomatedBuilder(config=config)
+            builder.cache = None
+            builder.queries = 0
+            builder.retry.delay = lambda failure, attempt: 0
+
+            async def unchanged(repo_path):
+                return False
+            builder.remote_changed = unchanged
+
+            def failing_query(prompt, options):
+                async def messages():
+                    builder.queries += 1
+                    yield type("Result", (), {"total_cost_usd": 0.5, "is_error": True, "subtype": "error_during_execution"})()
+                return messages()
+            builder.run_query = failing_query
+            return builder
+
+        builder = make_builder()
+
+        async def stop(listener, interval):
+            raise asyncio.CancelledError()
+        builder.wait_for_trigger = stop
+        try:
+            asyncio.run(builder.build_loop())
+        except asyncio.CancelledError:
+            pass
+        head = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=specs_dir).decode().strip()
+        assert builder.queries == 3
+        state = json.loads((work_dir / "builder_state.json").read_text())
+        assert state["failures"][head]["count"] == 3
+        print("✓ Breaker opened after 3 permanent failures of the same specs")
+
+        restarted = make_builder()
+        assert asyncio.run(restarted.build_if_needed(head)) is None and restarted.queries == 0
+        print("✓ Restarted builder skips the broken specs hash")
+
+
+if __name__ == "__main__":
+    test_classification_and_backoff()
+    test_breaker_stops_rebuilding_broken_specs()
+    print("\n✅ All tests passed!")
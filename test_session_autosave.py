@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Test the session write-ahead log: appends, compaction and crash recovery"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from claude_cli_with_projects import ProjectManager, session_file_name
+from json_store import append_jsonl, read_jsonl
+from session_autosave import SessionAutosave, recover
+
+
+def message(i):
+    return {'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'message {i}'}
+
+
+def test_messages_appended_then_compacted():
+    """Each message is one log append; the index is rewritten only at compaction"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_autosave_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.create_project("app", "/tmp")
+        autosave = SessionAutosave(pm, project, session_file_name("app"), fsync_batch=2, compact_every=4)
+        index_mtime = pm.projects_file.stat().st_mtime_ns
+
+        for i in range(3):
+            autosave.record(message(i))
+        autosave.sync()
+        wal = read_jsonl(autosave.wal_path)
+        assert [r['type'] for r in wal] == ['session', 'message', 'message', 'message']
+        assert not autosave.session_file.exists()
+        assert pm.projects_file.stat().st_mtime_ns == index_mtime
+        print("✓ 3 messages appended to the log, index untouched")
+
+        autosave.record(message(3))
+        assert read_jsonl(autosave.session_file) == [message(i) for i in range(4)]
+        assert [r['type'] for r in read_jsonl(autosave.wal_path)] == ['session']
+        assert json.loads(pm.projects_file.read_text())["app"]["sessions"] == []
+        print("✓ Compacted into the session file after 4 messages, not saved to the index yet")
+
+        autosave.record(message(4))
+        autosave.update(session_id='sdk-1', cost=0.02)
+        autosave.close()
+        assert not autosave.wal_path.exists()
+        reloaded = ProjectManager(config_dir=test_dir).select_project("app")
+        assert len(reloaded.sessions) == 1
+        assert reloaded.sessions[0]['session_id'] == 'sdk-1' and reloaded.sessions[0]['message_count'] == 5
+        assert reloaded.load_session(0) == [message(i) for i in range(5)]
+        print("✓ Closing compacts the rest and removes the log")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_recovery_after_crash():
+    """A log left by a crashed CLI is replayed once; live logs are left alone"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_autosave_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.create_project("app", "/tmp")
+        crashed = SessionAutosave(pm, project, session_file_name("app"), compact_every=4)
+        for i in range(6):
+            crashed.record(message(i))
+        crashed.update(session_id='sdk-crashed', cost=0.5)
+        crashed.sync()
+
+        # A second CLI saves another session meanwhile
+        other_pm = ProjectManager(config_dir=test_dir)
+        other_project = other_pm.select_project("app")
+        live = SessionAutosave(other_pm, other_project, session_file_name("app"))
+        live.record(message(0))
+        assert recover(ProjectManager(config_dir=test_dir)) == []
+        print("✓ Logs of running CLIs are not recovered")
+
+        crashed._wal.close()  # the process dies; its lock goes with it
+        entries = [entry for _, entry in recover(other_pm)]
+        assert [e['message_count'] for e in entries] == [6] and entries[0]['session_id'] == 'sdk-crashed'
+        assert not crashed.wal_path.exists() and live.wal_path.exists()
+        live.close()
+
+        reloaded = ProjectManager(config_dir=test_dir).select_project("app")
+        by_file = {s['file']: s for s in reloaded.sessions}
+        assert set(by_file) == {crashed.file_name, live.file_name}
+        index = reloaded.sessions.index(by_file[crashed.file_name])
+        assert reloaded.load_session(index) == [message(i) for i in range(6)]
+        print("✓ Crashed session recovered with its 6 messages, once")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_recovery_skips_messages_already_compacted():
+    """A crash between appending to the session file and truncating the log adds no duplicates"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_autosave_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.create_project("app", "/tmp")
+        autosave = SessionAutosave(pm, project, session_file_name("app"))
+        for i in range(3):
+            autosave.record(message(i))
+        autosave.sync()
+        append_jsonl(autosave.session_file, [message(0), message(1)])
+        autosave._wal.close()
+
+        [(_, entry)] = recover(pm)
+        assert entry['message_count'] == 3
+        assert read_jsonl(autosave.session_file) == [message(i) for i in range(3)]
+        print("✓ Only the messages missing from the session file were replayed")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_recovery_covers_every_project():
+    """Logs of projects other than the one selected at startup are recovered too"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_autosave_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        api = pm.create_project("api", "/tmp/api")
+        pm.create_project("web", "/tmp/web")
+        crashed = SessionAutosave(pm, api, session_file_name("api"))
+        for i in range(2):
+            crashed.record(message(i))
+        crashed.sync()
+        crashed._wal.close()
+
+        other_pm = ProjectManager(config_dir=test_dir)
+        other_pm.select_project("web")
+        [(project, entry)] = recover(other_pm)
+        assert project.name == "api" and entry['message_count'] == 2
+        reloaded = ProjectManager(config_dir=test_dir)
+        assert len(reloaded.projects["api"].sessions) == 1 and reloaded.projects["web"].sessions == []
+        print("✓ Crashed session of an unselected project recovered into that project")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_resumed_session_continues_its_file():
+    """A loaded session keeps logging into its own file, not a copy"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_autosave_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.create_project("app", "/tmp")
+        first = SessionAutosave(pm, project, session_file_name("app"))
+        for i in range(3):
+            first.record(message(i))
+        first.update(session_id='sdk-1', cost=0.1)
+        first.close()
+
+        entry = project.sessions[0]
+        resumed = SessionAutosave(pm, project, entry['file'], resume=entry)
+        resumed.record(message(3))
+        resumed.close()
+        reloaded = ProjectManager(config_dir=test_dir).select_project("app")
+        assert len(reloaded.sessions) == 1 and reloaded.sessions[0]['message_count'] == 4
+        assert reloaded.sessions[0]['session_id'] == 'sdk-1'
+        assert reloaded.load_session(0) == [message(i) for i in range(4)]
+        print("✓ Loaded session continued in place, no duplicate")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_discard_drops_unsaved_messages():
+    """Declining to save removes what was logged since the last save"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_autosave_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.create_project("app", "/tmp")
+        unsaved = SessionAutosave(pm, project, session_file_name("app"), compact_every=2)
+        for i in range(3):
+            unsaved.record(message(i))
+        unsaved.discard()
+        assert not unsaved.session_file.exists() and not unsaved.wal_path.exists()
+        assert project.sessions == [] and recover(pm) == []
+        print("✓ Unsaved session discarded, nothing left to recover")
+
+        saved = SessionAutosave(pm, project, session_file_name("app"), compact_every=2)
+        saved.record(message(0))
+        saved.checkpoint()
+        for i in range(1, 4):
+            saved.record(message(i))
+        saved.discard()
+        reloaded = ProjectManager(config_dir=test_dir).select_project("app")
+        assert [s['message_count'] for s in reloaded.sessions] == [1]
+        assert reloaded.load_session(0) == [message(0)]
+        print("✓ Messages after /session save rolled back, saved ones kept")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def test_fsync_deferred_to_timer():
+    """Appends on the event loop don't fsync; the timer or a full batch does"""
+    test_dir = Path(tempfile.mkdtemp(prefix="claude_cli_autosave_"))
+    try:
+        pm = ProjectManager(config_dir=test_dir)
+        project = pm.create_project("app", "/tmp")
+
+        async def scenario():
+            autosave = SessionAutosave(pm, project, session_file_name("app"), fsync_interval=0.05, fsync_batch=4)
+            autosave.record(message(0))
+            pending = autosave._unsynced
+            await asyncio.sleep(0.1)
+            synced_by_timer = autosave._unsynced
+            for i in range(1, 5):
+                autosave.record(message(i))
+            batch = autosave._unsynced
+            autosave.close()
+            return pending, synced_by_timer, batch
+
+        pending, synced_by_timer, batch = asyncio.run(scenario())
+        assert pending > 0 and synced_by_timer == 0 and batch == 0
+        print("✓ fsync batched by timer and batch size")
+    finally:
+        shutil.rmtree(test_dir)
+
+
+if __name__ == "__main__":
+    test_messages_appended_then_compacted()
+    test_recovery_after_crash()
+    test_recovery_skips_messages_already_compacted()
+    test_recovery_covers_every_project()
+    test_resumed_session_continues_its_file()
+    test_discard_drops_unsaved_messages()
+    test_fsync_deferred_to_timer()
+    print("\n✅ All tests passed!")
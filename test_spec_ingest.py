@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test spec chunking and token-budgeted prompt assembly"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+from pathlib import Path
+
+from spec_ingest import SpecIngestor, chunk_text, estimate_tokens, pack
+
+
+SPEC = """# Service
+Overview of the service.
+
+## Endpoints
+```
+# not a heading inside code
+GET /items
+```
+
+## Storage
+Items are stored in SQLite.
+"""
+
+
+def test_chunking_by_heading():
+    """Headings split chunks, code fences don't; JSON is compacted"""
+    chunks = chunk_text(SPEC, "service.md")
+    print(f"✓ Chunks: {[(c.heading, c.start_line, c.end_line) for c in chunks]}")
+    assert [c.heading for c in chunks] == ["Service", "Endpoints", "Storage"]
+    assert (chunks[1].start_line, chunks[1].end_line) == (4, 9)
+    assert "# not a heading" in chunks[1].text
+
+    chunks = chunk_text("# Notes\n#hashtag and ####### seven\n~~~\n## not a heading\n```\n~~~\n## Next\n", "notes.md")
+    assert [(c.heading, c.start_line) for c in chunks] == [("Notes", 1), ("Next", 7)]
+    print("✓ '#' without a space and tilde fences don't split")
+
+    [json_chunk] = chunk_text('{\n  "port": 8080,\n  "debug": false\n}', "config.json")
+    assert json_chunk.text == '{"port":8080,"debug":false}'
+    print("✓ JSON spec compacted")
+
+
+def test_budget_and_known_chunks_are_referenced():
+    """Over-budget and already-seen chunks are listed by path, not inlined"""
+    chunks = chunk_text(SPEC, "service.md")
+    budget = chunks[0].tokens + chunks[1].tokens
+    prompt = pack(chunks, budget)
+    assert "Overview of the service" in prompt and "GET /items" in prompt
+    assert "Items are stored" not in prompt
+    assert "- service.md lines 10-11: Storage" in prompt
+
+    prompt = pack(chunks, 10000, known={chunks[0].digest, chunks[2].digest})
+    assert "GET /items" in prompt and "Overview" not in prompt
+    assert "service.md lines 1-3: Service" in prompt
+    print("✓ Over-budget and unchanged chunks referenced by path")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        specs_dir = Path(tmp)
+        (specs_dir / "service.md").write_text(SPEC * 50)
+        (specs_dir / "config.json").write_text('{"port": 8080}')
+        ingestor = SpecIngestor(specs_dir, budget=500)
+        assert ingestor.spec_files() == ["config.json", "service.md"]
+        prompt = ingestor.assemble()
+        assert estimate_tokens(prompt) < estimate_tokens(SPEC * 50)
+        assert str(specs_dir / "service.md") in prompt
+        print(f"✓ {len(SPEC * 50)} chars of specs packed into ~{estimate_tokens(prompt)} tokens")
+
+
+if __name__ == "__main__":
+    test_chunking_by_heading()
+    test_budget_and_known_chunks_are_referenced()
+    print("\n✅ All tests passed!")
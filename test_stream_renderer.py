@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Test incremental markdown rendering and frame-coalesced writes"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import io
+import re
+
+from stream_renderer import StreamRenderer
+from ui_theme import Icons
+
+ANSI = re.compile(r'\x1b\[[0-9;]*m')
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+    def plain(self):
+        return ANSI.sub('', self.getvalue())
+
+
+def test_markdown_across_chunk_boundaries():
+    """Lists, fences and headings are recognised even when split between chunks"""
+    stream = CountingStream()
+    renderer = StreamRenderer(stream)
+    chunks = ["# Plan\n- first", " item\n1. second\n`", "``python\n- not a bullet\n", "```\n> quoted `x`\n", "tail"]
+    for chunk in chunks:
+        renderer.feed(chunk)
+    text = renderer.finish()
+
+    assert text == "".join(chunks)
+    assert stream.plain() == (f"# Plan\n{Icons.BULLET} first item\n1. second\n```python\n"
+                              f"- not a bullet\n```\n> quoted `x`\ntail")
+    print("✓ Markdown styled incrementally; code fence contents left alone")
+
+    # A partial line shown at a frame continues in its style when the rest arrives
+    stream = CountingStream()
+    renderer = StreamRenderer(stream)
+    renderer.feed("- partial")
+    renderer.flush()
+    renderer.feed(" line\nnext\n")
+    renderer.finish()
+    assert stream.plain() == f"{Icons.BULLET} partial line\nnext\n"
+    print("✓ Partial line continued after an early flush")
+
+
+def test_writes_coalesced_to_frame_rate():
+    """Thousands of small chunks become a handful of terminal writes"""
+    async def scenario():
+        stream = CountingStream()
+        renderer = StreamRenderer(stream, fps=20)
+        for i in range(2000):
+            renderer.feed(f"line {i} with `code`\n")
+            if i % 500 == 0:
+                await asyncio.sleep(0)
+        await asyncio.sleep(0.1)  # the frame timer writes without another feed
+        written_by_timer = stream.writes
+        renderer.finish()
+        return stream, written_by_timer
+
+    stream, written_by_timer = asyncio.run(scenario())
+    assert stream.plain().count("\n") == 2000
+    assert written_by_timer == 2 and stream.writes == 2
+    print(f"✓ 2000 chunks written in {stream.writes} writes")
+
+
+if __name__ == "__main__":
+    test_markdown_across_chunk_boundaries()
+    test_writes_coalesced_to_frame_rate()
+    print("\n✅ All tests passed!")
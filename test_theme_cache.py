@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test cached Theme fragments and display-width aware boxes"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ui_theme
+from ui_theme import Colors, Icons, Theme
+
+
+def test_cached_output_matches_uncached():
+    """Warm caches give the same strings as a cold render"""
+    calls = [
+        lambda: Theme.header('Claude', 40),
+        lambda: Theme.box('a\nlonger line', 'Title', Colors.INFO),
+        lambda: Theme.status('done', 'success'),
+        lambda: Theme.status('odd', 'unknown'),
+        lambda: Theme.prompt('/tmp', 'bypassPermissions'),
+        lambda: Theme.tool_use('Bash', {'command': 'x' * 80}),
+        lambda: Theme.session_summary(1500, 2, 0.01, ['Read']),
+    ]
+    warm = [call() for call in calls]
+    for cache in (ui_theme.fragments, ui_theme._tool_head, ui_theme._header,
+                  ui_theme._box_edges, ui_theme._prompt):
+        cache.cache_clear()
+    assert [call() for call in calls] == warm
+    assert Theme.tool_use('Bash', {'command': 'x' * 80}).endswith('x' * 47 + '...' + Colors.RESET + '\n'
+                                                                 + ui_theme.fragments(bool(Colors.RESET))['rule'])
+    print("✓ Cached fragments render identically")
+
+    before = ui_theme._prompt.cache_info().hits
+    for _ in range(100):
+        Theme.prompt('/tmp', 'bypassPermissions')
+    assert ui_theme._prompt.cache_info().hits - before == 100
+    print("✓ Prompt reused within the minute")
+
+
+def test_batch_tool_rendering():
+    """tool_uses draws one pair of rules around all events"""
+    events = [('Edit', {'file_path': '/a.py'}), ('Bash', {'command': 'ls'}), ('Custom', {})]
+    assert Theme.tool_uses(events[:1]) == Theme.tool_use(*events[0])
+    assert Theme.tool_uses([]) == ''
+
+    batch = Theme.tool_uses(events).split('\n')
+    rule = ui_theme.fragments(bool(Colors.RESET))['rule']
+    assert batch == ['', rule] + [Theme.tool_line(*event) for event in events] + [rule]
+    assert Icons.TOOL in batch[-2] and '/a.py' in batch[2]
+    print("✓ Batch of 3 tool uses rendered between one pair of rules")
+
+
+def test_display_width_and_wrapped_boxes():
+    """Boxes pad by visible width and wrap to the requested width"""
+    assert ui_theme.display_width('\x1b[31mred\x1b[0m') == 3
+    assert ui_theme.display_width('中文🔧') == 6
+    assert ui_theme.display_width('e\u0301') == 1
+    assert ui_theme.display_width(Icons.SUCCESS) == 1
+    print("✓ ANSI, wide, emoji and combining characters measured")
+
+    rows = ui_theme.wrap_line('\x1b[31mone two three\x1b[0m four ' + 'x' * 12, 10)
+    assert [w for _, w in rows] == [7, 10, 10, 2]
+    assert rows[1][0].startswith('\x1b[31m') and rows[0][0].endswith('\x1b[0m')
+    print("✓ Single-pass wrap keeps colour across breaks and splits long words")
+
+    content = '\n'.join(['plain', '\x1b[32mcoloured\x1b[0m', '表 🔧 wide', 'word ' * 30])
+    box = Theme.box(content, 'Wide 🔧', width=40).split('\n')
+    widths = {ui_theme.display_width(line) for line in box}
+    assert len(widths) == 1 and widths.pop() <= 40
+    assert len(box) > 6
+    print(f"✓ Box of {len(box)} rows aligned within 40 columns")
+
+
+if __name__ == "__main__":
+    test_cached_output_matches_uncached()
+    test_batch_tool_rendering()
+    test_display_width_and_wrapped_boxes()
+    print("\n✅ All tests passed!")
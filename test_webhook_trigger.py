@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Test the push webhook listener and the ls-remote polling check (no network)"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+from github_automated_builder import GitHubAutomatedBuilder
+from webhook_listener import WebhookListener, post_push
+
+
+def test_signed_pushes_are_debounced():
+    """Bad signatures are refused; a burst of pushes becomes one trigger"""
+    async def scenario():
+        listener = await WebhookListener("s3cret", port=0, branch="main", debounce=0.2).start()
+        url = f"http://127.0.0.1:{listener.port}/"
+        try:
+            statuses = [await asyncio.to_thread(post_push, url, "wrong")]
+            statuses.append(await asyncio.to_thread(post_push, url, "s3cret", "refs/heads/feature"))
+            for _ in range(3):
+                statuses.append(await asyncio.to_thread(post_push, url, "s3cret"))
+            first = await listener.wait(timeout=2)
+            second = await listener.wait(timeout=0.5)
+            return statuses, first, second, listener.pushes
+        finally:
+            await listener.stop()
+
+    statuses, first, second, pushes = asyncio.run(scenario())
+    print(f"✓ Delivery statuses: {statuses}")
+    assert statuses == [401, 202, 202, 202, 202]
+    assert pushes == 3
+    assert first is True and second is False
+    print("✓ Three pushes produced a single trigger")
+
+
+def test_remote_changed_uses_ls_remote():
+    """Polling only reports a change once the remote branch moves"""
+    def git(cwd, *args):
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                       cwd=cwd, check=True, capture_output=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        git(tmp, "init", "-q", "--bare", "-b", "main", "origin.git")
+        git(tmp, "clone", "-q", "origin.git", "author")
+        (tmp / "author" / "spec.md").write_text("# Spec")
+        git(tmp / "author", "add", "spec.md")
+        git(tmp / "author", "commit", "-q", "-m", "spec")
+        git(tmp / "author", "push", "-q", "origin", "HEAD:main")
+        git(tmp, "clone", "-q", "origin.git", "specs")
+
+        config_file = tmp / "builder_config.json"
+        config_file.write_text(json.dumps({"specs_repo": "unused", "output_repo": "unused",
+                                           "work_directory": str(tmp)}))
+        os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+        builder = GitHubAutomatedBuilder(str(config_file))
+
+        assert asyncio.run(builder.remote_changed(builder.specs_dir)) is False
+        (tmp / "author" / "spec.md").write_text("# Spec v2")
+        git(tmp / "author", "commit", "-q", "-am", "spec v2")
+        git(tmp / "author", "push", "-q", "origin", "HEAD:main")
+        assert asyncio.run(builder.remote_changed(builder.specs_dir)) is True
+        print("✓ ls-remote detects the new specs commit without pulling")
+
+
+if __name__ == "__main__":
+    test_signed_pushes_are_debounced()
+    test_remote_changed_uses_ls_remote()
+    print("\n✅ All tests passed!")
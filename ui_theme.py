@@ -6,7 +6,12 @@ Uses ANSI escape codes for rich terminal output.
 
 import sys
 import os
-from typing import Optional, Dict, Any
+import re
+import shutil
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from datetime import datetime
 
 
@@ -97,98 +102,256 @@ class Icons:
     PROGRESS_FULL = '█'
 
 
+# Display width: what a string occupies on screen, not len()
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+# An escape sequence, a run of whitespace, or a run of anything else
+WRAP_TOKEN = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\s+|[^\s\x1b]+|\x1b')
+SGR_RESET = ('\x1b[0m', '\x1b[m')
+
+
+@lru_cache(maxsize=4096)
+def char_width(ch: str) -> int:
+    """Terminal columns for one character: 0 for combining marks and joiners, 2 for wide/emoji"""
+    if ch in '\u200d\ufe0f\ufe0e' or unicodedata.combining(ch) or unicodedata.category(ch) in ('Mn', 'Me', 'Cf'):
+        return 0
+    if unicodedata.east_asian_width(ch) in ('W', 'F'):
+        return 2
+    return 1
+
+
+@lru_cache(maxsize=8192)
+def display_width(text: str) -> int:
+    """Visible width of text, ignoring ANSI escapes"""
+    if text.isascii():
+        if '\x1b' not in text:
+            return len(text)
+        return len(ANSI_ESCAPE.sub('', text))
+    return sum(map(char_width, ANSI_ESCAPE.sub('', text)))
+
+
+def terminal_width(default: int = 80) -> int:
+    return shutil.get_terminal_size((default, 24)).columns
+
+
+def wrap_line(line: str, width: int) -> List[Tuple[str, int]]:
+    """Greedy word wrap of one line to width columns, as (row, row width) pairs
+    
+    One pass over the line's tokens, each measured once. Words wider than
+    the row are split by character. Colour escapes active at a break are
+    reset at the end of the row and reopened on the next.
+    """
+    line_width = display_width(line)
+    if line_width <= width:
+        return [(line, line_width)]
+    
+    rows: List[Tuple[str, int]] = []
+    row: List[str] = []
+    row_width = 0
+    space = ''  # whitespace since the last word, kept only if the next word fits
+    active = ''
+    
+    def emit():
+        nonlocal row, row_width
+        rows.append((''.join(row) + (SGR_RESET[0] if active else ''), row_width))
+        row, row_width = ([active] if active else []), 0
+    
+    for token in WRAP_TOKEN.findall(line):
+        if token[0] == '\x1b':
+            row.append(token)
+            active = '' if token in SGR_RESET else active + token
+            continue
+        if token.isspace():
+            space = token
+            continue
+        token_width = display_width(token)
+        space_width = len(space)
+        if row_width and row_width + space_width + token_width > width:
+            emit()  # the whitespace at the break is dropped
+        elif space_width < width:
+            row.append(space)
+            row_width += space_width
+        space = ''
+        if row_width + token_width > width:
+            for ch in token:
+                w = char_width(ch)
+                if row_width and row_width + w > width:
+                    emit()
+                row.append(ch)
+                row_width += w
+            continue
+        row.append(token)
+        row_width += token_width
+    if row_width or not rows:
+        emit()
+    return rows
+
+
+TOOL_ICONS = {
+    'Edit': Icons.FILE_EDIT,
+    'Write': Icons.FILE_WRITE,
+    'Read': Icons.FILE_READ,
+    'Bash': Icons.TERMINAL,
+    'Search': Icons.SEARCH,
+}
+PATH_TOOLS = ('Edit', 'Write', 'Read')
+
+
+def color_enabled() -> bool:
+    """Colour mode the cached fragments below are keyed on"""
+    return bool(Colors.RESET)
+
+
+@lru_cache(maxsize=None)
+def fragments(color: bool) -> Dict[str, Any]:
+    """Static pieces of Theme output, built once per colour mode"""
+    return {
+        'rule': f"{Colors.SECONDARY}{Icons.BOX_HORIZONTAL * 60}{Colors.RESET}",
+        'double_rule': f"{Colors.SECONDARY}{'═' * 60}{Colors.RESET}",
+        'arrow': f" {Colors.MUTED}{Icons.ARROW_RIGHT}{Colors.RESET} {Colors.ACCENT}",
+        'modes': {
+            'default': f"{Colors.INFO}◆{Colors.RESET}",
+            'acceptEdits': f"{Colors.WARNING}◈{Colors.RESET}",
+            'bypassPermissions': f"{Colors.ERROR}◉{Colors.RESET}",
+        },
+        'status': {
+            'success': f"{Colors.SUCCESS}{Icons.SUCCESS}{Colors.RESET} ",
+            'error': f"{Colors.ERROR}{Icons.ERROR}{Colors.RESET} ",
+            'warning': f"{Colors.WARNING}{Icons.WARNING}{Colors.RESET} ",
+            'info': f"{Colors.INFO}{Icons.INFO}{Colors.RESET} ",
+        },
+        'summary_title': f"{Colors.PRIMARY}{Colors.BOLD}Session Summary{Colors.RESET}",
+        'value': f"{Colors.ACCENT}",
+        'reset': Colors.RESET,
+    }
+
+
+@lru_cache(maxsize=256)
+def _tool_head(tool_name: str, color: bool) -> str:
+    icon = TOOL_ICONS.get(tool_name, Icons.TOOL)
+    return f"{Colors.WARNING}{icon} {Colors.BOLD}{tool_name}{Colors.RESET}"
+
+
+@lru_cache(maxsize=256)
+def _header(text: str, width: int, color: bool) -> str:
+    text_width = display_width(text)
+    padding = (width - text_width - 2) // 2
+    line = f"{Colors.MUTED}{Icons.BOX_HORIZONTAL * width}{Colors.RESET}"
+    header = f"{Colors.PRIMARY}{Colors.BOLD}{' ' * padding}{text}{' ' * (width - padding - text_width - 2)}{Colors.RESET}"
+    return f"{line}\n{header}\n{line}"
+
+
+@lru_cache(maxsize=256)
+def _box_edges(max_width: int, title: Optional[str], color_code: str, color: bool):
+    """Top border, bottom border and side bars of a box"""
+    if title:
+        title_str = f" {title} "
+        title_width = display_width(title)
+        padding = (max_width - title_width) // 2
+        top = f"{color_code}{Icons.BOX_TOP_LEFT}{Icons.BOX_HORIZONTAL * padding}{Colors.BOLD}{title_str}{Colors.RESET}{color_code}{Icons.BOX_HORIZONTAL * (max_width - padding - title_width)}{Icons.BOX_TOP_RIGHT}{Colors.RESET}"
+    else:
+        top = f"{color_code}{Icons.BOX_TOP_LEFT}{Icons.BOX_HORIZONTAL * (max_width + 2)}{Icons.BOX_TOP_RIGHT}{Colors.RESET}"
+    bottom = f"{color_code}{Icons.BOX_BOTTOM_LEFT}{Icons.BOX_HORIZONTAL * (max_width + 2)}{Icons.BOX_BOTTOM_RIGHT}{Colors.RESET}"
+    left = f"{color_code}{Icons.BOX_VERTICAL}{Colors.RESET} "
+    right = f" {color_code}{Icons.BOX_VERTICAL}{Colors.RESET}"
+    return top, bottom, left, right
+
+
+@lru_cache(maxsize=64)
+def _prompt(cwd: str, mode: str, clock: str, color: bool) -> str:
+    mode_indicator = fragments(color)['modes'].get(mode, '')
+    return f"{Colors.MUTED}[{clock}]{Colors.RESET} {mode_indicator} {Colors.PRIMARY}{cwd}{Colors.RESET} {Colors.ACCENT}{Icons.PROMPT}{Colors.RESET} "
+
+
+_clock_minute = None
+_clock_text = ''
+
+
+def clock() -> str:
+    """Local HH:MM, formatted once per minute"""
+    global _clock_minute, _clock_text
+    minute = int(time.time() // 60)
+    if minute != _clock_minute:
+        _clock_minute, _clock_text = minute, datetime.now().strftime('%H:%M')
+    return _clock_text
+
+
 class Theme:
-    """UI theme utilities for consistent styling"""
+    """UI theme utilities for consistent styling
+    
+    Static fragments are built once per colour mode, and headers, box
+    borders and prompts are memoized, so hot paths like tool_use only
+    join cached strings.
+    """
     
     @staticmethod
     def header(text: str, width: int = 80) -> str:
         """Create a styled header"""
-        padding = (width - len(text) - 2) // 2
-        line = f"{Colors.MUTED}{Icons.BOX_HORIZONTAL * width}{Colors.RESET}"
-        header = f"{Colors.PRIMARY}{Colors.BOLD}{' ' * padding}{text}{' ' * (width - padding - len(text) - 2)}{Colors.RESET}"
-        return f"{line}\n{header}\n{line}"
+        return _header(text, width, color_enabled())
     
     @staticmethod
-    def box(content: str, title: Optional[str] = None, color: str = Colors.SECONDARY) -> str:
-        """Create a box around content"""
-        lines = content.split('\n')
-        max_width = max(len(line) for line in lines)
-        if title:
-            max_width = max(max_width, len(title) + 2)
-        
-        result = []
-        
-        # Top border
+    def box(content: str, title: Optional[str] = None, color: Optional[str] = None,
+            width: Optional[int] = None) -> str:
+        """Create a box around content, wrapped to fit width columns (the terminal by default)"""
+        inner = max((width or terminal_width()) - 4, 10)
+        rows = [row for line in content.split('\n') for row in wrap_line(line, inner)]
+        max_width = max(row_width for _, row_width in rows)
         if title:
-            title_str = f" {title} "
-            padding = (max_width - len(title)) // 2
-            top = f"{color}{Icons.BOX_TOP_LEFT}{Icons.BOX_HORIZONTAL * padding}{Colors.BOLD}{title_str}{Colors.RESET}{color}{Icons.BOX_HORIZONTAL * (max_width - padding - len(title_str) + 2)}{Icons.BOX_TOP_RIGHT}{Colors.RESET}"
-        else:
-            top = f"{color}{Icons.BOX_TOP_LEFT}{Icons.BOX_HORIZONTAL * (max_width + 2)}{Icons.BOX_TOP_RIGHT}{Colors.RESET}"
-        result.append(top)
+            max_width = max(max_width, display_width(title) + 2)
         
-        # Content
-        for line in lines:
-            padding = max_width - len(line)
-            result.append(f"{color}{Icons.BOX_VERTICAL}{Colors.RESET} {line}{' ' * padding} {color}{Icons.BOX_VERTICAL}{Colors.RESET}")
-        
-        # Bottom border
-        bottom = f"{color}{Icons.BOX_BOTTOM_LEFT}{Icons.BOX_HORIZONTAL * (max_width + 2)}{Icons.BOX_BOTTOM_RIGHT}{Colors.RESET}"
+        top, bottom, left, right = _box_edges(max_width, title, Colors.SECONDARY if color is None else color,
+                                              color_enabled())
+        result = [top]
+        for row, row_width in rows:
+            result.append(f"{left}{row}{' ' * (max_width - row_width)}{right}")
         result.append(bottom)
-        
         return '\n'.join(result)
     
     @staticmethod
     def prompt(cwd: str, mode: str = 'default') -> str:
         """Create a styled prompt"""
-        time = datetime.now().strftime('%H:%M')
-        mode_indicator = {
-            'default': f"{Colors.INFO}◆{Colors.RESET}",
-            'acceptEdits': f"{Colors.WARNING}◈{Colors.RESET}",
-            'bypassPermissions': f"{Colors.ERROR}◉{Colors.RESET}"
-        }.get(mode, '')
-        
-        return f"{Colors.MUTED}[{time}]{Colors.RESET} {mode_indicator} {Colors.PRIMARY}{cwd}{Colors.RESET} {Colors.ACCENT}{Icons.PROMPT}{Colors.RESET} "
+        return _prompt(cwd, mode, clock(), color_enabled())
     
     @staticmethod
     def status(message: str, status: str = 'info') -> str:
         """Create a status message with icon"""
-        icons_colors = {
-            'success': (Icons.SUCCESS, Colors.SUCCESS),
-            'error': (Icons.ERROR, Colors.ERROR),
-            'warning': (Icons.WARNING, Colors.WARNING),
-            'info': (Icons.INFO, Colors.INFO),
-        }
-        icon, color = icons_colors.get(status, (Icons.INFO, Colors.INFO))
-        return f"{color}{icon}{Colors.RESET} {message}"
+        styles = fragments(color_enabled())['status']
+        return f"{styles.get(status, styles['info'])}{message}"
     
     @staticmethod
-    def tool_use(tool_name: str, params: Dict[str, Any]) -> str:
-        """Format tool usage display"""
-        tool_icons = {
-            'Edit': Icons.FILE_EDIT,
-            'Write': Icons.FILE_WRITE,
-            'Read': Icons.FILE_READ,
-            'Bash': Icons.TERMINAL,
-            'Search': Icons.SEARCH,
-        }
-        icon = tool_icons.get(tool_name, Icons.TOOL)
-        
-        result = f"\n{Colors.SECONDARY}{'─' * 60}{Colors.RESET}\n"
-        result += f"{Colors.WARNING}{icon} {Colors.BOLD}{tool_name}{Colors.RESET}"
-        
-        # Add relevant parameters
-        if tool_name in ['Edit', 'Write', 'Read'] and 'file_path' in params:
-            result += f" {Colors.MUTED}{Icons.ARROW_RIGHT}{Colors.RESET} {Colors.ACCENT}{params['file_path']}{Colors.RESET}"
+    def tool_line(tool_name: str, params: Dict[str, Any]) -> str:
+        """Icon, tool name and its most relevant parameter"""
+        color = color_enabled()
+        result = _tool_head(tool_name, color)
+        if tool_name in PATH_TOOLS and 'file_path' in params:
+            f = fragments(color)
+            result += f"{f['arrow']}{params['file_path']}{f['reset']}"
         elif tool_name == 'Bash' and 'command' in params:
+            f = fragments(color)
             cmd = params['command']
             if len(cmd) > 50:
                 cmd = cmd[:47] + '...'
-            result += f" {Colors.MUTED}{Icons.ARROW_RIGHT}{Colors.RESET} {Colors.ACCENT}{cmd}{Colors.RESET}"
-        
-        result += f"\n{Colors.SECONDARY}{'─' * 60}{Colors.RESET}"
+            result += f"{f['arrow']}{cmd}{f['reset']}"
         return result
     
+    @staticmethod
+    def tool_use(tool_name: str, params: Dict[str, Any]) -> str:
+        """Format tool usage display"""
+        rule = fragments(color_enabled())['rule']
+        return f"\n{rule}\n{Theme.tool_line(tool_name, params)}\n{rule}"
+    
+    @staticmethod
+    def tool_uses(events: Iterable[Tuple[str, Dict[str, Any]]]) -> str:
+        """Format many (tool_name, params) events in one pass, between a single pair of rules
+        
+        A single event renders exactly like tool_use().
+        """
+        rule = fragments(color_enabled())['rule']
+        lines = [Theme.tool_line(name, params) for name, params in events]
+        if not lines:
+            return ''
+        return '\n'.join(['', rule, *lines, rule])
+    
     @staticmethod
     def progress_bar(current: int, total: int, width: int = 30) -> str:
         """Create a progress bar"""
@@ -205,14 +368,15 @@ class Theme:
     @staticmethod
     def session_summary(duration_ms: int, turns: int, cost: Optional[float], tools_used: list) -> str:
         """Format session summary"""
+        f = fragments(color_enabled())
         duration_s = duration_ms / 1000
         
         summary_lines = [
-            f"{Colors.SECONDARY}{'═' * 60}{Colors.RESET}",
-            f"{Colors.PRIMARY}{Colors.BOLD}Session Summary{Colors.RESET}",
-            f"{Colors.SECONDARY}{'─' * 60}{Colors.RESET}",
-            f"{Icons.BULLET} Duration: {Colors.ACCENT}{duration_s:.2f}s{Colors.RESET}",
-            f"{Icons.BULLET} Turns: {Colors.ACCENT}{turns}{Colors.RESET}",
+            f['double_rule'],
+            f['summary_title'],
+            f['rule'],
+            f"{Icons.BULLET} Duration: {f['value']}{duration_s:.2f}s{f['reset']}",
+            f"{Icons.BULLET} Turns: {f['value']}{turns}{f['reset']}",
         ]
         
         if cost:
@@ -222,7 +386,7 @@ class Theme:
             unique_tools = list(set(tools_used))
             summary_lines.append(f"{Icons.BULLET} Tools: {Colors.INFO}{', '.join(unique_tools)}{Colors.RESET}")
         
-        summary_lines.append(f"{Colors.SECONDARY}{'═' * 60}{Colors.RESET}")
+        summary_lines.append(f['double_rule'])
         
         return '\n'.join(summary_lines)
     
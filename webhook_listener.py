@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Minimal push-webhook listener for the automated builder.
+
+Accepts GitHub-style push deliveries, verifies the X-Hub-Signature-256 HMAC
+against a shared secret and debounces bursts of pushes into one trigger.
+Runs on the caller's asyncio loop with no dependencies beyond the stdlib.
+
+The script doubles as a local stand-in for GitHub when testing:
+    python webhook_listener.py post --secret s3cret [--url URL] [--ref REF]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import urllib.error
+import urllib.request
+
+
+MAX_BODY_BYTES = 25 * 1024 * 1024  # GitHub caps payloads at 25 MB
+DEFAULT_PORT = 8765
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized",
+               404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+def sign(secret: str, body: bytes) -> str:
+    """X-Hub-Signature-256 header value for body"""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+
+class WebhookListener:
+    """HTTP endpoint that turns verified push events into debounced triggers"""
+
+    def __init__(self, secret: str, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 path: str = "/", branch: str = None, debounce: float = 10.0):
+        if not secret:
+            raise ValueError("A webhook secret is required")
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path
+        self.branch = branch
+        self.debounce = debounce
+        self.pushes = 0
+        self.last_push = None
+        self._triggered = asyncio.Event()
+        self._timer = None
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._timer:
+            self._timer.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def wait(self, timeout: float = None) -> bool:
+        """Wait for a debounced push; False when timeout passed without one"""
+        try:
+            await asyncio.wait_for(self._triggered.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._triggered.clear()
+        return True
+
+    def _schedule_trigger(self):
+        # Every push restarts the quiet period, so a burst becomes one trigger
+        if self._timer:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.debounce, self._triggered.set)
+
+    def handle_delivery(self, event: str, body: bytes, signature: str) -> int:
+        """Process one delivery and return the HTTP status"""
+        if not verify_signature(self.secret, body, signature):
+            return 401
+        if event == "ping":
+            return 200
+        if event != "push":
+            return 202
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400
+        ref = payload.get("ref", "")
+        if self.branch and ref != f"refs/heads/{self.branch}":
+            return 202
+        self.pushes += 1
+        self.last_push = time.time()
+        print(f"📬 Push received: {ref} {payload.get('after', '')[:8]}")
+        self._schedule_trigger()
+        return 202
+
+    async def _handle(self, reader, writer):
+        status = 400
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, path = request_line.split(" ")[:2]
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if path.split("?")[0] != self.path:
+                status = 404
+            elif method != "POST":
+                status = 405
+            elif length > MAX_BODY_BYTES:
+                status = 413
+            else:
+                body = await asyncio.wait_for(reader.readexactly(length), 30)
+                status = self.handle_delivery(headers.get("x-github-event", ""), body,
+                                              headers.get("x-hub-signature-256", ""))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError):
+            pass
+
+        reason = STATUS_TEXT[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+        try:
+            await writer.drain()
+            writer.close()
+        except ConnectionError:
+            pass
+
+
+def post_push(url: str, secret: str, ref: str = "refs/heads/main", after: str = "0" * 40) -> int:
+    """Send a signed push delivery like GitHub would; returns the HTTP status"""
+    body = json.dumps({"ref": ref, "after": after}).encode()
+    request = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "X-GitHub-Event": "push",
+        "X-Hub-Signature-256": sign(secret, body),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send a signed test push to the builder webhook')
+    parser.add_argument('command', choices=['post'])
+    parser.add_argument('--url', default=f'http://127.0.0.1:{DEFAULT_PORT}/')
+    parser.add_argument('--secret', required=True)
+    parser.add_argument('--ref', default='refs/heads/main')
+    args = parser.parse_args()
+    print(f"HTTP {post_push(args.url, args.secret, args.ref)}")
+
+
+if __name__ == "__main__":
+    main()